@@ -1,6 +1,7 @@
 
 import streamlit as st
-from src.app.data import load_data, ANALYSIS_COLUMNS
+from src.app.data import load_data, load_tokens, ANALYSIS_COLUMNS
+from src.app.bundle import word_count_column
 from src.app.filters import render_filters
 import src.app.visualizations as viz
 import src.app.analysis as nlp
@@ -34,7 +35,10 @@ with tab1:
     col1.metric("Total Speeches", len(df_filtered))
     
     # Calculate approx lexical richness or just total words
-    total_words = df_filtered[text_column].apply(lambda x: len(str(x).split())).sum()
+    if word_count_column(text_column) in df_filtered.columns:
+        total_words = df_filtered[word_count_column(text_column)].sum()
+    else:
+        total_words = df_filtered[text_column].apply(lambda x: len(str(x).split())).sum()
     col2.metric("Total Words (Approx)", f"{total_words:,}")
     
     col3.metric("Date Range", f"{df_filtered['date'].min().date()} to {df_filtered['date'].max().date()}")
@@ -72,7 +76,7 @@ with tab2:
 
 # --- Tab 5: Word Tracker ---
 with tab5:
-    word_tracker.render_word_tracker(df_filtered, text_column)
+    word_tracker.render_word_tracker(df_filtered, text_column, load_tokens())
 
 # --- Tab 3: Speech Inspector ---
 with tab3:
@@ -0,0 +1,71 @@
+import sys,os
+sys.path.insert(0,os.path.abspath(os.path.join(os.path.dirname(__file__),'..')))
+import argparse
+import time
+import pandas as pd
+import spacy
+from src.text_cleaning import cleaner
+from src.text_cleaning.cleaner import FUSED_COLUMNS, basic_normalization, fused_cleaning, fused_cleaning_batch, lemmatization, token_cleaning
+from src.text_cleaning.executor import ShardedExecutor
+
+def benchmark(func, texts):
+    start=time.perf_counter()
+    result=func(texts)
+    return result, len(texts)/(time.perf_counter()-start)
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the row-wise cleaning steps with their nlp.pipe batch forms.')
+    parser.add_argument('--parquet', type=str, default='data/transcriptions.parquet', help='Transcription file to sample')
+    parser.add_argument('--rows', type=int, default=5000, help='Number of rows to clean')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--n-process', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=0, help='Also time the sharded executor with 1..N worker processes')
+    parser.add_argument('--engine', choices=cleaner.ENGINES, default=cleaner.DEFAULT_ENGINE, help='Engine of the step comparisons')
+    args = parser.parse_args()
+
+    cleaner.set_engine(args.engine)
+    texts=pd.read_parquet(args.parquet, columns=['text'])['text'].fillna("").astype(str).head(args.rows).tolist()
+    print(f"{len(texts)} rows, batch_size={args.batch_size}, n_process={args.n_process}")
+
+    raw=texts
+    for step in [basic_normalization, token_cleaning]:
+        row_wise, row_rate=benchmark(lambda values: [step(text) for text in values], texts)
+        batched, batch_rate=benchmark(lambda values: step.batch(values, batch_size=args.batch_size, n_process=args.n_process), texts)
+        assert batched == row_wise, f"{step.__name__}: batch output differs"
+        print(f"{step.__name__:20s} row-wise {row_rate:8.1f} rows/sec | nlp.pipe {batch_rate:8.1f} rows/sec | x{batch_rate/row_rate:.1f}")
+        # The next step cleans the output of this one, like the pipeline
+        texts=batched
+
+    def stepwise(values):
+        basic=basic_normalization.batch(values, batch_size=args.batch_size, n_process=args.n_process)
+        no_stopwords=token_cleaning.batch(basic, batch_size=args.batch_size, n_process=args.n_process)
+        return {'text_basic': basic, 'text_no_stopwords': no_stopwords, 'text_lemmatized': [lemmatization(text) for text in no_stopwords]}
+    chained, chain_rate=benchmark(stepwise, raw)
+    fused, fused_rate=benchmark(lambda values: fused_cleaning_batch(values, batch_size=args.batch_size, n_process=args.n_process), raw)
+    assert all(fused[col] == chained[col] for col in FUSED_COLUMNS), "fused output differs"
+    print(f"{'3 steps':20s} stepwise {chain_rate:8.1f} rows/sec | fused    {fused_rate:8.1f} rows/sec | x{fused_rate/chain_rate:.1f}")
+
+    base_rate=None
+    for workers in range(1, args.workers + 1):
+        with ShardedExecutor(n_workers=workers, batch_size=args.batch_size) as executor:
+            executor.map(fused_cleaning, raw[:workers])  # starts the workers, model loading left out
+            sharded, rate=benchmark(lambda values: executor.map(fused_cleaning, values), raw)
+        assert sharded == fused, "sharded output differs"
+        base_rate=base_rate or rate
+        print(f"{'sharded fused':20s} {workers:2d} workers {rate:8.1f} rows/sec | x{rate/base_rate:.1f} of 1 worker")
+
+    if not spacy.util.is_package(cleaner.MODEL_NAME):
+        print(f"{cleaner.MODEL_NAME} is not installed, skipping the engine comparison")
+        return
+    rates={}
+    outputs={}
+    for engine in ['model', 'tokenizer']:
+        cleaner.set_engine(engine)
+        cleaner.get_nlp()  # loading time left out
+        outputs[engine], rates[engine]=benchmark(lambda values: fused_cleaning_batch(values, batch_size=args.batch_size, n_process=args.n_process), raw)
+    cleaner.set_engine(args.engine)
+    assert outputs['tokenizer'] == outputs['model'], "tokenizer engine output differs"
+    print(f"{'fused engines':20s} model    {rates['model']:8.1f} rows/sec | tokenizer {rates['tokenizer']:7.1f} rows/sec | x{rates['tokenizer']/rates['model']:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import sys,os
+sys.path.insert(0,os.path.abspath(os.path.join(os.path.dirname(__file__),'..','src')))
+import argparse
+import time
+from pathlib import Path
+from bs4 import BeautifulSoup
+from rollcall.page_extractor import extract_speech_page
+from rollcall.speech_decomposer import (get_title, get_date, get_cleaned_categories, get_nbr_sentences_nbr_words_nbr_seconds, get_candidate_transcriptions)
+
+def decomposer_pass(html, candidate_last_name, candidate_full_name):
+    soup=BeautifulSoup(html,'html.parser')
+    get_title(soup)
+    get_date(soup)
+    get_nbr_sentences_nbr_words_nbr_seconds(soup, candidate_last_name)
+    get_cleaned_categories(soup)
+    get_candidate_transcriptions(soup, candidate_full_name)
+
+def extractor_pass(html, candidate_last_name, candidate_full_name):
+    extract_speech_page(html).to_record(candidate_last_name, candidate_full_name)
+
+def benchmark(func, pages, repeat, candidate_last_name, candidate_full_name):
+    start=time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            func(html, candidate_last_name, candidate_full_name)
+    elapsed=time.perf_counter()-start
+    return len(pages)*repeat/elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the single-pass extractor with the speech_decomposer functions.')
+    parser.add_argument('--pages-dir', type=str, default='tests/fixtures/factbase', help='Folder of saved transcript pages (*.html)')
+    parser.add_argument('--repeat', type=int, default=20, help='Number of passes over the folder')
+    parser.add_argument('--last-name', type=str, default='Trump')
+    parser.add_argument('--full-name', type=str, default='Donald Trump')
+    args = parser.parse_args()
+
+    pages=[path.read_text(encoding='utf-8') for path in sorted(Path(args.pages_dir).glob('*.html'))]
+    if not pages:
+        print(f"No .html pages found in {args.pages_dir}")
+        return
+    print(f"{len(pages)} pages x {args.repeat} passes")
+
+    decomposer_rate=benchmark(decomposer_pass, pages, args.repeat, args.last_name, args.full_name)
+    extractor_rate=benchmark(extractor_pass, pages, args.repeat, args.last_name, args.full_name)
+    print(f"speech_decomposer (html.parser): {decomposer_rate:8.1f} pages/sec")
+    print(f"page_extractor (lxml, 1 pass):   {extractor_rate:8.1f} pages/sec")
+    print(f"speedup: x{extractor_rate/decomposer_rate:.1f}")
+
+if __name__ == "__main__":
+    main()
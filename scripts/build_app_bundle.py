@@ -0,0 +1,18 @@
+import sys,os
+sys.path.insert(0,os.path.abspath(os.path.join(os.path.dirname(__file__),'..')))
+from src.app.bundle import build_bundle
+import argparse
+import time
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the memory-mapped data bundle loaded by the Streamlit dashboard.')
+    parser.add_argument('--data-dir', type=str, default='data', help='Directory containing the parquet files')
+    parser.add_argument('--output', type=str, default=None, help='Path of the bundle (defaults to <data-dir>/app_bundle.arrow)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    path = build_bundle(args.data_dir, args.output)
+    print(f"Wrote {path} in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ from pathlib import Path
 # Add src to path
 sys.path.append(str(Path(__file__).parent.parent))
 
+from src.text_cleaning.cache import CACHE_FILE, CleaningCache
 from src.text_cleaning.cleaner import apply_cleaning_to_parquet
 
 def main():
@@ -13,15 +14,18 @@ def main():
     print(f"Applying cleaning to {parquet_path}...")
     print(f"Output column: {output_column}")
     
-    apply_cleaning_to_parquet(
-        parquet_path=parquet_path,
-        output_column=output_column,
-        remove_stopwords=True,
-        remove_punctuation=True,
-        lemmatize=True,
-        remove_brackets=True,
-        overwrite=True
-    )
+    # Shared with run_pipeline.py, paragraphs cleaned by a previous run are not cleaned again
+    with CleaningCache(f"data/{CACHE_FILE}") as cache:
+        apply_cleaning_to_parquet(
+            parquet_path=parquet_path,
+            output_column=output_column,
+            remove_stopwords=True,
+            remove_punctuation=True,
+            lemmatize=True,
+            remove_brackets=True,
+            overwrite=True,
+            cache=cache
+        )
     
     print("Done!")
 
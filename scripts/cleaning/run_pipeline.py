@@ -2,71 +2,140 @@ import sys
 from pathlib import Path
 import logging
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
 
 # Add project root to path
 project_root = Path(__file__).resolve().parent.parent.parent
 if str(project_root) not in sys.path:
     sys.path.append(str(project_root))
 
-from src.text_cleaning.cleaner import basic_normalization, token_cleaning, lemmatization
-from src.text_cleaning.pipeline import apply_processing_step
+from src.text_cleaning.cleaner import (CLEANING_VERSION, DEFAULT_ENGINE, ENGINES, FUSED_COLUMNS, basic_normalization,
+                                       fused_cleaning, lemmatization, set_engine, token_cleaning)
+from src.text_cleaning.cache import CACHE_FILE, DEFAULT_MAX_BYTES, CleaningCache
+from src.text_cleaning.executor import ShardedExecutor
+from src.text_cleaning.lemmas import LEMMA_TABLE_FILE, load_lemma_table, save_lemma_table
+from src.text_cleaning.dag import CleaningDAG, Step
+from src.text_cleaning.pipeline import STREAM_ROWS
+from src.parquet.dataset import compact_dataset
+from src.parquet.speech_texts import build_speech_texts
+from src.parquet.tokens import build_token_corpus
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def run_pipeline(target_files, overwrite=False):
+def run_pipeline(target_files, overwrite=False, batch_size=1000, n_process=1, stepwise=False, workers=1, cache=None,
+                 stream=False, stream_rows=STREAM_ROWS):
     """
     Runs the 3-step cleaning pipeline on the target files.
+
+    By default the three steps run as one fused step tokenizing each transcription once,
+    `stepwise=True` runs them one after the other (same output).
+
+    With `workers > 1`, transcriptions are cleaned in shards over a pool of `workers`
+    processes (see `ShardedExecutor`) and the files are processed concurrently.
+    With a `cache` (`CleaningCache`), texts cleaned by a previous run or in the other file
+    are not cleaned again. With `stream=True`, files are cleaned `stream_rows` rows at a
+    time, memory stays bounded by one batch.
     """
     
-    # Define pipeline steps
-    steps = [
-        {
-            "name": "Step 1: Basic Normalization",
-            "input_col": "text",
-            "output_col": "text_basic",
-            "func": basic_normalization
-        },
-        {
-            "name": "Step 2: Token Cleaning",
-            "input_col": "text_basic",
-            "output_col": "text_no_stopwords",
-            "func": token_cleaning
-        },
-        {
-            "name": "Step 3: Lemmatization",
-            "input_col": "text_no_stopwords",
-            "output_col": "text_lemmatized",
-            "func": lemmatization
-        }
-    ]
+    # Cleaning steps, wired by their input and output columns
+    fused_dag = CleaningDAG([
+        Step("Fused cleaning (normalization, token cleaning, lemmatization)", fused_cleaning,
+             "text", FUSED_COLUMNS, CLEANING_VERSION),
+    ])
+    stepwise_dag = CleaningDAG([
+        Step("Step 1: Basic Normalization", basic_normalization, "text", ["text_basic"], CLEANING_VERSION),
+        Step("Step 2: Token Cleaning", token_cleaning, "text_basic", ["text_no_stopwords"], CLEANING_VERSION),
+        Step("Step 3: Lemmatization", lemmatization, "text_no_stopwords", ["text_lemmatized"], CLEANING_VERSION),
+    ])
+    dag = stepwise_dag if stepwise else fused_dag
     
     data_dir = project_root / 'data'
-    
-    for filename in target_files:
+    # Lemmas of the previous runs, only new words go through simplemma
+    lemma_path = data_dir / LEMMA_TABLE_FILE
+    loaded = load_lemma_table(lemma_path)
+    if loaded:
+        logging.info(f"Preloaded {loaded} lemmas from {lemma_path}")
+
+    def process_file(filename, executor=None):
+        """
+        Cleans one file, then rebuilds its speech-level texts and token ids.
+
+        Returns:
+            set: The tokens of its vocabulary, empty if the file is missing.
+        """
         filepath = data_dir / filename
+        # Speeches appended by process_speeches.py live in fragments until compacted
+        merged = compact_dataset(filepath)
+        if merged:
+            logging.info(f"Compacted {merged} fragment(s) into {filename}")
         if not filepath.exists():
             logging.error(f"File not found: {filepath}")
-            continue
+            return set()
             
         logging.info(f"Processing file: {filename}")
         
-        for step in steps:
-            logging.info(f"--- {step['name']} ---")
-            apply_processing_step(
-                parquet_path=str(filepath),
-                input_col=step['input_col'],
-                output_col=step['output_col'],
-                step_func=step['func'],
-                overwrite=overwrite
-            )
+        # One read and one write for the three steps, only the stale rows are recomputed
+        dag.run_file(filepath, overwrite=overwrite, batch_size=batch_size, n_process=n_process,
+                     executor=executor, cache=cache, stream=stream, stream_rows=stream_rows)
+
+        # Full speech texts served by SpeechCorpus / OtherCandidatesCorpus.get_full_speeches
+        output_path = build_speech_texts(filepath)
+        logging.info(f"Wrote speech-level texts to {output_path}")
+        tokens_path, vocab_path = build_token_corpus(filepath)
+        logging.info(f"Wrote token ids to {tokens_path} and {vocab_path}")
+        return set(pd.read_parquet(vocab_path, columns=['token'])['token'])
+
+    vocabulary = set()
+    if workers > 1:
+        # Both files are cleaned at the same time, their shards share one process pool
+        with ShardedExecutor(n_workers=workers, batch_size=batch_size, lemma_table=lemma_path) as executor:
+            with ThreadPoolExecutor(max_workers=len(target_files)) as files_pool:
+                for tokens in files_pool.map(lambda filename: process_file(filename, executor), target_files):
+                    vocabulary |= tokens
+            executor.log_throughput()
+    else:
+        for filename in target_files:
+            vocabulary |= process_file(filename)
+
+    if cache is not None:
+        info = cache.info()
+        logging.info(f"Cleaning cache: {info['hits']} hits, {info['misses']} misses ({info['hit_rate']:.0%}), "
+                     f"{info['entries']} entries, {info['bytes'] / 1024 ** 2:.0f} MB, {info['evicted']} evicted")
+
+    if vocabulary:
+        saved = save_lemma_table(lemma_path, vocabulary)
+        logging.info(f"Saved {saved} lemmas to {lemma_path}")
             
     logging.info("Pipeline completed for all files.")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Run text cleaning pipeline.')
-    parser.add_argument('--overwrite', action='store_true', help='Overwrite existing columns.')
+    parser.add_argument('--overwrite', action='store_true', help='Recompute every row, not only new or changed ones.')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Texts per nlp.pipe batch.')
+    parser.add_argument('--n-process', type=int, default=1, help='Processes used by nlp.pipe.')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes cleaning shards of the files in parallel.')
+    parser.add_argument('--no-cache', action='store_true', help='Do not use the persistent cleaning cache.')
+    parser.add_argument('--cache-size-mb', type=int, default=DEFAULT_MAX_BYTES // 1024 ** 2,
+                        help='Size bound of the cleaning cache.')
+    parser.add_argument('--stream', action='store_true', help='Clean the files in batches of rows, with bounded memory.')
+    parser.add_argument('--stream-rows', type=int, default=STREAM_ROWS, help='Rows per batch with --stream.')
+    parser.add_argument('--engine', choices=ENGINES, default=DEFAULT_ENGINE,
+                        help='spaCy pipeline: tokenizer only (default) or the full en_core_web_sm model.')
+    parser.add_argument('--stepwise', action='store_true', help='Run the three steps separately instead of the fused pass.')
     args = parser.parse_args()
     
     target_files = ['transcriptions.parquet', 'other_transcriptions.parquet']
     
-    run_pipeline(target_files, overwrite=args.overwrite)
+    set_engine(args.engine)
+    cache = None
+    if not args.no_cache:
+        cache = CleaningCache(project_root / 'data' / CACHE_FILE, max_bytes=args.cache_size_mb * 1024 ** 2)
+    try:
+        run_pipeline(target_files, overwrite=args.overwrite, batch_size=args.batch_size, n_process=args.n_process,
+                     stepwise=args.stepwise, workers=args.workers, cache=cache, stream=args.stream,
+                     stream_rows=args.stream_rows)
+    finally:
+        if cache is not None:
+            cache.close()
@@ -0,0 +1,20 @@
+import sys,os
+sys.path.insert(0,os.path.abspath(os.path.join(os.path.dirname(__file__),'..','src')))
+from parquet.dataset import compact_dataset, COMPACT_ROW_GROUP_SIZE
+import argparse
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge the Parquet fragments written by process_speeches.py into large row groups.')
+    parser.add_argument('--data-dir', type=str, default='data', help='Directory containing the parquet files')
+    parser.add_argument('--row-group-size', type=int, default=COMPACT_ROW_GROUP_SIZE, help='Number of rows per row group')
+    args = parser.parse_args()
+
+    # Trump files have no prefix, Harris and Biden share the "other_" files
+    for prefix in ["", "other_"]:
+        for name in ["speeches.parquet", "transcriptions.parquet"]:
+            path = os.path.join(args.data_dir, f"{prefix}{name}")
+            merged = compact_dataset(path, row_group_size=args.row_group_size)
+            print(f"{path}: merged {merged} fragment(s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import sys,os
+sys.path.insert(0,os.path.abspath(os.path.join(os.path.dirname(__file__),'..','src')))
+from parquet.convert import convert_sqlite_to_parquet, DEFAULT_BATCH_SIZE
+import argparse
+
+def main():
+    parser = argparse.ArgumentParser(description='Stream the SQLite speeches database into the Parquet files.')
+    parser.add_argument('--candidate', type=str, default='trump', choices=['trump', 'other'], help='trump (speeches.db) or other (other_candidate.db)')
+    parser.add_argument('--incremental', action='store_true', help='Only convert rows added since the last conversion')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows fetched from SQLite per batch')
+    args = parser.parse_args()
+
+    if args.candidate == 'trump':
+        db_path, file_prefix = "data/speeches.db", ""
+    else:
+        db_path, file_prefix = "data/other_candidate.db", "other_"
+
+    counts = convert_sqlite_to_parquet(db_path=db_path, file_prefix=file_prefix,
+                                       batch_size=args.batch_size, incremental=args.incremental)
+    print(f"Converted {counts['speeches']} speeches and {counts['transcriptions']} transcriptions from {db_path}")
+
+if __name__ == "__main__":
+    main()
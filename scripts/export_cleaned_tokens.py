@@ -1,35 +1,41 @@
+import sys
 from pathlib import Path
-import sqlite3, json, re
-import pandas as pd
-import spacy
+import argparse
+import logging
 
-DATA_DIR = Path(__file__).resolve().parents[1] / "data"
-DB_PATH = DATA_DIR / "speeches.db"
-OUTPUT = DATA_DIR / "cleaned_tokens.json"
-
-nlp = spacy.load("en_core_web_sm")
+# Add project root to path
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
 
-def load_transcriptions():
-    with sqlite3.connect(DB_PATH) as conn:
-        return pd.read_sql_query("SELECT text FROM Transcriptions", conn)["text"]
+from src.text_cleaning.cleaner import ENGINES, set_engine
+from src.text_cleaning.export import (DEFAULT_BATCH_SIZE, DEFAULT_SHARD_TOKENS, EXPORT_DIR, FORMATS,
+                                      export_tokens)
 
-def build_clean_text(phrases):
-    pieces = []
-    for phrase in phrases.dropna():
-        chunks = [re.sub(r"\[.*?\]", "", part).strip()
-                  for part in re.split(r"[.!?]+", str(phrase))]
-        pieces.extend(filter(None, chunks))
-    return " ".join(pieces)
+DATA_DIR = project_root / "data"
+DB_PATH = DATA_DIR / "speeches.db"
 
-def tokenize(text):
-    return [tok.lemma_ for tok in nlp(text)
-            if not tok.is_punct and not tok.is_stop]
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 def main():
-    phrases = load_transcriptions()
-    clean_text = build_clean_text(phrases)
-    cleaned_tokens = tokenize(clean_text)
-    OUTPUT.write_text(json.dumps(cleaned_tokens, ensure_ascii=False, indent=2), encoding="utf-8")
+    parser = argparse.ArgumentParser(description='Export the lemmatized tokens of every transcription, without punctuation and stopwords.')
+    parser.add_argument('--db', type=str, default=str(DB_PATH), help='SQLite database')
+    parser.add_argument('--output-dir', type=str, default=str(DATA_DIR / EXPORT_DIR), help='Directory of the shards')
+    parser.add_argument('--format', type=str, default='npy', choices=FORMATS,
+                        help='npy: token-id shards plus a vocabulary, jsonl: one line of tokens per transcription')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Transcriptions read and lemmatized per batch')
+    parser.add_argument('--shard-tokens', type=int, default=DEFAULT_SHARD_TOKENS, help='Tokens per shard file')
+    parser.add_argument('--n-process', type=int, default=1, help='Processes of nlp.pipe')
+    # spaCy lemmas by default, as the export has always produced
+    parser.add_argument('--engine', type=str, default='model', choices=ENGINES,
+                        help='model: en_core_web_sm lemmas, tokenizer: simplemma lemmas (no model needed)')
+    args = parser.parse_args()
+
+    set_engine(args.engine)
+    manifest = export_tokens(args.db, args.output_dir, fmt=args.format, batch_size=args.batch_size,
+                             shard_tokens=args.shard_tokens, n_process=args.n_process)
+    logging.info(f"Exported {manifest['tokens']} tokens of {manifest['transcriptions']} transcriptions "
+                 f"in {len(manifest['shards'])} shard(s) to {args.output_dir}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
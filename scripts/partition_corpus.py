@@ -0,0 +1,19 @@
+import sys,os
+sys.path.insert(0,os.path.abspath(os.path.join(os.path.dirname(__file__),'..','src')))
+from parquet.partition import write_partitioned_corpus, PARTITION_ROW_GROUP_SIZE
+import argparse
+
+def main():
+    parser = argparse.ArgumentParser(description='Write the speeches and transcriptions as campaign-partitioned datasets (data/corpus/) for filtered loading.')
+    parser.add_argument('--data-dir', type=str, default='data', help='Directory containing the parquet files')
+    parser.add_argument('--transcription-file', type=str, default='transcriptions.parquet', help='Transcription file to partition')
+    parser.add_argument('--row-group-size', type=int, default=PARTITION_ROW_GROUP_SIZE, help='Maximum number of rows per row group')
+    args = parser.parse_args()
+
+    speeches_dir, transcriptions_dir = write_partitioned_corpus(
+        args.data_dir, args.transcription_file, row_group_size=args.row_group_size
+    )
+    print(f"Wrote {speeches_dir} and {transcriptions_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,7 @@ sys.path.append(str(PROJECT_ROOT / "src"))
 
 from filtering_corpus.speech_corpus import SpeechCorpus
 from filtering_corpus.other_candidates import OtherCandidatesCorpus
+from parquet.tokens import TokenCorpus
 
 FIGURES_DIR = PROJECT_ROOT / "figures"
 FIGURES_DIR.mkdir(exist_ok=True)
@@ -46,11 +47,12 @@ def load_data():
     """
     data_dir = PROJECT_ROOT / "data"
 
-    # Trump
+    # Trump (le filtre de date est appliqué à la lecture)
     trump_corpus = SpeechCorpus(
         data_dir=str(data_dir),
-        transcription_file="transcriptions.parquet"
-    ).remove_speeches_before(2010)
+        transcription_file="transcriptions.parquet",
+        filters={"start_date": "2010-01-01"}
+    )
 
     df_trump = trump_corpus.get_full_speeches(
         text_columns=["text", "text_lemmatized"]
@@ -138,14 +140,48 @@ def lexical_diversity(text):
     }
 
 
-def process_lexical_diversity(df):
+def lexical_diversity_from_tokens(tokens, column="text_lemmatized"):
     """
-    Calcule la diversité lexicale sur le texte lemmatisé.
+    TTR et CTTR de chaque discours, calculés sur les identifiants de tokens.
     """
-    diversity = df["text_lemmatized"].apply(lexical_diversity)
-    diversity_df = pd.json_normalize(diversity)
+    n_tokens, n_types = tokens.type_token_counts(column)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return pd.DataFrame({
+            "speech_id": tokens.speech_ids,
+            "TTR": n_types / n_tokens,
+            "CTTR": n_types / np.sqrt(2 * n_tokens)
+        })
+
 
-    return pd.concat([df.reset_index(drop=True), diversity_df], axis=1)
+def load_token_corpora():
+    """
+    Tokens par candidat, None si le pipeline de nettoyage ne les a pas (re)générés.
+    """
+    data_dir = PROJECT_ROOT / "data"
+    trump = TokenCorpus.load(data_dir / "transcriptions.parquet", columns=["text_lemmatized"])
+    other = TokenCorpus.load(data_dir / "other_transcriptions.parquet", columns=["text_lemmatized"])
+    return {"Trump": trump, "Harris": other, "Biden": other}
+
+
+def process_lexical_diversity(df, token_corpora=None):
+    """
+    Calcule la diversité lexicale sur le texte lemmatisé.
+    Utilise les tokens du candidat quand ils sont disponibles, sinon découpe le texte.
+    """
+    token_corpora = token_corpora or {}
+    parts = []
+    for candidate, group in df.groupby("candidate", sort=False):
+        group = group.reset_index(drop=True)
+        tokens = token_corpora.get(candidate)
+        if tokens is not None:
+            diversity_df = group[["speech_id"]].merge(
+                lexical_diversity_from_tokens(tokens.subset(group["speech_id"])), on="speech_id", how="left"
+            )[["TTR", "CTTR"]]
+        else:
+            diversity_df = pd.json_normalize(group["text_lemmatized"].apply(lexical_diversity))
+        parts.append(pd.concat([group, diversity_df], axis=1))
+
+    return pd.concat(parts, ignore_index=True)
 
 
 def plot_lexical_diversity(df):
@@ -181,7 +217,7 @@ def main():
     print("\nLisibilité moyenne :")
     print(df.groupby("candidate")["flesch_kincaid_grade"].describe())
 
-    df = process_lexical_diversity(df)
+    df = process_lexical_diversity(df, load_token_corpora())
     plot_lexical_diversity(df)
 
     print("\nDiversité lexicale :")
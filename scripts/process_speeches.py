@@ -1,15 +1,56 @@
 import sys,os
 sys.path.insert(0,os.path.abspath(os.path.join(os.path.dirname(__file__),'..','src')))
-from rollcall.url_soupper import url_soupper
-from rollcall.speech_decomposer import (get_title, get_date, get_cleaned_categories, get_nbr_sentences_nbr_words_nbr_seconds, get_candidate_transcriptions)
-from rollcall.speeches_db import add_speech_to_parquet
-import sqlite3
-import json
+from rollcall.fetcher import PageFetcher
+from rollcall.page_cache import PageCache
+from rollcall.ingest_pipeline import IngestPipeline, parse_page
+from rollcall.speeches_db import init_db, pending_speeches, save_speeches
+from parquet.dataset import SpeechParquetWriter
+from parquet.convert import convert_sqlite_to_parquet
 import argparse
 
+def reparse_from_cache(conn, cache, candidate, candidate_last_name, candidate_full_name, person_name, db_path,
+                       parquet_prefix="", output_dir="data", batch_size=50):
+    """
+    Re-runs the page extractor over every cached page of the candidate, without network access.
+
+    Re-parsed transcriptions get new ids, so the Parquet files of the database are then
+    rebuilt from it (full conversion). Derived columns of the old ids are dropped and
+    recomputed by the next cleaning run; speech texts, tokens and the app bundle see
+    the new files and are rebuilt too.
+
+    Returns:
+        int: Number of re-parsed speeches.
+    """
+    rows=conn.execute("Select id, url from Speeches where candidate=?", (candidate,)).fetchall()
+    reparsed=0
+    batch=[]
+    for id, url in rows:
+        html=cache.get(url)
+        if html is None:
+            continue
+        id, url, parsed, _ = parse_page((id, url, html, candidate_last_name, candidate_full_name))
+        batch.append((id, url, parsed))
+        if len(batch) >= batch_size:
+            save_speeches(conn, batch, person_name)
+            reparsed+=len(batch)
+            batch=[]
+    if batch:
+        save_speeches(conn, batch, person_name)
+        reparsed+=len(batch)
+    print(f"Re-parsed {reparsed} cached speeches out of {len(rows)}")
+    if reparsed:
+        # Transcription ids change on re-parse, the Parquet files are rebuilt from the database
+        counts = convert_sqlite_to_parquet(db_path=db_path, output_dir=output_dir, file_prefix=parquet_prefix)
+        print(f"Rebuilt the Parquet files: {counts['speeches']} speeches, {counts['transcriptions']} transcriptions")
+    return reparsed
+
 def process_speeches():
     parser = argparse.ArgumentParser(description='Process speeches for a candidate.')
     parser.add_argument('--candidate', type=str, default='trump', choices=['trump', 'harris', 'biden'], help='Candidate to process (trump, harris, or biden)')
+    parser.add_argument('--workers', type=int, default=8, help='Number of pages fetched concurrently')
+    parser.add_argument('--parse-workers', type=int, default=None, help='Number of parsing processes (defaults to the number of CPUs)')
+    parser.add_argument('--cache-dir', type=str, default='data/html_cache', help='Directory of the raw HTML cache')
+    parser.add_argument('--from-cache', action='store_true', help='Re-parse every cached page of the candidate without network access')
     args = parser.parse_args()
 
     candidate = args.candidate.lower()
@@ -38,56 +79,31 @@ def process_speeches():
 
     print(f"Processing speeches for {candidate} from {db_path}")
 
-    conn=sqlite3.connect(db_path)
-    cur=conn.cursor()
-    # Filter by candidate name in URL to avoid mixing candidates in shared DB
-    rows=cur.execute("Select id, url from Speeches where title is NULL AND url LIKE ?", (f'%/{candidate}/%',)).fetchall()
-    for id, url in rows:
-        print(url)
-        soup=url_soupper(url)
-        title=get_title(soup)
-        date=get_date(soup)
-        nbr_sentences, nbr_words, nbr_seconds = get_nbr_sentences_nbr_words_nbr_seconds(soup, candidate_last_name)
-        categories=get_cleaned_categories(soup)
-        categories_str = json.dumps(categories, ensure_ascii=False)
-        candidate_transcript=get_candidate_transcriptions(soup, candidate_full_name)
+    # Also migrates older databases (candidate column, indexes, WAL)
+    conn=init_db(db_path)
+    cache=PageCache(args.cache_dir)
+
+    if args.from_cache:
+        reparse_from_cache(conn, cache, candidate, candidate_last_name, candidate_full_name, person_name,
+                           db_path, parquet_prefix)
+        conn.close()
+        return
+
+    # Filter by candidate to avoid mixing candidates in shared DB
+    rows=pending_speeches(conn, candidate)
+    ids_by_url = {url: id for id, url in rows}
+    # Fetched pages are kept in the cache so a parser fix does not need a re-download
+    fetcher = PageFetcher(max_workers=args.workers, cache=cache)
+    # Fetching, parsing and writing run as overlapping stages joined by bounded queues.
+    # Each batch is appended to the Parquet files as a fragment before it is committed
+    # to the database, so an interrupted run leaves no committed speech out of them.
+    with SpeechParquetWriter(file_prefix=parquet_prefix) as writer:
+        pipeline = IngestPipeline(fetcher, conn, writer, candidate_last_name, candidate_full_name, person_name,
+                                  parse_workers=args.parse_workers)
+        pipeline.run(ids_by_url)
+    print(pipeline.report())
 
-        cur.execute(""" Update Speeches Set title=?, date=?, nbr_sentences=?, nbr_words=?, nbr_seconds=?,categories=?, person_name=? where id=?""", (title, date, nbr_sentences, nbr_words, nbr_seconds, categories_str, person_name, id))
-        
-        transcription_data_list = []
-        for transcription in candidate_transcript:
-            cur.execute("""
-            INSERT INTO Transcriptions (speech_id, timestamp, text)
-            VALUES (?, ?, ?);
-        """, (id, transcription[0], transcription[1]))
-            transcription_id = cur.lastrowid
-            
-            transcription_data_list.append({
-                "id": transcription_id,
-                "speech_id": id,
-                "timestamp": transcription[0],
-                "text": transcription[1],
-                "duration": None, 
-                "person_name": person_name
-            })
-        conn.commit()
-        
-        # Add to Parquet
-        speech_data = {
-            "id": id,
-            "url": url,
-            "title": title,
-            "date": date,
-            "nbr_sentences": nbr_sentences,
-            "nbr_words": nbr_words,
-            "nbr_seconds": nbr_seconds,
-            "categories": categories_str,
-            "person_name": person_name
-        }
-            
-        add_speech_to_parquet(speech_data, transcription_data_list, file_prefix=parquet_prefix)
-        
     conn.close()
 
 if __name__=='__main__':
-    process_speeches()
\ No newline at end of file
+    process_speeches()
@@ -1,43 +1,54 @@
 import sys,os
 sys.path.insert(0,os.path.abspath(os.path.join(os.path.dirname(__file__),'..','src')))
-import requests
-import time
 from rollcall.browser_setup import get_browser
 from rollcall.speech_filter_action import open_page_close_popup_and_click_filters
-from rollcall.scroller import scroll_to_bottom
+from rollcall.scroller import scroll_to_bottom, scroll_until_known
 from rollcall.url_extractor import extract_urls
-from rollcall.storage import store_urls
+from rollcall.storage import store_urls, get_known_urls
 
 import argparse
 
-def main():
-    parser = argparse.ArgumentParser(description='Scrap speech URLs for a candidate.')
-    parser.add_argument('--candidate', type=str, default='trump', choices=['trump', 'harris', 'biden'], help='Candidate to scrap (trump, harris, or biden)')
-    args = parser.parse_args()
+CANDIDATES = ['trump', 'harris', 'biden']
 
-    candidate = args.candidate.lower()
-    
-    if candidate == 'trump':
-        url = 'https://rollcall.com/factbase/trump/search/'
-        db_path = "data/speeches.db"
-    elif candidate in ['harris', 'biden']:
-        url = f'https://rollcall.com/factbase/{candidate}/search/'
-        db_path = "data/other_candidate.db"
-    else:
-        print(f"Unknown candidate: {candidate}")
-        return
+def scrap_candidate(browser, candidate, incremental=False):
+    url = f'https://rollcall.com/factbase/{candidate}/search/'
+    db_path = "data/speeches.db" if candidate == 'trump' else "data/other_candidate.db"
 
     print(f"Scraping URLs for {candidate} from {url} into {db_path}")
 
     # Initialize DB if it doesn't exist
     from rollcall.speeches_db import init_db
-    init_db(db_path=db_path)
+    init_db(db_path=db_path).close()
 
-    browser = get_browser()
     open_page_close_popup_and_click_filters(browser, url)
-    scroll_to_bottom(browser)
-    urls = extract_urls(browser)
+    if incremental:
+        # Stops at the first batch of links that are all in the database
+        known_urls = get_known_urls(db_path=db_path)
+        urls = scroll_until_known(browser, known_urls)
+        print(f"{len([u for u in urls if u not in known_urls])} new URLs")
+    else:
+        scroll_to_bottom(browser)
+        urls = extract_urls(browser)
     store_urls(urls, db_path=db_path)
 
+def main():
+    parser = argparse.ArgumentParser(description='Scrap speech URLs for a candidate.')
+    parser.add_argument('--candidate', type=str, default='trump', choices=CANDIDATES + ['all'], help='Candidate to scrap (trump, harris, biden, or all)')
+    parser.add_argument('--incremental', action='store_true', help='Stop scrolling once the loaded speeches are already in the database')
+    parser.add_argument('--headless', action='store_true', help='Run Chrome without a window')
+    args = parser.parse_args()
+
+    candidate = args.candidate.lower()
+    candidates = CANDIDATES if candidate == 'all' else [candidate]
+
+    # A single browser is reused for every candidate
+    browser = get_browser(headless=args.headless)
+    try:
+        for candidate in candidates:
+            scrap_candidate(browser, candidate, incremental=args.incremental)
+    finally:
+        if args.headless:
+            browser.quit()
+
 if __name__ == "__main__":
     main()
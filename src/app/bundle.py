@@ -0,0 +1,148 @@
+import ast
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from src.filtering_corpus.speech_corpus import SpeechCorpus
+from src.parquet.dataset import source_signature
+
+# --- Constants ---
+ANALYSIS_COLUMNS = [
+    'text',
+    'text_basic',
+    'text_no_stopwords',
+    'text_lemmatized',
+]
+
+BUNDLE_FILE = "app_bundle.arrow"
+# Bump when the derived columns change, older bundles are then rebuilt
+BUNDLE_VERSION = 1
+SOURCE_METADATA_KEY = b"app_bundle_source"
+
+
+def parse_categories(x):
+    """
+    Parses a stored category list, ["Uncategorized"] if it is not a list.
+    """
+    try:
+        val = ast.literal_eval(x)
+        if isinstance(val, list):
+            return val
+        return ["Uncategorized"]
+    except Exception:
+        return ["Uncategorized"]
+
+
+def state_code(loc):
+    """
+    Extracts the state code from a location ("Town, STATE" or "STATE"), None for
+    foreign or unknown locations.
+    """
+    if not isinstance(loc, str): return None
+    if ',' in loc:
+        parts = loc.split(',')
+        candidate = parts[-1].strip()
+        if len(candidate) == 2 and candidate.isupper():
+            return candidate
+    # Fallback: maybe the location IS the state code?
+    if len(loc) == 2 and loc.isupper():
+        return loc
+    return None
+
+
+def word_count_column(text_column):
+    return f"word_count_{text_column}"
+
+
+def prepare_speeches(df):
+    """
+    Adds the columns derived for the dashboard to the full speeches of `get_full_speeches`.
+    """
+    # Ensure date is datetime
+    df['date'] = pd.to_datetime(df['date'])
+
+    # Parse categories from string to list
+    df['categories'] = df['categories'].fillna('["Uncategorized"]').apply(parse_categories)
+
+    # Fill NaN location/campaign for cleaner UI
+    df['location'] = df['location'].fillna('Unknown')
+    df['campaign'] = df['campaign'].fillna('Other')
+    df['state'] = df['location'].apply(state_code)
+
+    # Create a nice label for selection in Inspector
+    df['label'] = df['date'].dt.strftime('%Y-%m-%d') + " - " + df['location'] + " (" + df['title'].str[:30] + "...)"
+
+    for col in ANALYSIS_COLUMNS:
+        if col in df.columns:
+            df[word_count_column(col)] = df[col].apply(lambda x: len(str(x).split()))
+    return df
+
+
+def _signature(data_dir):
+    data_dir = Path(data_dir)
+    return {
+        "version": BUNDLE_VERSION,
+        "sources": source_signature([data_dir / "speeches.parquet", data_dir / "transcriptions.parquet"]),
+    }
+
+
+def build_bundle(data_dir="data", output_path=None):
+    """
+    Writes the dashboard dataframe as an uncompressed Arrow IPC (Feather v2) file,
+    which `read_bundle` memory-maps without copying the text columns.
+
+    Args:
+        data_dir (str): Directory containing the parquet files.
+        output_path (str, optional): Path of the bundle. Defaults to `data/app_bundle.arrow`.
+
+    Returns:
+        Path: The path of the written bundle.
+    """
+    output_path = Path(output_path) if output_path else Path(data_dir) / BUNDLE_FILE
+    signature = _signature(data_dir)
+
+    corpus = SpeechCorpus(data_dir=data_dir)
+    df = prepare_speeches(corpus.get_full_speeches(text_columns=ANALYSIS_COLUMNS))
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**table.schema.metadata, SOURCE_METADATA_KEY: json.dumps(signature)})
+    tmp_path = output_path.with_name(f".{output_path.name}.tmp")
+    # Compressed buffers would have to be decompressed into memory on read
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def is_bundle_current(data_dir="data", path=None):
+    """
+    True if the bundle exists and was built from the current Parquet files by this version.
+    """
+    path = Path(path) if path else Path(data_dir) / BUNDLE_FILE
+    if not path.exists():
+        return False
+    metadata = pa.ipc.open_file(pa.memory_map(str(path))).schema.metadata or {}
+    if SOURCE_METADATA_KEY not in metadata:
+        return False
+    return json.loads(metadata[SOURCE_METADATA_KEY]) == _signature(data_dir)
+
+
+def read_bundle(data_dir="data", path=None):
+    """
+    Memory-maps the bundle. String columns stay backed by the mapped Arrow buffers, so
+    the pages are shared with the OS cache instead of being copied in each worker.
+
+    Returns:
+        pd.DataFrame: The dashboard dataframe, as built by `prepare_speeches`.
+    """
+    path = Path(path) if path else Path(data_dir) / BUNDLE_FILE
+    # The mapping stays open as long as the buffers of the table reference it
+    table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+    string_dtype = pd.StringDtype("pyarrow")
+    df = table.to_pandas(types_mapper={pa.string(): string_dtype, pa.large_string(): string_dtype}.get)
+    # Lists come back as arrays, the filters and plots expect lists
+    df['categories'] = df['categories'].map(list)
+    return df
@@ -2,6 +2,7 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
+from src.app.bundle import state_code
 
 def render_map(df: pd.DataFrame):
     """
@@ -14,23 +15,10 @@ def render_map(df: pd.DataFrame):
         st.warning("No data available for map.")
         return
 
-    # Extract State Code from 'location' (Format: "Town, STATE")
-    # We assume standard "XX" format at the end of the string.
-    # Note: "Abroad" and "Unknown" will not match this and be excluded from US map.
-    def get_state(loc):
-        if not isinstance(loc, str): return None
-        if ',' in loc:
-            parts = loc.split(',')
-            candidate = parts[-1].strip()
-            if len(candidate) == 2 and candidate.isupper():
-                return candidate
-        # Fallback: maybe the location IS the state code?
-        if len(loc) == 2 and loc.isupper():
-            return loc
-        return None
-
     df_map = df.copy()
-    df_map['state'] = df_map['location'].apply(get_state)
+    if 'state' not in df_map.columns:
+        # Precomputed in the app bundle
+        df_map['state'] = df_map['location'].apply(state_code)
     
     # Filter out null states (Foreign, Unknown)
     df_us = df_map[df_map['state'].notna()]
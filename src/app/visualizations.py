@@ -2,6 +2,7 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
+from src.app.bundle import word_count_column
 
 def plot_time_series(df: pd.DataFrame):
     """Plots speeches per month."""
@@ -58,7 +59,10 @@ def plot_top_locations(df: pd.DataFrame):
 
 def plot_speech_length(df: pd.DataFrame, text_column: str):
     """Plots speech length vs date."""
-    df['word_count'] = df[text_column].apply(lambda x: len(str(x).split()))
+    if word_count_column(text_column) in df.columns:
+        df['word_count'] = df[word_count_column(text_column)]
+    else:
+        df['word_count'] = df[text_column].apply(lambda x: len(str(x).split()))
     # Convert categories to string for plotting (lists are unhashable)
     df_plot = df.copy()
     df_plot['categories_str'] = df_plot['categories'].apply(lambda x: ', '.join(x) if isinstance(x, list) else str(x))
@@ -3,19 +3,48 @@ import pandas as pd
 import plotly.express as px
 import re
 
-def render_word_tracker(df: pd.DataFrame, text_column: str):
+def count_words(df: pd.DataFrame, text_column: str, words: list, tokens=None) -> pd.DataFrame:
+    """
+    Counts the occurrences of each word in each speech.
+    
+    Uses the token ids when `tokens` holds the column and every word is a single token,
+    otherwise a case-insensitive word-boundary regex on the text.
+    
+    Args:
+        df: The filtered dataframe.
+        text_column: The column containing text to analyze.
+        words: The words to count.
+        tokens: Optional TokenCorpus of the speeches.
+        
+    Returns:
+        pd.DataFrame: One column of counts per word, indexed like `df`.
+    """
+    if tokens is not None and text_column in tokens and all(re.fullmatch(r"\w+", word) for word in words):
+        speech_tokens = tokens.subset(df['speech_id'])
+        # Every speech must have its tokens for the rows to line up
+        if len(speech_tokens.speech_ids) == len(df):
+            # Cleaned columns are lowercase
+            counts = speech_tokens.count_words(text_column, [word.lower() for word in words])
+            return pd.DataFrame(counts, index=df.index, columns=words)
+    return pd.DataFrame(
+        {word: df[text_column].str.count(f"(?i)\\b{word}\\b") for word in words}, index=df.index
+    )
+
+def render_word_tracker(df: pd.DataFrame, text_column: str, tokens=None):
     """
     Renders the Word Tracker tab content.
     
     Args:
         df: The filtered dataframe.
         text_column: The column containing text to analyze.
+        tokens: Optional TokenCorpus, used to count the words without scanning the text.
     """
     st.markdown("### Word Tracker")
     
     # 1. Inputs
     word_tracker_input = st.text_input("Enter words to track (comma separated)", value="")
-    tracked_words = [w.strip() for w in word_tracker_input.split(',') if w.strip()]
+    # Duplicates removed, each word is one column of counts
+    tracked_words = list(dict.fromkeys(w.strip() for w in word_tracker_input.split(',') if w.strip()))
     
     if not tracked_words:
         st.info("Enter words above to see their frequency over time.")
@@ -25,14 +54,12 @@ def render_word_tracker(df: pd.DataFrame, text_column: str):
     st.markdown("#### Global Statistics")
     stats_data = []
     
-    # Pre-calculate counts to avoid re-calculating for stats and chart separately if possible,
-    # but for simplicity we'll do it per word.
+    # Counts computed once for the stats and the chart
+    word_counts = count_words(df, text_column, tracked_words, tokens)
     
     for word in tracked_words:
-        # Use simple regex for word boundary
-        pattern = f"(?i)\\b{word}\\b"
-        total_count = df[text_column].str.count(pattern).sum()
-        speeches_with_word = df[df[text_column].str.contains(pattern,  regex=True)].shape[0]
+        total_count = word_counts[word].sum()
+        speeches_with_word = int((word_counts[word] > 0).sum())
         stats_data.append({
             "Word": word,
             "Total Occurrences": total_count,
@@ -51,8 +78,7 @@ def render_word_tracker(df: pd.DataFrame, text_column: str):
     
     chart_data = []
     for word in tracked_words:
-        pattern = f"(?i)\\b{word}\\b"
-        df_chart[f'count_{word}'] = df_chart[text_column].str.count(pattern)
+        df_chart[f'count_{word}'] = word_counts[word]
         
         # Group by month
         monthly = df_chart.groupby('year_month')[f'count_{word}'].sum().reset_index()
@@ -78,8 +104,7 @@ def render_word_tracker(df: pd.DataFrame, text_column: str):
     
     if selected_word:
         # Filter speeches that contain the word
-        pattern = f"(?i)\\b{selected_word}\\b"
-        search_results = df[df[text_column].str.contains(pattern, regex=True)].copy()
+        search_results = df[word_counts[selected_word] > 0].copy()
         
         if search_results.empty:
             st.warning(f"No speeches found containing '{selected_word}'.")
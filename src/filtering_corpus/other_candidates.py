@@ -1,22 +1,86 @@
 import pandas as pd
 from pathlib import Path
 
+try:
+    from parquet.dataset import (TRANSCRIPTION_METADATA_COLUMNS, dataset_columns, dataset_exists, read_parquet_dataset,
+                                 transcription_text_columns)
+    from parquet.speech_texts import read_speech_texts
+except ImportError:  # imported as src.filtering_corpus from the project root
+    from src.parquet.dataset import (TRANSCRIPTION_METADATA_COLUMNS, dataset_columns, dataset_exists,
+                                     read_parquet_dataset, transcription_text_columns)
+    from src.parquet.speech_texts import read_speech_texts
+
 class OtherCandidatesCorpus:
-    def __init__(self, data_dir="data", transcription_file="other_transcriptions.parquet"):
+    def __init__(self, data_dir="data", transcription_file="other_transcriptions.parquet", columns=None):
         """
         Initialize the OtherCandidatesCorpus.
         
         Args:
             data_dir (str): Directory containing the parquet files.
             transcription_file (str): Name of the transcription file to load.
+            columns (list, optional): Text columns to load now. The other text columns are
+                                      read on first use, only the metadata columns are read here.
         """
         self.data_dir = Path(data_dir)
         self.transcriptions_path = self.data_dir / transcription_file
         
-        if not self.transcriptions_path.exists():
+        if not dataset_exists(self.transcriptions_path):
             raise FileNotFoundError(f"Transcriptions file not found at {self.transcriptions_path}")
             
-        self.transcriptions = pd.read_parquet(self.transcriptions_path)
+        # Reads the compacted file plus any fragments appended since the last compaction
+        self.transcription_columns = dataset_columns(self.transcriptions_path)
+        self.text_columns = transcription_text_columns(self.transcription_columns)
+        self._transcriptions = read_parquet_dataset(
+            self.transcriptions_path,
+            columns=[col for col in self.transcription_columns if col in TRANSCRIPTION_METADATA_COLUMNS]
+        )
+        self.load_text_columns(columns or [])
+
+    def load_text_columns(self, columns):
+        """
+        Reads the given text columns if they are not loaded yet. Only these columns are read from disk.
+        
+        Args:
+            columns (list or str): Text column(s) to load.
+            
+        Returns:
+            OtherCandidatesCorpus: self, with the columns loaded.
+        """
+        if isinstance(columns, str):
+            columns = [columns]
+        missing_cols = [col for col in columns if col not in self.transcription_columns]
+        if missing_cols:
+            raise ValueError(f"The following columns are missing from transcriptions: {missing_cols}. Available: {self.transcription_columns}")
+
+        to_read = [col for col in columns if col not in self._transcriptions.columns]
+        if to_read:
+            values = read_parquet_dataset(self.transcriptions_path, columns=['id'] + to_read).set_index('id')
+            # Aligned on id, the corpus may only hold one candidate
+            values = values.reindex(self._transcriptions['id'])
+            for col in to_read:
+                self._transcriptions[col] = values[col].to_numpy()
+        return self
+
+    def get_transcriptions(self, columns=None):
+        """
+        Returns the transcription metadata and the given text columns, loading them if needed.
+        """
+        if columns is None:
+            columns = []
+        elif isinstance(columns, str):
+            columns = [columns]
+        self.load_text_columns(columns)
+        return self._transcriptions[[
+            col for col in self.transcription_columns
+            if col in columns or (col not in self.text_columns and col in self._transcriptions.columns)
+        ]]
+
+    @property
+    def transcriptions(self):
+        """
+        The transcriptions with every text column, loading the ones not read yet.
+        """
+        return self.get_transcriptions(self.text_columns)
         
     def get_candidate(self, candidate_name):
         """
@@ -28,8 +92,8 @@ class OtherCandidatesCorpus:
         Returns:
             OtherCandidatesCorpus: A new instance with filtered data.
         """
-        filtered_transcriptions = self.transcriptions[
-            self.transcriptions['person_name'] == candidate_name
+        filtered_transcriptions = self._transcriptions[
+            self._transcriptions['person_name'] == candidate_name
         ].copy()
         
         if filtered_transcriptions.empty:
@@ -56,7 +120,9 @@ class OtherCandidatesCorpus:
         new_corpus = OtherCandidatesCorpus.__new__(OtherCandidatesCorpus)
         new_corpus.data_dir = self.data_dir
         new_corpus.transcriptions_path = self.transcriptions_path
-        new_corpus.transcriptions = filtered_transcriptions
+        new_corpus.transcription_columns = self.transcription_columns
+        new_corpus.text_columns = self.text_columns
+        new_corpus._transcriptions = filtered_transcriptions
         return new_corpus
 
     def get_full_speeches(self, text_columns=None):
@@ -76,26 +142,18 @@ class OtherCandidatesCorpus:
         elif isinstance(text_columns, str):
             text_columns = [text_columns]
 
-        # Ensure requested columns exist
-        missing_cols = [col for col in text_columns if col not in self.transcriptions.columns]
-        if missing_cols:
-            available = self.transcriptions.columns.tolist()
-            # If default columns are missing, try to be smart or just complain about what's missing
-            # For now, let's just warn/error if explicitly requested or default
-            # But 'text' should be there. 'cleaned_transcription' might be there.
-            # Let's be safe: restrict to what's available if using defaults?
-            # User wants "correct cleaned columns".
-            pass # We will create available list next
-
-        # Filter cols to only available ones if using default? 
-        # No, strict behavior is better. But let's check what we found in terminal.
-        # Other: ['text', 'cleaned_transcription', ...] so we are safe.
+        # Served from the speech-level table built by the cleaning pipeline when it is up to date
+        full_text = read_speech_texts(self.transcriptions_path, text_columns, self._transcriptions['speech_id'].unique())
+        if full_text is None:
+            # Only the requested columns are read, raises if one of them does not exist
+            transcriptions = self.get_transcriptions(text_columns)
 
-        # Group by speech_id and person_name to join text
-        # We rely on speech_id being unique per speech
-        aggregations = {col: lambda x: ' '.join(x.astype(str)) for col in text_columns}
-        
-        full_text = self.transcriptions.groupby(['speech_id', 'person_name']).agg(aggregations).reset_index()
+            # Group by speech_id and person_name to join text
+            # We rely on speech_id being unique per speech
+            # Null transcriptions are joined as empty strings, like in the speech-level table
+            aggregations = {col: lambda x: ' '.join(x.fillna('').astype(str)) for col in text_columns}
+            
+            full_text = transcriptions.groupby(['speech_id', 'person_name']).agg(aggregations).reset_index()
         
         # Add compatibility columns
         full_text['date'] = pd.NaT  # No date information available
@@ -111,4 +169,4 @@ class OtherCandidatesCorpus:
         return full_text
 
     def __repr__(self):
-        return f"<OtherCandidatesCorpus: {self.transcriptions['speech_id'].nunique()} speeches>"
+        return f"<OtherCandidatesCorpus: {self._transcriptions['speech_id'].nunique()} speeches>"
@@ -1,31 +1,95 @@
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import re
 import datetime
 
+try:
+    from parquet.dataset import (TRANSCRIPTION_METADATA_COLUMNS, dataset_columns, dataset_exists, read_parquet_dataset,
+                                 transcription_text_columns)
+    from parquet.speech_texts import read_speech_texts
+    from parquet.tokens import TokenCorpus
+    from parquet.partition import (PARTITION_COLUMNS, campaign_for_year, is_partitioned_current,
+                                   partitioned_columns, partitioned_paths, read_partitioned)
+except ImportError:  # imported as src.filtering_corpus from the project root
+    from src.parquet.dataset import (TRANSCRIPTION_METADATA_COLUMNS, dataset_columns, dataset_exists,
+                                     read_parquet_dataset, transcription_text_columns)
+    from src.parquet.speech_texts import read_speech_texts
+    from src.parquet.tokens import TokenCorpus
+    from src.parquet.partition import (PARTITION_COLUMNS, campaign_for_year, is_partitioned_current,
+                                       partitioned_columns, partitioned_paths, read_partitioned)
+
 class SpeechCorpus:
-    def __init__(self, data_dir="data", transcription_file="transcriptions.parquet"):
+    """
+    Speeches and transcriptions of the candidate, filtered lazily.
+
+    Filter methods (`get_campaign`, `get_rallies`, `filter_date`, ...) return a new corpus
+    sharing the tables of this one plus the filter's predicate: nothing is copied. Chained
+    predicates run as one boolean mask over the speeches when `speeches` is first used, and
+    the matching transcription rows are only taken when transcriptions or text are requested.
+
+    Usage:
+        corpus = SpeechCorpus().get_campaign("2024").get_rallies().get_by_location("Ohio")
+        corpus.get_full_speeches("text_lemmatized")
+    """
+
+    def __init__(self, data_dir="data", transcription_file="transcriptions.parquet", filters=None, columns=None):
         """
         Initialize the SpeechCorpus.
         
         Args:
             data_dir (str): Directory containing the parquet files.
             transcription_file (str): Name of the transcription file to load.
+            filters (dict, optional): Filters applied while loading. Keys can be 'campaign',
+                                      'start_date', 'end_date' (inclusive), plus the keys of `filter()`.
+                                      With an up-to-date partitioned layout (scripts/partition_corpus.py),
+                                      campaign and date filters are pushed down so that only matching
+                                      partitions and row groups are read.
+            columns (list, optional): Text columns of the transcriptions to load now. The other
+                                      text columns (text, text_basic, text_lemmatized, ...) are
+                                      read on first use, only the metadata columns are read here.
         """
         self.data_dir = Path(data_dir)
         self.speeches_path = self.data_dir / "speeches.parquet"
         self.transcriptions_path = self.data_dir / transcription_file
         
-        if not self.speeches_path.exists():
+        if not dataset_exists(self.speeches_path):
             raise FileNotFoundError(f"Speeches file not found at {self.speeches_path}")
         
-        if not self.transcriptions_path.exists():
+        if not dataset_exists(self.transcriptions_path):
             raise FileNotFoundError(f"Transcriptions file not found at {self.transcriptions_path}")
             
-        self.speeches = pd.read_parquet(self.speeches_path)
-        self.transcriptions = pd.read_parquet(self.transcriptions_path)
+        filters = filters or {}
+        self._filters = filters
+        self._transcriptions_dir = None
+        self._predicates = []
+        self._transcriptions_frame = None
+        self._transcription_mask = None
+        # Unfiltered corpora keep every transcription row, even without a matching speech
+        self._filter_transcriptions = False
+        if is_partitioned_current(self.data_dir, transcription_file):
+            speeches_dir, self._transcriptions_dir = partitioned_paths(self.data_dir, transcription_file)
+            self.speeches = read_partitioned(speeches_dir, filters)
+            # Speech columns copied for pushdown, not part of the transcription rows
+            self.transcription_columns = [
+                col for col in partitioned_columns(self._transcriptions_dir) if col not in PARTITION_COLUMNS
+            ]
+        else:
+            # Reads the compacted file plus any fragments appended since the last compaction
+            self.speeches = read_parquet_dataset(self.speeches_path)
+            self.transcription_columns = dataset_columns(self.transcriptions_path)
+
+        self.text_columns = transcription_text_columns(self.transcription_columns)
+        self._source_transcriptions = self._read_transcription_columns(
+            [col for col in self.transcription_columns if col in TRANSCRIPTION_METADATA_COLUMNS]
+        )
+        self.load_text_columns(columns or [])
         
         self._preprocess()
+
+        if filters:
+            # Exact filtering, pushdown above only prunes what is read
+            self._apply_filters(filters)
         
     def _preprocess(self):
         """
@@ -54,19 +118,136 @@ class SpeechCorpus:
             self.speeches['location'] = self.speeches['title'].apply(extract_location)
         
         # Assign campaign
-        def get_campaign(date):
-            if pd.isna(date):
-                return None
-            year = date.year
-            if year in [2015, 2016]:
-                return "2016"
-            elif year in [2019, 2020]:
-                return "2020"
-            elif year in [2023, 2024, 2025]:
-                return "2024"
-            return "Other"
+        self.speeches['campaign'] = self.speeches['year'].apply(campaign_for_year)
+
+    def _apply_filters(self, filters):
+        """
+        Adds the construction-time filters to the predicates of this corpus.
+        """
+        corpus = self.filter_date(filters.get('start_date'), filters.get('end_date'))
+        campaigns = filters.get('campaign')
+        if campaigns is not None:
+            if isinstance(campaigns, (str, int)):
+                campaigns = [campaigns]
+            campaigns = [str(c) for c in campaigns]
+            corpus = corpus._where(lambda speeches: speeches['campaign'].isin(campaigns))
+        other_filters = {key: value for key, value in filters.items() if key in ['is_rally', 'location', 'category']}
+        if other_filters:
+            corpus = corpus.filter(other_filters)
+        self._predicates = corpus._predicates
+        self._speeches = None
+        # Text columns loaded before the filters (`columns=`) hold every transcription
+        self._transcriptions_frame = None
+        self._transcription_mask = None
+        self._filter_transcriptions = True
+
+    @property
+    def speeches(self):
+        """
+        The speeches matching every filter, selected with a single boolean mask on first use.
+        """
+        if self._speeches is None:
+            source = self._source_speeches
+            mask = np.ones(len(source), dtype=bool)
+            for predicate in self._predicates:
+                mask &= predicate(source).to_numpy(dtype=bool)
+            self._speeches = source.take(np.flatnonzero(mask))
+        return self._speeches
+
+    @speeches.setter
+    def speeches(self, speeches):
+        self._source_speeches = speeches
+        self._predicates = []
+        self._speeches = speeches
+        self._transcription_mask = None
+
+    def _transcription_rows(self):
+        """
+        Boolean mask of the shared transcription rows belonging to the speeches of the corpus.
+        """
+        if self._transcription_mask is None:
+            self._transcription_mask = self._source_transcriptions['speech_id'].isin(
+                self.speeches['id'].unique()
+            ).to_numpy()
+        return self._transcription_mask
+
+    @property
+    def _transcriptions(self):
+        # Taken from the shared rows on first use only
+        if self._transcriptions_frame is None:
+            if self._filter_transcriptions:
+                self._transcriptions_frame = self._source_transcriptions.take(
+                    np.flatnonzero(self._transcription_rows())
+                )
+            else:
+                self._transcriptions_frame = self._source_transcriptions
+        return self._transcriptions_frame
+
+    @_transcriptions.setter
+    def _transcriptions(self, transcriptions):
+        self._transcriptions_frame = transcriptions
+
+    def _read_transcription_columns(self, columns):
+        """
+        Reads some columns of the transcription rows, with the construction-time filters.
+        """
+        if self._transcriptions_dir is not None:
+            return read_partitioned(self._transcriptions_dir, self._filters, columns=columns)
+        return read_parquet_dataset(self.transcriptions_path, columns=columns)
+
+    def load_text_columns(self, columns):
+        """
+        Reads the given text columns of the transcriptions if they are not loaded yet.
+        Only these columns are read from disk.
+        
+        Args:
+            columns (list or str): Text column(s) to load.
             
-        self.speeches['campaign'] = self.speeches['date'].apply(get_campaign)
+        Returns:
+            SpeechCorpus: self, with the columns loaded.
+        """
+        if isinstance(columns, str):
+            columns = [columns]
+        missing_cols = [col for col in columns if col not in self.transcription_columns]
+        if missing_cols:
+            raise ValueError(f"The following columns are missing from transcriptions: {missing_cols}. Available: {self.transcription_columns}")
+
+        to_read = [col for col in columns if col not in self._transcriptions.columns]
+        if to_read:
+            values = self._read_transcription_columns(['id'] + to_read).set_index('id')
+            # Aligned on id, the corpus may only hold a filtered subset of the rows
+            values = values.reindex(self._transcriptions['id'])
+            for col in to_read:
+                self._transcriptions[col] = values[col].to_numpy()
+        return self
+
+    def get_transcriptions(self, columns=None):
+        """
+        Returns the transcription metadata and the given text columns, loading them if needed.
+        
+        Args:
+            columns (list or str, optional): Text column(s) to include. Defaults to none.
+            
+        Returns:
+            pd.DataFrame: The transcriptions.
+        """
+        if columns is None:
+            columns = []
+        elif isinstance(columns, str):
+            columns = [columns]
+        self.load_text_columns(columns)
+        return self._transcriptions[[
+            col for col in self.transcription_columns
+            if col in columns or (col not in self.text_columns and col in self._transcriptions.columns)
+        ]]
+
+    @property
+    def transcriptions(self):
+        """
+        The transcriptions with every text column, loading the ones not read yet.
+        Prefer `get_transcriptions(columns)` when only some text columns are needed.
+        """
+        return self.get_transcriptions(self.text_columns)
 
     def get_campaign(self, campaign_cycle):
         """
@@ -78,8 +259,7 @@ class SpeechCorpus:
         Returns:
             SpeechCorpus: A new SpeechCorpus instance with the filtered data.
         """
-        filtered_speeches = self.speeches[self.speeches['campaign'] == str(campaign_cycle)].copy()
-        return self._create_filtered_corpus(filtered_speeches)
+        return self._where(lambda speeches: speeches['campaign'] == str(campaign_cycle))
 
     def get_rallies(self, is_rally=True):
         """
@@ -91,8 +271,7 @@ class SpeechCorpus:
         Returns:
             SpeechCorpus: A new SpeechCorpus instance with the filtered data.
         """
-        filtered_speeches = self.speeches[self.speeches['is_rally'] == is_rally].copy()
-        return self._create_filtered_corpus(filtered_speeches)
+        return self._where(lambda speeches: speeches['is_rally'] == is_rally)
 
     def get_campaign_rallies(self, campaign_cycle):
         """
@@ -104,11 +283,10 @@ class SpeechCorpus:
         Returns:
             SpeechCorpus: A new SpeechCorpus instance with the filtered data.
         """
-        filtered_speeches = self.speeches[
-            (self.speeches['campaign'] == str(campaign_cycle)) & 
-            (self.speeches['is_rally'] == True)
-        ].copy()
-        return self._create_filtered_corpus(filtered_speeches)
+        return self._where(
+            lambda speeches: speeches['campaign'] == str(campaign_cycle),
+            lambda speeches: speeches['is_rally'] == True
+        )
 
     def get_by_location(self, location):
         """
@@ -120,10 +298,7 @@ class SpeechCorpus:
         Returns:
             SpeechCorpus: A new SpeechCorpus instance with the filtered data.
         """
-        filtered_speeches = self.speeches[
-            self.speeches['location'].str.contains(location, case=False, na=False)
-        ].copy()
-        return self._create_filtered_corpus(filtered_speeches)
+        return self._where(lambda speeches: speeches['location'].str.contains(location, case=False, na=False))
 
     def get_by_category(self, category):
         """
@@ -135,10 +310,7 @@ class SpeechCorpus:
         Returns:
             SpeechCorpus: A new SpeechCorpus instance with the filtered data.
         """
-        filtered_speeches = self.speeches[
-            self.speeches['categories'].str.contains(category, case=False, na=False)
-        ].copy()
-        return self._create_filtered_corpus(filtered_speeches)
+        return self._where(lambda speeches: speeches['categories'].str.contains(category, case=False, na=False))
 
     def filter(self, filters):
         """
@@ -151,40 +323,60 @@ class SpeechCorpus:
         Returns:
             SpeechCorpus: A new SpeechCorpus instance with the filtered data.
         """
-        filtered_speeches = self.speeches.copy()
+        predicates = []
         
         if 'campaign' in filters:
-            filtered_speeches = filtered_speeches[filtered_speeches['campaign'] == str(filters['campaign'])]
+            campaign = str(filters['campaign'])
+            predicates.append(lambda speeches: speeches['campaign'] == campaign)
             
         if 'is_rally' in filters:
-            filtered_speeches = filtered_speeches[filtered_speeches['is_rally'] == filters['is_rally']]
+            is_rally = filters['is_rally']
+            predicates.append(lambda speeches: speeches['is_rally'] == is_rally)
             
         if 'location' in filters:
-            filtered_speeches = filtered_speeches[
-                filtered_speeches['location'].str.contains(filters['location'], case=False, na=False)
-            ]
+            location = filters['location']
+            predicates.append(lambda speeches: speeches['location'].str.contains(location, case=False, na=False))
             
         if 'category' in filters:
-            filtered_speeches = filtered_speeches[
-                filtered_speeches['categories'].str.contains(filters['category'], case=False, na=False)
-            ]
+            category = filters['category']
+            predicates.append(lambda speeches: speeches['categories'].str.contains(category, case=False, na=False))
             
-        return self._create_filtered_corpus(filtered_speeches)
+        return self._where(*predicates)
 
-    def _create_filtered_corpus(self, filtered_speeches):
+    def _where(self, *predicates):
         """
-        Helper to create a new SpeechCorpus instance from filtered speeches.
+        Helper to create a new SpeechCorpus instance with more predicates on the speeches.
+        No rows are copied: the new corpus shares the tables of this one.
+
+        Args:
+            *predicates (Callable): Functions of the speeches DataFrame returning a boolean Series.
         """
         new_corpus = SpeechCorpus.__new__(SpeechCorpus)
         new_corpus.data_dir = self.data_dir
         new_corpus.speeches_path = self.speeches_path
         new_corpus.transcriptions_path = self.transcriptions_path
-        
-        new_corpus.speeches = filtered_speeches
-        # Filter transcriptions to match speeches
-        speech_ids = filtered_speeches['id'].unique()
-        new_corpus.transcriptions = self.transcriptions[self.transcriptions['speech_id'].isin(speech_ids)].copy()
-        
+        new_corpus._filters = self._filters
+        new_corpus._transcriptions_dir = self._transcriptions_dir
+        new_corpus.transcription_columns = self.transcription_columns
+        new_corpus.text_columns = self.text_columns
+
+        if self._predicates and self._speeches is not None:
+            # Already selected: start from these rows rather than running the predicates again
+            new_corpus._source_speeches = self._speeches
+            new_corpus._predicates = list(predicates)
+        else:
+            new_corpus._source_speeches = self._source_speeches
+            new_corpus._predicates = self._predicates + list(predicates)
+        new_corpus._speeches = None
+
+        # Rows taken from the transcriptions of this corpus if it has them, with their loaded text columns
+        if self._transcriptions_frame is not None:
+            new_corpus._source_transcriptions = self._transcriptions_frame
+        else:
+            new_corpus._source_transcriptions = self._source_transcriptions
+        new_corpus._transcriptions_frame = None
+        new_corpus._transcription_mask = None
+        new_corpus._filter_transcriptions = True
         return new_corpus
 
     def get_full_speeches(self, text_columns=None):
@@ -200,22 +392,26 @@ class SpeechCorpus:
         """
         if text_columns is None:
             text_columns = []
-            if 'text' in self.transcriptions.columns:
+            if 'text' in self.transcription_columns:
                 text_columns.append('text')
-            if 'cleaned_transcription' in self.transcriptions.columns:
+            if 'cleaned_transcription' in self.transcription_columns:
                 text_columns.append('cleaned_transcription')
         elif isinstance(text_columns, str):
             text_columns = [text_columns]
 
-        # Verify all requested columns exist
-        missing_cols = [col for col in text_columns if col not in self.transcriptions.columns]
-        if missing_cols:
-            raise ValueError(f"The following columns are missing from transcriptions: {missing_cols}. Available: {self.transcriptions.columns.tolist()}")
+        # Served from the speech-level table built by the cleaning pipeline when it is up to date
+        full_text = read_speech_texts(self.transcriptions_path, text_columns, self.speeches['id'].unique())
+        if full_text is not None:
+            full_text = full_text[['speech_id'] + text_columns]
+        else:
+            # Only the requested columns are read, raises if one of them does not exist
+            transcriptions = self.get_transcriptions(text_columns)
             
-        # Group transcriptions by speech_id and join text
-        aggregations = {col: lambda x: ' '.join(x.astype(str)) for col in text_columns}
+            # Group transcriptions by speech_id and join text
+            # Null transcriptions are joined as empty strings, like in the speech-level table
+            aggregations = {col: lambda x: ' '.join(x.fillna('').astype(str)) for col in text_columns}
             
-        full_text = self.transcriptions.groupby('speech_id').agg(aggregations).reset_index()
+            full_text = transcriptions.groupby('speech_id').agg(aggregations).reset_index()
         
         # Merge with speeches metadata
         full_speeches = self.speeches.merge(full_text, left_on='id', right_on='speech_id', how='inner')
@@ -233,15 +429,17 @@ class SpeechCorpus:
         Returns:
             SpeechCorpus: A new SpeechCorpus instance with the filtered data.
         """
-        filtered_speeches = self.speeches.copy()
+        predicates = []
         
         if start_date:
-            filtered_speeches = filtered_speeches[filtered_speeches['date'] >= pd.to_datetime(start_date)]
+            start = pd.to_datetime(start_date)
+            predicates.append(lambda speeches: speeches['date'] >= start)
             
         if end_date:
-            filtered_speeches = filtered_speeches[filtered_speeches['date'] <= pd.to_datetime(end_date)]
+            end = pd.to_datetime(end_date)
+            predicates.append(lambda speeches: speeches['date'] <= end)
             
-        return self._create_filtered_corpus(filtered_speeches)
+        return self._where(*predicates)
 
     def remove_speeches_before(self, year):
         """
@@ -255,6 +453,23 @@ class SpeechCorpus:
         """
         return self.filter_date(start_date=f"{year}-01-01")
 
+    def get_tokens(self, columns=None):
+        """
+        Token ids of the speeches of the corpus, see `parquet.tokens.TokenCorpus`.
+        
+        Args:
+            columns (list, optional): Text columns to read (e.g. ['text_lemmatized']). Defaults to all of them.
+            
+        Returns:
+            TokenCorpus: The speeches in the order of `self.speeches`.
+        """
+        tokens = TokenCorpus.load(self.transcriptions_path, columns=columns)
+        if tokens is None:
+            raise FileNotFoundError(
+                f"No up-to-date token corpus for {self.transcriptions_path}, run scripts/cleaning/run_pipeline.py"
+            )
+        return tokens.subset(self.speeches['id'])
+
     def save_sub_db(self, output_dir_name):
         """
         Save the filtered corpus to a new directory.
@@ -270,4 +485,8 @@ class SpeechCorpus:
         print(f"Saved sub-database to {output_path}")
 
     def __repr__(self):
-        return f"<SpeechCorpus: {len(self.speeches)} speeches, {len(self.transcriptions)} transcriptions>"
+        if self._transcriptions_frame is None and self._filter_transcriptions:
+            n_transcriptions = int(self._transcription_rows().sum())
+        else:
+            n_transcriptions = len(self._transcriptions)
+        return f"<SpeechCorpus: {len(self.speeches)} speeches, {n_transcriptions} transcriptions>"
@@ -20,6 +20,28 @@ class TextDataset(Dataset):
         self.int_to_word = {i: word for word, i in self.word_to_int.items()}
         self.encoded_text = [self.word_to_int[word] for word in self.words if word in self.word_to_int]
         
+    @classmethod
+    def from_token_corpus(cls, tokens, column="text_basic", sequence_length=10, max_vocab_size=5000):
+        """
+        Builds the dataset from the token ids of a `parquet.tokens.TokenCorpus` instead of
+        splitting the text. The vocabulary is the `max_vocab_size` most frequent tokens of `column`.
+        """
+        dataset = cls.__new__(cls)
+        dataset.sequence_length = sequence_length
+        ids = tokens.ids(column)
+        word_counts = np.bincount(ids, minlength=len(tokens.vocab))
+        top = np.argsort(-word_counts, kind='stable')[:max_vocab_size]
+        top = top[word_counts[top] > 0]
+        dataset.vocab = tokens.vocab[top].tolist()
+        dataset.word_to_int = {word: i for i, word in enumerate(dataset.vocab)}
+        dataset.int_to_word = {i: word for word, i in dataset.word_to_int.items()}
+        # Corpus token id -> dataset id, -1 outside the vocabulary
+        remap = np.full(len(tokens.vocab), -1, dtype=np.int64)
+        remap[top] = np.arange(len(top))
+        encoded = remap[ids]
+        dataset.encoded_text = encoded[encoded >= 0]
+        return dataset
+
     def __len__(self):
         return len(self.encoded_text) - self.sequence_length
 
@@ -1,51 +1,270 @@
+import os
 from pathlib import Path
 import sqlite3
-import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
-def convert_sqlite_to_parquet(db_path="data/speeches.db", output_dir="data"):
+from parquet.dataset import (COMPACT_ROW_GROUP_SIZE, NUMERIC_SPEECH_COLUMNS, compact_dataset,
+                             dataset_exists, dataset_files, new_fragment_path, read_parquet_table)
+
+# Rows fetched from SQLite per batch
+DEFAULT_BATCH_SIZE = 50_000
+
+ID_COLUMNS = ['id', 'speech_id']
+
+SPEECHES_QUERY = "SELECT * FROM Speeches"
+SPEECHES_ORDER = " ORDER BY id"
+# person_name is joined in so the rows match those written by SpeechParquetWriter
+TRANSCRIPTIONS_QUERY = """
+    SELECT t.*, s.person_name
+    FROM Transcriptions t LEFT JOIN Speeches s ON s.id = t.speech_id
+"""
+TRANSCRIPTIONS_ORDER = " ORDER BY t.id"
+
+
+def _arrow_type(column):
+    if column in ID_COLUMNS:
+        return pa.int64()
+    if column in NUMERIC_SPEECH_COLUMNS:
+        # Some speeches have empty stats, stored as nulls
+        return pa.float64()
+    return pa.string()
+
+
+def _to_number(value):
+    # Clean numeric columns that might contain empty strings
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _iter_batches(cursor, schema, batch_size):
+    """
+    Pages through a cursor and yields Arrow record batches of at most `batch_size` rows.
+    """
+    numeric = [name in NUMERIC_SPEECH_COLUMNS for name in schema.names]
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        columns = list(zip(*rows))
+        arrays = []
+        for values, field, is_numeric in zip(columns, schema, numeric):
+            if is_numeric:
+                values = [_to_number(v) for v in values]
+            elif pa.types.is_string(field.type):
+                values = [None if v is None else str(v) for v in values]
+            arrays.append(pa.array(values, type=field.type))
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _row_groups(tables, row_group_size):
+    """
+    Regroups a stream of tables into tables of exactly `row_group_size` rows (the last one
+    may be smaller), so that SQLite batches smaller than a row group do not each end up
+    as a small row group.
+    """
+    pending = []
+    rows = 0
+    for table in tables:
+        pending.append(table)
+        rows += table.num_rows
+        while rows >= row_group_size:
+            merged = pa.concat_tables(pending)
+            yield merged.slice(0, row_group_size)
+            rest = merged.slice(row_group_size)
+            pending = [rest]
+            rows = rest.num_rows
+    if rows:
+        yield pa.concat_tables(pending)
+
+
+def _query_schema(cursor):
+    return pa.schema([(col[0], _arrow_type(col[0])) for col in cursor.description])
+
+
+def _max_id(parquet_path):
+    """
+    Highest `id` already converted, read from the row-group statistics only.
+    """
+    max_id = 0
+    for file in dataset_files(parquet_path):
+        metadata = pq.ParquetFile(file).metadata
+        names = metadata.schema.names
+        if 'id' not in names:
+            continue
+        index = names.index('id')
+        for i in range(metadata.num_row_groups):
+            stats = metadata.row_group(i).column(index).statistics
+            if stats is not None and stats.has_min_max:
+                max_id = max(max_id, stats.max)
+    return max_id
+
+
+def _derived_columns(existing_path, base_schema):
+    """
+    Columns of the existing file that are not in the database (e.g. cleaned text columns).
+    """
+    if not existing_path.exists():
+        return []
+    existing_schema = pq.read_schema(existing_path)
+    return [existing_schema.field(name) for name in existing_schema.names if name not in base_schema.names]
+
+
+def _with_derived_columns(batch, existing_path, derived):
+    """
+    Adds the derived columns of the rows of `batch` by reading only the matching id range
+    of the existing file. Row groups outside the range are skipped using their statistics.
+    """
+    table = pa.Table.from_batches([batch])
+    if batch.num_rows == 0:
+        return table
+    ids = batch.column('id')
+    existing = pq.read_table(
+        existing_path,
+        columns=['id'] + [field.name for field in derived],
+        filters=[('id', '>=', pc.min(ids).as_py()), ('id', '<=', pc.max(ids).as_py())]
+    )
+    # Arrow joins don't keep row order, the batch is already ordered by id
+    joined = table.join(existing, 'id', join_type='left outer').sort_by('id')
+    return joined.select(table.schema.names + [field.name for field in derived])
+
+
+def _stream_table(conn, query, parquet_path, batch_size, row_group_size, preserve_derived=True):
+    """
+    Streams a query (ordered by id) into `parquet_path`, replacing it atomically.
+    Derived columns of the existing file are carried over batch by batch.
+    """
+    cursor = conn.execute(query)
+    schema = _query_schema(cursor)
+
+    derived = _derived_columns(parquet_path, schema) if preserve_derived else []
+    if derived:
+        print(f"Preserving existing columns: {[field.name for field in derived]}")
+    out_schema = pa.schema(list(schema) + derived)
+
+    def tables():
+        for batch in _iter_batches(cursor, schema, batch_size):
+            if derived:
+                yield _with_derived_columns(batch, parquet_path, derived).cast(out_schema)
+            else:
+                yield pa.Table.from_batches([batch])
+
+    tmp_path = parquet_path.with_name(f".{parquet_path.name}.tmp")
+    rows = 0
+    try:
+        with pq.ParquetWriter(tmp_path, out_schema) as writer:
+            for table in _row_groups(tables(), row_group_size):
+                writer.write_table(table, row_group_size=row_group_size)
+                rows += table.num_rows
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_path, parquet_path)
+    return rows
+
+
+def _stream_fragment(conn, query, params, parquet_path, batch_size, row_group_size, keep=None):
+    """
+    Streams the rows of a query into a new fragment of `parquet_path`.
+    `keep` optionally filters the rows of each batch.
+    """
+    cursor = conn.execute(query, params)
+    schema = _query_schema(cursor)
+
+    def tables():
+        for batch in _iter_batches(cursor, schema, batch_size):
+            if keep is not None:
+                batch = batch.filter(keep(batch))
+            if batch.num_rows:
+                yield pa.Table.from_batches([batch])
+
+    fragment = None
+    writer = None
+    rows = 0
+    try:
+        for table in _row_groups(tables(), row_group_size):
+            if writer is None:
+                fragment = new_fragment_path(parquet_path)
+                tmp_path = fragment.with_name(f".{fragment.name}.tmp")
+                writer = pq.ParquetWriter(tmp_path, schema)
+            writer.write_table(table, row_group_size=row_group_size)
+            rows += table.num_rows
+    except BaseException:
+        # A partial fragment would be read as converted rows
+        if writer is not None:
+            writer.close()
+            tmp_path.unlink(missing_ok=True)
+        raise
+    if writer is not None:
+        writer.close()
+        os.replace(tmp_path, fragment)
+    return rows
+
+
+def convert_sqlite_to_parquet(db_path="data/speeches.db", output_dir="data", file_prefix="",
+                              batch_size=DEFAULT_BATCH_SIZE, row_group_size=COMPACT_ROW_GROUP_SIZE,
+                              incremental=False):
     """
     Converts Speeches and Transcriptions tables from SQLite to Parquet files.
+
+    Rows are paged through a cursor in batches of `batch_size` and streamed into a
+    Parquet writer. Batches are accumulated into row groups of `row_group_size` rows,
+    so memory stays bounded by one row group.
+
+    Full mode rewrites both files. Columns that only exist in the Parquet files
+    (cleaned text columns) are kept: for each batch, only the matching id range of the
+    existing file is read.
+
+    Incremental mode appends a fragment holding only the transcriptions whose id is
+    above the highest id already converted, and the processed speeches not converted
+    yet. Existing rows and their derived columns are left untouched. Re-parsed speeches
+    get new transcription ids, `--from-cache` runs a full conversion.
+
+    Args:
+        db_path (str): Path of the SQLite database.
+        output_dir (str): Directory of the Parquet files.
+        file_prefix (str): Prefix of the file names (e.g. "other_").
+        batch_size (int): Number of rows fetched from SQLite per batch.
+        row_group_size (int): Maximum number of rows per row group.
+        incremental (bool): Only convert rows above the last converted watermark.
+
+    Returns:
+        dict: Number of rows written per table.
     """
     conn = sqlite3.connect(db_path)
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
+    speeches_file = output_path / f"{file_prefix}speeches.parquet"
+    transcriptions_file = output_path / f"{file_prefix}transcriptions.parquet"
 
-    # Convert Speeches
-    df_speeches = pd.read_sql_query("SELECT * FROM Speeches", conn)
-    
-    # Clean numeric columns that might contain empty strings
-    numeric_cols = ['nbr_sentences', 'nbr_words', 'nbr_seconds']
-    for col in numeric_cols:
-        if col in df_speeches.columns:
-            df_speeches[col] = pd.to_numeric(df_speeches[col], errors='coerce')
-            
-    df_speeches.to_parquet(output_path / "speeches.parquet", index=False)
-
-    # Convert Transcriptions
-    df_transcriptions = pd.read_sql_query("SELECT * FROM Transcriptions", conn)
-    
-    # Clean numeric columns in Transcriptions
-    if 'speech_id' in df_transcriptions.columns:
-         df_transcriptions['speech_id'] = pd.to_numeric(df_transcriptions['speech_id'], errors='coerce')
-         
-    transcriptions_file = output_path / "transcriptions.parquet"
-    if transcriptions_file.exists():
-        existing_df = pd.read_parquet(transcriptions_file)
-        # Identify extra columns in existing file (e.g. cleaned text columns)
-        extra_cols = [col for col in existing_df.columns if col not in df_transcriptions.columns]
-        if extra_cols:
-            print(f"Preserving existing columns: {extra_cols}")
-            # Merge extra columns based on 'id'
-            # We use left join to keep all new rows, and fill missing with NaN
-            if 'id' in df_transcriptions.columns and 'id' in existing_df.columns:
-                df_transcriptions = df_transcriptions.merge(
-                    existing_df[['id'] + extra_cols],
-                    on='id',
-                    how='left'
-                )
-            else:
-                print("Warning: 'id' column missing. Cannot preserve extra columns.")
+    try:
+        if incremental:
+            converted = pa.array([], type=pa.int64())
+            if dataset_exists(speeches_file):
+                converted = read_parquet_table(speeches_file, columns=['id']).column('id')
+            speeches = _stream_fragment(
+                conn, SPEECHES_QUERY + " WHERE title IS NOT NULL" + SPEECHES_ORDER, (), speeches_file,
+                batch_size, row_group_size,
+                keep=lambda batch: pc.invert(pc.is_in(batch.column('id'), value_set=converted))
+            )
+            watermark = _max_id(transcriptions_file)
+            transcriptions = _stream_fragment(
+                conn, TRANSCRIPTIONS_QUERY + " WHERE t.id > ?" + TRANSCRIPTIONS_ORDER, (watermark,), transcriptions_file,
+                batch_size, row_group_size
+            )
+        else:
+            # Fold pending fragments into the base files first so their derived columns are kept
+            compact_dataset(speeches_file)
+            compact_dataset(transcriptions_file)
+            speeches = _stream_table(conn, SPEECHES_QUERY + SPEECHES_ORDER, speeches_file, batch_size, row_group_size)
+            transcriptions = _stream_table(conn, TRANSCRIPTIONS_QUERY + TRANSCRIPTIONS_ORDER, transcriptions_file,
+                                           batch_size, row_group_size)
+    finally:
+        conn.close()
 
-    df_transcriptions.to_parquet(transcriptions_file, index=False)
-    
-    conn.close()
\ No newline at end of file
+    return {"speeches": speeches, "transcriptions": transcriptions}
@@ -0,0 +1,318 @@
+import os
+import time
+import uuid
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# Row groups written by compaction. Large row groups keep the footer small and
+# make column scans sequential.
+COMPACT_ROW_GROUP_SIZE = 100_000
+
+NUMERIC_SPEECH_COLUMNS = ['nbr_sentences', 'nbr_words', 'nbr_seconds']
+
+# Small columns of the transcription files, every other column is a text variant
+# (text, text_basic, text_lemmatized, clean_v1, ...)
+TRANSCRIPTION_METADATA_COLUMNS = ['id', 'speech_id', 'timestamp', 'duration', 'person_name']
+# Hash of the input of each cleaned row, stored as `<column>__input_hash` by the incremental cleaning
+INPUT_HASH_SUFFIX = "__input_hash"
+
+
+def fragments_dir(parquet_path):
+    """
+    Returns the directory holding the append-only fragments of a Parquet file.
+
+    `data/speeches.parquet` -> `data/speeches_fragments/`
+    """
+    parquet_path = Path(parquet_path)
+    return parquet_path.with_name(f"{parquet_path.stem}_fragments")
+
+
+def fragment_paths(parquet_path):
+    """
+    Lists the fragments of a Parquet file, oldest first.
+    """
+    directory = fragments_dir(parquet_path)
+    if not directory.exists():
+        return []
+    return sorted(directory.glob("part-*.parquet"))
+
+
+def dataset_exists(parquet_path):
+    """
+    True if the base file or at least one fragment exists.
+    """
+    return Path(parquet_path).exists() or bool(fragment_paths(parquet_path))
+
+
+def dataset_files(parquet_path):
+    """
+    Lists every file of the dataset: the compacted base file first, then fragments.
+    """
+    parquet_path = Path(parquet_path)
+    files = [parquet_path] if parquet_path.exists() else []
+    return files + fragment_paths(parquet_path)
+
+
+def source_signature(parquet_paths):
+    """
+    Name, size and modification time of every file of the given datasets.
+    Stored with derived files to tell whether they were built from the current data.
+    """
+    signature = []
+    for parquet_path in parquet_paths:
+        for file in dataset_files(parquet_path):
+            stat = file.stat()
+            signature.append([file.name, stat.st_size, stat.st_mtime_ns])
+    return signature
+
+
+def input_hash_column(column):
+    """
+    Name of the column holding the input hashes of a cleaned column.
+    """
+    return f"{column}{INPUT_HASH_SUFFIX}"
+
+
+def transcription_text_columns(columns):
+    """
+    Text variants among transcription columns: neither metadata nor input hashes.
+    """
+    return [col for col in columns if col not in TRANSCRIPTION_METADATA_COLUMNS and not col.endswith(INPUT_HASH_SUFFIX)]
+
+
+def dataset_columns(parquet_path):
+    """
+    Lists the columns of the base file and its fragments, read from the footers only.
+    """
+    columns = {}
+    for file in dataset_files(parquet_path):
+        for name in pq.read_schema(file).names:
+            columns[name] = None
+    return list(columns)
+
+
+def read_parquet_table(parquet_path, columns=None, filters=None):
+    """
+    Reads the base file and all its fragments as a single Arrow table.
+
+    Fragments written before a column was added (e.g. cleaned text columns) are
+    padded with nulls. Rows sharing an id across files (a batch written again after a
+    crash between its fragment and its database commit) are read once, from the latest
+    file, as `compact_dataset` keeps them.
+
+    Args:
+        parquet_path (str or Path): Path of the base Parquet file.
+        columns (list, optional): Columns to read. Columns missing from a file are skipped for that file.
+        filters (list, optional): pyarrow filter expression, pushed down to row groups.
+
+    Returns:
+        pa.Table: The concatenated table.
+    """
+    files = dataset_files(parquet_path)
+    if not files:
+        raise FileNotFoundError(f"No Parquet data found at {parquet_path}")
+
+    # The ids are needed to drop replayed rows, even when they are not requested
+    read_columns = columns
+    if columns is not None and len(files) > 1 and 'id' not in columns:
+        read_columns = list(columns) + ['id']
+
+    tables = []
+    for file in files:
+        file_columns = None
+        if read_columns is not None:
+            schema_names = pq.read_schema(file).names
+            file_columns = [col for col in read_columns if col in schema_names]
+        tables.append(pq.read_table(file, columns=file_columns, filters=filters))
+
+    if len(tables) == 1:
+        return tables[0]
+    table = _drop_duplicate_ids(pa.concat_tables(tables, promote_options="permissive"))
+    if read_columns is not columns and 'id' in table.column_names:
+        table = table.drop_columns(['id'])
+    return table
+
+
+def read_parquet_dataset(parquet_path, columns=None, filters=None):
+    """
+    Reads the base file and all its fragments into a DataFrame.
+
+    See `read_parquet_table` for the arguments.
+    """
+    return read_parquet_table(parquet_path, columns=columns, filters=filters).to_pandas()
+
+
+def write_atomic(table, path, **kwargs):
+    """
+    Writes an Arrow table to `path` through a temporary file swapped in atomically, so
+    readers never see a partial file. `kwargs` are those of `pq.write_table`.
+    """
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    pq.write_table(table, tmp_path, **kwargs)
+    os.replace(tmp_path, path)
+
+
+def new_fragment_path(parquet_path):
+    """
+    Returns the path of a new, not yet written, fragment of `parquet_path`.
+    """
+    directory = fragments_dir(parquet_path)
+    directory.mkdir(parents=True, exist_ok=True)
+    # Nanosecond timestamp keeps fragments in write order, uuid avoids collisions
+    # between concurrent writers.
+    return directory / f"part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet"
+
+
+def write_fragment(df, parquet_path):
+    """
+    Writes a DataFrame as a new fragment next to `parquet_path`.
+
+    Only the new rows are written, so appending costs I/O proportional to the batch.
+
+    Returns:
+        Path: The path of the written fragment.
+    """
+    fragment = new_fragment_path(parquet_path)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    write_atomic(table, fragment)
+    return fragment
+
+
+def _drop_duplicate_ids(table):
+    # Keeps the last row of each id, in file order. Rows without an id are all kept.
+    if "id" not in table.column_names or table.column("id").null_count:
+        return table
+    rows = table.append_column("__row", pa.array(range(table.num_rows), pa.int64()))
+    last = rows.group_by("id").aggregate([("__row", "max")]).column("__row_max")
+    if len(last) == table.num_rows:
+        return table
+    return table.take(last.take(pc.sort_indices(last)))
+
+
+def compact_dataset(parquet_path, row_group_size=COMPACT_ROW_GROUP_SIZE):
+    """
+    Merges the base file and its fragments into a single file with large row groups.
+
+    The fragments are deleted once the compacted file has replaced the base file.
+    Fragments written while compaction runs are left untouched. Rows sharing an id
+    (a speech written again after a crash between its fragment and its database
+    commit) are kept once, from the latest file.
+
+    Args:
+        parquet_path (str or Path): Path of the base Parquet file.
+        row_group_size (int): Number of rows per row group in the compacted file.
+
+    Returns:
+        int: Number of fragments merged.
+    """
+    parquet_path = Path(parquet_path)
+    fragments = fragment_paths(parquet_path)
+    if not fragments:
+        return 0
+
+    files = ([parquet_path] if parquet_path.exists() else []) + fragments
+    tables = [pq.read_table(file) for file in files]
+    table = _drop_duplicate_ids(pa.concat_tables(tables, promote_options="permissive"))
+    write_atomic(table, parquet_path, row_group_size=row_group_size)
+
+    for fragment in fragments:
+        fragment.unlink()
+    try:
+        fragments_dir(parquet_path).rmdir()
+    except OSError:
+        # New fragments arrived in the meantime
+        pass
+    return len(fragments)
+
+
+class SpeechParquetWriter:
+    """
+    Append-only writer for the speeches and transcriptions Parquet files.
+
+    Speeches are buffered in memory and written as one small fragment per batch
+    instead of rewriting the whole files for every speech. Use `compact_dataset`
+    (or `scripts/compact_parquet.py`) to merge the fragments afterwards. Leaving the
+    `with` block on an exception discards what is still buffered.
+
+    Usage:
+        with SpeechParquetWriter(file_prefix="other_") as writer:
+            writer.add(speech_data, transcription_data_list)
+    """
+
+    def __init__(self, output_dir="data", file_prefix="", batch_size=50):
+        """
+        Args:
+            output_dir (str): Directory where parquet files are stored.
+            file_prefix (str): Prefix of the file names (e.g. "other_").
+            batch_size (int): Number of speeches buffered before a fragment is written.
+        """
+        output_path = Path(output_dir)
+        self.speeches_path = output_path / f"{file_prefix}speeches.parquet"
+        self.transcriptions_path = output_path / f"{file_prefix}transcriptions.parquet"
+        self.batch_size = batch_size
+        self._speeches = []
+        self._transcriptions = []
+
+    def add(self, speech_data, transcription_data):
+        """
+        Buffers a speech and its transcriptions.
+
+        Args:
+            speech_data (dict): Dictionary containing speech data.
+            transcription_data (list or dict): Transcription row(s) of the speech.
+
+        Returns:
+            list: Paths of the fragments written if the batch was full, else an empty list.
+        """
+        self._speeches.append(speech_data)
+        if isinstance(transcription_data, list):
+            self._transcriptions.extend(transcription_data)
+        else:
+            self._transcriptions.append(transcription_data)
+
+        if len(self._speeches) >= self.batch_size:
+            return self.flush()
+        return []
+
+    def flush(self):
+        """
+        Writes the buffered speeches and transcriptions as new fragments.
+
+        The batch is written entirely or not at all: if a write fails, the fragments
+        already written by this flush are removed. The buffers are emptied either way.
+
+        Returns:
+            list: Paths of the written fragments.
+        """
+        fragments = []
+        try:
+            if self._speeches:
+                speeches_df = pd.DataFrame(self._speeches)
+                # Ensure numeric columns are actually numeric
+                for col in NUMERIC_SPEECH_COLUMNS:
+                    if col in speeches_df.columns:
+                        speeches_df[col] = pd.to_numeric(speeches_df[col], errors='coerce')
+                fragments.append(write_fragment(speeches_df, self.speeches_path))
+            if self._transcriptions:
+                fragments.append(write_fragment(pd.DataFrame(self._transcriptions), self.transcriptions_path))
+        except BaseException:
+            # Speeches without their transcriptions would be read as processed
+            for fragment in fragments:
+                fragment.unlink(missing_ok=True)
+            raise
+        finally:
+            self._speeches = []
+            self._transcriptions = []
+        return fragments
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # After a failure the buffer may hold speeches whose transaction was rolled back
+        if exc_type is None:
+            self.flush()
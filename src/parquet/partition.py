@@ -0,0 +1,178 @@
+import json
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+try:
+    from parquet.dataset import read_parquet_table, source_signature
+except ImportError:  # imported as src.parquet from the project root
+    from src.parquet.dataset import read_parquet_table, source_signature
+
+# Campaign cycle of each year, shared with SpeechCorpus
+CAMPAIGN_YEARS = {
+    "2016": [2015, 2016],
+    "2020": [2019, 2020],
+    "2024": [2023, 2024, 2025],
+}
+# Partition value of speeches without a parseable date
+UNKNOWN_CAMPAIGN = "Unknown"
+
+# Speech columns copied onto the transcription rows so both datasets share the predicates
+PARTITION_COLUMNS = ['date', 'year', 'campaign']
+
+PARTITIONED_DIR = "corpus"
+# Small row groups: the statistics of each one let date filters skip the others
+PARTITION_ROW_GROUP_SIZE = 20_000
+SOURCE_MANIFEST = "_source.json"
+# Explicit type, otherwise "2016" would be read back as an integer
+PARTITIONING = ds.partitioning(pa.schema([("campaign", pa.string())]), flavor="hive")
+
+
+def campaign_for_year(year):
+    """
+    Returns the campaign cycle of a year ("2016", "2020", "2024" or "Other"), None if unknown.
+    """
+    if pd.isna(year):
+        return None
+    for campaign, years in CAMPAIGN_YEARS.items():
+        if int(year) in years:
+            return campaign
+    return "Other"
+
+
+def partitioned_paths(data_dir="data", transcription_file="transcriptions.parquet"):
+    """
+    Returns the directories of the partitioned speeches and transcriptions datasets.
+    """
+    root = Path(data_dir) / PARTITIONED_DIR
+    return root / "speeches", root / Path(transcription_file).stem
+
+
+def _write_dataset(table, directory, signature, row_group_size):
+    # Written next to the target then swapped in, readers never see a half-written dataset
+    tmp_dir = directory.with_name(f".{directory.name}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    ds.write_dataset(
+        table, tmp_dir, format="parquet",
+        partitioning=PARTITIONING,
+        max_rows_per_group=row_group_size, max_rows_per_file=10 * row_group_size,
+        min_rows_per_group=min(row_group_size, 1024),
+    )
+    (tmp_dir / SOURCE_MANIFEST).write_text(json.dumps(signature))
+    shutil.rmtree(directory, ignore_errors=True)
+    tmp_dir.rename(directory)
+
+
+def write_partitioned_corpus(data_dir="data", transcription_file="transcriptions.parquet",
+                             row_group_size=PARTITION_ROW_GROUP_SIZE):
+    """
+    Writes the speeches and transcriptions as datasets partitioned by campaign
+    (`data/corpus/speeches/campaign=2024/...`), sorted by date.
+
+    Transcription rows carry the `date`, `year` and `campaign` of their speech, so both
+    datasets can be filtered with the same predicates. The source files are recorded so
+    that `SpeechCorpus` only uses the partitioned layout while it is up to date.
+
+    Args:
+        data_dir (str): Directory containing the parquet files.
+        transcription_file (str): Name of the transcription file to partition.
+        row_group_size (int): Maximum number of rows per row group.
+
+    Returns:
+        tuple: Paths of the speeches and transcriptions datasets.
+    """
+    data_dir = Path(data_dir)
+    speeches_path = data_dir / "speeches.parquet"
+    transcriptions_path = data_dir / transcription_file
+    speeches_dir, transcriptions_dir = partitioned_paths(data_dir, transcription_file)
+
+    speeches = read_parquet_table(speeches_path).to_pandas()
+    speeches['date'] = pd.to_datetime(speeches['date'], errors='coerce').astype('datetime64[ns]')
+    speeches['year'] = speeches['date'].dt.year.astype('Int64')
+    speeches['campaign'] = speeches['year'].apply(campaign_for_year).fillna(UNKNOWN_CAMPAIGN)
+    speeches = speeches.sort_values(['date', 'id'], na_position='last')
+
+    transcriptions = read_parquet_table(transcriptions_path).to_pandas()
+    transcriptions = transcriptions.drop(columns=[c for c in PARTITION_COLUMNS if c in transcriptions.columns])
+    transcriptions = transcriptions.merge(
+        speeches[['id'] + PARTITION_COLUMNS].rename(columns={'id': 'speech_id'}),
+        on='speech_id', how='left'
+    )
+    transcriptions['campaign'] = transcriptions['campaign'].fillna(UNKNOWN_CAMPAIGN)
+    transcriptions = transcriptions.sort_values(['date', 'speech_id', 'id'], na_position='last')
+
+    _write_dataset(pa.Table.from_pandas(speeches, preserve_index=False), speeches_dir,
+                   source_signature([speeches_path]), row_group_size)
+    _write_dataset(pa.Table.from_pandas(transcriptions, preserve_index=False), transcriptions_dir,
+                   source_signature([speeches_path, transcriptions_path]), row_group_size)
+    return speeches_dir, transcriptions_dir
+
+
+def is_partitioned_current(data_dir="data", transcription_file="transcriptions.parquet"):
+    """
+    True if the partitioned datasets exist and were built from the current Parquet files.
+    """
+    data_dir = Path(data_dir)
+    speeches_path = data_dir / "speeches.parquet"
+    transcriptions_path = data_dir / transcription_file
+    speeches_dir, transcriptions_dir = partitioned_paths(data_dir, transcription_file)
+    for directory, sources in [(speeches_dir, [speeches_path]), (transcriptions_dir, [speeches_path, transcriptions_path])]:
+        manifest = directory / SOURCE_MANIFEST
+        if not manifest.exists():
+            return False
+        if json.loads(manifest.read_text()) != source_signature(sources):
+            return False
+    return True
+
+
+def filter_expression(filters):
+    """
+    Builds the pyarrow expression of the pushdown-able filters.
+
+    Supported keys: 'campaign' (str or list), 'start_date', 'end_date' (inclusive).
+    Other keys are ignored here and applied after loading.
+
+    Returns:
+        pyarrow.dataset.Expression or None
+    """
+    expression = None
+
+    def combine(condition):
+        return condition if expression is None else expression & condition
+
+    if filters.get('campaign') is not None:
+        campaigns = filters['campaign']
+        if isinstance(campaigns, (str, int)):
+            campaigns = [campaigns]
+        expression = combine(ds.field('campaign').isin([str(c) for c in campaigns]))
+    if filters.get('start_date') is not None:
+        start = pa.scalar(pd.Timestamp(filters['start_date']), type=pa.timestamp('ns'))
+        expression = combine(ds.field('date') >= start)
+    if filters.get('end_date') is not None:
+        end = pa.scalar(pd.Timestamp(filters['end_date']), type=pa.timestamp('ns'))
+        expression = combine(ds.field('date') <= end)
+    return expression
+
+
+def partitioned_columns(directory):
+    """
+    Lists the columns of a partitioned dataset, partition column included.
+    """
+    return ds.dataset(directory, format="parquet", partitioning=PARTITIONING).schema.names
+
+
+def read_partitioned(directory, filters=None, columns=None):
+    """
+    Reads a partitioned dataset, reading only the partitions and row groups matching `filters`.
+
+    Returns:
+        pd.DataFrame
+    """
+    dataset = ds.dataset(directory, format="parquet", partitioning=PARTITIONING)
+    if columns is not None:
+        columns = [col for col in columns if col in dataset.schema.names]
+    expression = filter_expression(filters or {})
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
@@ -0,0 +1,109 @@
+import json
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+try:
+    from parquet.dataset import (COMPACT_ROW_GROUP_SIZE, dataset_columns, read_parquet_table,
+                                 source_signature, transcription_text_columns, write_atomic)
+except ImportError:  # imported as src.parquet from the project root
+    from src.parquet.dataset import (COMPACT_ROW_GROUP_SIZE, dataset_columns, read_parquet_table,
+                                     source_signature, transcription_text_columns, write_atomic)
+
+# Schema metadata key holding the signature of the transcription files the table was built from
+SOURCE_METADATA_KEY = b"speech_texts_source"
+
+
+def speech_texts_path(transcriptions_path):
+    """
+    Returns the path of the speech-level table of a transcription file.
+
+    `data/transcriptions.parquet` -> `data/transcriptions_by_speech.parquet`
+    """
+    transcriptions_path = Path(transcriptions_path)
+    return transcriptions_path.with_name(f"{transcriptions_path.stem}_by_speech.parquet")
+
+
+def build_speech_texts(transcriptions_path, text_columns=None, row_group_size=COMPACT_ROW_GROUP_SIZE):
+    """
+    Writes one row per speech with the full text of each text column, the transcriptions
+    joined with spaces in file order, like the groupby fallback of `get_full_speeches`.
+    Null transcriptions are joined as empty strings.
+
+    The signature of the transcription files is stored in the schema metadata, the
+    table is only served while it matches (see `is_speech_texts_current`).
+
+    Args:
+        transcriptions_path (str or Path): Path of the transcription file.
+        text_columns (list, optional): Text columns to aggregate. Defaults to every text column.
+        row_group_size (int): Maximum number of rows per row group.
+
+    Returns:
+        Path: The path of the written table.
+    """
+    transcriptions_path = Path(transcriptions_path)
+    columns = dataset_columns(transcriptions_path)
+    if text_columns is None:
+        text_columns = transcription_text_columns(columns)
+    group_columns = ['speech_id'] + (['person_name'] if 'person_name' in columns else [])
+
+    # Signature taken before reading, a write during the build makes the table stale
+    signature = source_signature([transcriptions_path])
+    table = read_parquet_table(transcriptions_path, columns=group_columns + text_columns)
+    for col in text_columns:
+        values = pc.fill_null(table.column(col).cast(pa.string()), "")
+        table = table.set_column(table.schema.get_field_index(col), col, values)
+
+    # Single-threaded grouping keeps the row order inside each list
+    grouped = table.group_by(group_columns, use_threads=False).aggregate([(col, 'list') for col in text_columns])
+    speech_texts = grouped.select(group_columns)
+    for col in text_columns:
+        speech_texts = speech_texts.append_column(col, pc.binary_join(grouped.column(f"{col}_list"), " "))
+    speech_texts = speech_texts.sort_by('speech_id').replace_schema_metadata(
+        {SOURCE_METADATA_KEY: json.dumps(signature)}
+    )
+
+    output_path = speech_texts_path(transcriptions_path)
+    write_atomic(speech_texts, output_path, row_group_size=row_group_size)
+    return output_path
+
+
+def is_speech_texts_current(transcriptions_path):
+    """
+    True if the speech-level table exists and was built from the current transcription files.
+    """
+    path = speech_texts_path(transcriptions_path)
+    if not path.exists():
+        return False
+    metadata = pq.read_schema(path).metadata or {}
+    if SOURCE_METADATA_KEY not in metadata:
+        return False
+    return json.loads(metadata[SOURCE_METADATA_KEY]) == source_signature([transcriptions_path])
+
+
+def read_speech_texts(transcriptions_path, text_columns, speech_ids=None):
+    """
+    Reads the full texts of the given columns from the speech-level table.
+
+    Args:
+        transcriptions_path (str or Path): Path of the transcription file.
+        text_columns (list): Text columns to read.
+        speech_ids (array-like, optional): Only read these speeches.
+
+    Returns:
+        pd.DataFrame or None: One row per speech, None if the table is missing, out of date
+                              or lacks one of the columns.
+    """
+    if not is_speech_texts_current(transcriptions_path):
+        return None
+    path = speech_texts_path(transcriptions_path)
+    schema = pq.read_schema(path)
+    if any(col not in schema.names for col in text_columns):
+        return None
+    group_columns = [col for col in ['speech_id', 'person_name'] if col in schema.names]
+    filters = None
+    if speech_ids is not None:
+        filters = [('speech_id', 'in', [int(speech_id) for speech_id in speech_ids])]
+    return pq.read_table(path, columns=group_columns + list(text_columns), filters=filters).to_pandas()
@@ -0,0 +1,291 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+try:
+    from parquet.dataset import source_signature, write_atomic
+    from parquet.speech_texts import build_speech_texts, is_speech_texts_current, speech_texts_path
+except ImportError:  # imported as src.parquet from the project root
+    from src.parquet.dataset import source_signature, write_atomic
+    from src.parquet.speech_texts import build_speech_texts, is_speech_texts_current, speech_texts_path
+
+# Cleaned variants, already space-separated tokens. Raw `text` keeps punctuation glued to words.
+TOKEN_COLUMNS = ['text_basic', 'text_no_stopwords', 'text_lemmatized']
+
+SOURCE_METADATA_KEY = b"tokens_source"
+# Tokens made only of punctuation / symbols
+PUNCT_PATTERN = r"^[^\w\s]+$"
+
+
+def token_paths(transcriptions_path):
+    """
+    Returns the paths of the token arrays and of the vocabulary of a transcription file.
+
+    `data/transcriptions.parquet` -> `data/transcriptions_tokens.parquet`, `data/transcriptions_vocab.parquet`
+    """
+    transcriptions_path = Path(transcriptions_path)
+    stem = transcriptions_path.stem
+    return (transcriptions_path.with_name(f"{stem}_tokens.parquet"),
+            transcriptions_path.with_name(f"{stem}_vocab.parquet"))
+
+
+def _split_tokens(texts):
+    """
+    Splits strings on whitespace like `str.split()`.
+
+    Returns:
+        tuple: (flat tokens, row index of each token)
+    """
+    lists = pc.utf8_split_whitespace(pc.fill_null(texts, ""))
+    tokens = pc.list_flatten(lists)
+    rows = pc.list_parent_indices(lists)
+    # Leading, trailing and repeated spaces give empty strings
+    non_empty = pc.not_equal(pc.utf8_length(tokens), 0)
+    return tokens.filter(non_empty), rows.filter(non_empty)
+
+
+def _offsets(rows, num_rows):
+    counts = np.bincount(rows.to_numpy(), minlength=num_rows)
+    offsets = np.zeros(num_rows + 1, dtype=np.int32)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets
+
+
+def build_token_corpus(transcriptions_path, text_columns=None):
+    """
+    Encodes the full speech texts as int32 token ids over a vocabulary shared by every column.
+
+    Writes two files next to the transcription file:
+    - `<stem>_tokens.parquet`: one row per speech, one list<int32> column per text column.
+      A list column is stored as the flat id array plus the offset of each speech.
+    - `<stem>_vocab.parquet`: token_id, token, count, is_stopword, is_punct. Ids are
+      sorted by decreasing frequency, so the `n` most frequent tokens are the ids `< n`.
+
+    The speech-level table (`build_speech_texts`) is rebuilt first if it is out of date.
+
+    Args:
+        transcriptions_path (str or Path): Path of the transcription file.
+        text_columns (list, optional): Columns to encode. Defaults to `TOKEN_COLUMNS`.
+
+    Returns:
+        tuple: Paths of the tokens and vocabulary files.
+    """
+    transcriptions_path = Path(transcriptions_path)
+    if not is_speech_texts_current(transcriptions_path):
+        build_speech_texts(transcriptions_path)
+    texts_path = speech_texts_path(transcriptions_path)
+    available = pq.read_schema(texts_path).names
+    if text_columns is None:
+        text_columns = [col for col in TOKEN_COLUMNS if col in available]
+    speech_texts = pq.read_table(texts_path, columns=['speech_id'] + text_columns)
+    signature = source_signature([transcriptions_path])
+
+    split = {col: _split_tokens(speech_texts.column(col).combine_chunks()) for col in text_columns}
+    all_tokens = pa.chunked_array([tokens for tokens, _ in split.values()], type=pa.string())
+    counts = pc.value_counts(all_tokens).flatten()
+    vocab = pa.table({'token': counts[0], 'count': counts[1]}).sort_by([('count', 'descending'), ('token', 'ascending')])
+
+    # spaCy's list, imported on its own to avoid loading a model
+    from spacy.lang.en.stop_words import STOP_WORDS
+    tokens = vocab.column('token').combine_chunks()
+    vocab = pa.table({
+        'token_id': pa.array(np.arange(len(vocab), dtype=np.int32)),
+        'token': tokens,
+        'count': vocab.column('count'),
+        'is_stopword': pc.is_in(pc.utf8_lower(tokens), value_set=pa.array(sorted(STOP_WORDS))),
+        'is_punct': pc.match_substring_regex(tokens, PUNCT_PATTERN),
+    })
+
+    arrays = [speech_texts.column('speech_id').combine_chunks()]
+    for col in text_columns:
+        col_tokens, rows = split[col]
+        ids = pc.index_in(col_tokens, value_set=tokens).cast(pa.int32())
+        offsets = pa.array(_offsets(rows, speech_texts.num_rows))
+        arrays.append(pa.ListArray.from_arrays(offsets, ids, type=pa.list_(pa.int32())))
+    token_table = pa.Table.from_arrays(arrays, names=['speech_id'] + text_columns).replace_schema_metadata(
+        {SOURCE_METADATA_KEY: json.dumps(signature)}
+    )
+
+    tokens_path, vocab_path = token_paths(transcriptions_path)
+    write_atomic(vocab, vocab_path)
+    write_atomic(token_table, tokens_path)
+    return tokens_path, vocab_path
+
+
+def is_token_corpus_current(transcriptions_path):
+    """
+    True if the token files exist and were built from the current transcription files.
+    """
+    tokens_path, vocab_path = token_paths(transcriptions_path)
+    if not tokens_path.exists() or not vocab_path.exists():
+        return False
+    metadata = pq.read_schema(tokens_path).metadata or {}
+    if SOURCE_METADATA_KEY not in metadata:
+        return False
+    return json.loads(metadata[SOURCE_METADATA_KEY]) == source_signature([transcriptions_path])
+
+
+class TokenCorpus:
+    """
+    Token ids of the speeches, per text column, over a shared vocabulary.
+
+    For each column, `ids(column)` is the flat int32 array of every token of every
+    speech and `offsets(column)` the start of each speech in it: the tokens of speech
+    `i` are `ids[offsets[i]:offsets[i + 1]]`. Speeches are in `speech_ids` order.
+
+    Usage:
+        tokens = TokenCorpus.load("data/transcriptions.parquet", columns=["text_lemmatized"])
+        tokens.count_words("text_lemmatized", ["america", "china"])
+    """
+
+    def __init__(self, speech_ids, columns, vocab):
+        """
+        Args:
+            speech_ids (np.ndarray): Speech id of each row.
+            columns (dict): list<int32> Arrow array of each text column.
+            vocab (pa.Table): The vocabulary table (token_id, token, count, is_stopword, is_punct).
+        """
+        self.speech_ids = speech_ids
+        self._columns = columns
+        self._vocab_table = vocab
+        self.vocab = vocab.column('token').to_numpy(zero_copy_only=False)
+        self.stopword_mask = vocab.column('is_stopword').to_numpy()
+        self.punct_mask = vocab.column('is_punct').to_numpy()
+        self._token_to_id = None
+
+    @classmethod
+    def load(cls, transcriptions_path, columns=None):
+        """
+        Reads the token files of a transcription file, only the given columns.
+
+        Returns:
+            TokenCorpus or None: None if the files are missing or out of date.
+        """
+        if not is_token_corpus_current(transcriptions_path):
+            return None
+        tokens_path, vocab_path = token_paths(transcriptions_path)
+        names = pq.read_schema(tokens_path).names
+        if columns is None:
+            columns = [col for col in names if col != 'speech_id']
+        elif any(col not in names for col in columns):
+            return None
+        table = pq.read_table(tokens_path, columns=['speech_id'] + list(columns))
+        return cls(
+            table.column('speech_id').to_numpy(),
+            {col: table.column(col).combine_chunks() for col in columns},
+            pq.read_table(vocab_path)
+        )
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def __contains__(self, column):
+        return column in self._columns
+
+    def ids(self, column):
+        """Flat int32 token ids of every speech."""
+        array = self._columns[column]
+        return array.values.to_numpy()[array.offsets[0].as_py():array.offsets[-1].as_py()]
+
+    def offsets(self, column):
+        """Start of each speech in `ids(column)`, plus the total length."""
+        offsets = self._columns[column].offsets.to_numpy()
+        return offsets - offsets[0]
+
+    def lengths(self, column):
+        """Number of tokens of each speech."""
+        return np.diff(self.offsets(column))
+
+    def token_id(self, word):
+        """Id of a token, -1 if it is not in the vocabulary."""
+        if self._token_to_id is None:
+            self._token_to_id = {token: i for i, token in enumerate(self.vocab)}
+        return self._token_to_id.get(word, -1)
+
+    def speech_tokens(self, column, speech_id):
+        """Token ids of one speech."""
+        row = np.flatnonzero(self.speech_ids == speech_id)
+        if not len(row):
+            raise KeyError(speech_id)
+        offsets = self.offsets(column)
+        return self.ids(column)[offsets[row[0]]:offsets[row[0] + 1]]
+
+    def subset(self, speech_ids):
+        """
+        Returns the speeches of `speech_ids`, in that order. Unknown ids are skipped.
+        """
+        index = {speech_id: row for row, speech_id in enumerate(self.speech_ids)}
+        rows = np.array([index[speech_id] for speech_id in speech_ids if speech_id in index], dtype=np.int64)
+        return TokenCorpus(
+            self.speech_ids[rows],
+            {col: array.take(pa.array(rows)) for col, array in self._columns.items()},
+            self._vocab_table
+        )
+
+    def texts(self, column):
+        """
+        Rebuilds the space-joined string of each speech.
+
+        Returns:
+            list: One string per speech.
+        """
+        array = self._columns[column]
+        words = pa.array(self.vocab, type=pa.string()).take(array.values)
+        rebuilt = pa.ListArray.from_arrays(array.offsets, words)
+        return pc.binary_join(rebuilt, " ").to_pylist()
+
+    def count_ids(self, column, token_ids):
+        """
+        Occurrences of each token id in each speech.
+
+        Returns:
+            np.ndarray: (number of speeches, number of ids) counts.
+        """
+        token_ids = np.asarray(token_ids)
+        ids = self.ids(column)
+        rows = np.repeat(np.arange(len(self.speech_ids)), self.lengths(column))
+        # Position of each token in `token_ids`, -1 for the other tokens
+        lookup = np.full(len(self.vocab), -1, dtype=np.int64)
+        known = token_ids >= 0
+        lookup[token_ids[known]] = np.flatnonzero(known)
+        positions = lookup[ids]
+        hits = positions >= 0
+        counts = np.zeros((len(self.speech_ids), len(token_ids)), dtype=np.int64)
+        np.add.at(counts, (rows[hits], positions[hits]), 1)
+        return counts
+
+    def count_words(self, column, words):
+        """
+        Occurrences of each word in each speech, see `count_ids`.
+        """
+        return self.count_ids(column, [self.token_id(word) for word in words])
+
+    def type_token_counts(self, column, ignore_mask=None):
+        """
+        Number of tokens and of distinct tokens of each speech.
+
+        Args:
+            column (str): Text column.
+            ignore_mask (np.ndarray, optional): Vocabulary mask of tokens to leave out
+                                                (e.g. `stopword_mask | punct_mask`).
+
+        Returns:
+            tuple: (n_tokens, n_types) arrays.
+        """
+        ids = self.ids(column).astype(np.int64)
+        rows = np.repeat(np.arange(len(self.speech_ids)), self.lengths(column))
+        if ignore_mask is not None:
+            keep = ~ignore_mask[ids]
+            ids, rows = ids[keep], rows[keep]
+        n_tokens = np.bincount(rows, minlength=len(self.speech_ids))
+        pairs = np.unique(rows * len(self.vocab) + ids)
+        n_types = np.bincount(pairs // len(self.vocab), minlength=len(self.speech_ids))
+        return n_tokens, n_types
+
+    def __repr__(self):
+        return f"<TokenCorpus: {len(self.speech_ids)} speeches, {len(self.vocab)} tokens, columns {self.columns}>"
@@ -0,0 +1,177 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlsplit
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+# Status codes worth retrying: rate limited or transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class HostRateLimiter:
+    """
+    Spaces out requests to the same host by at least `min_interval` seconds,
+    whatever the number of threads issuing them.
+    """
+
+    def __init__(self, min_interval=0.5):
+        self.min_interval = min_interval
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        if self.min_interval <= 0:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class PageFetcher:
+    """
+    Fetches transcript pages over a pooled keep-alive session with bounded concurrency,
+    per-host rate limiting, timeouts and exponential-backoff retries.
+
+    Usage:
+        fetcher = PageFetcher(max_workers=8)
+        for url, soup in fetcher.soup_all(urls):
+            title = get_title(soup)
+    """
+
+    def __init__(self, max_workers=8, timeout=30, max_retries=3, backoff=1.0, min_interval=0.5, session=None, cache=None):
+        """
+        Args:
+            max_workers (int): Maximum number of requests in flight.
+            timeout (float): Connect and read timeout of each request, in seconds.
+            max_retries (int): Number of retries after a failed attempt.
+            backoff (float): Base delay of the exponential backoff, in seconds (backoff * 2**attempt).
+            min_interval (float): Minimum delay between two requests to the same host, in seconds.
+            session (requests.Session, optional): Session to reuse. A pooled session is created if None.
+            cache (PageCache, optional): Raw HTML cache. Cached pages are revalidated with
+                                         ETag/Last-Modified and fetched pages are stored in it.
+        """
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.rate_limiter = HostRateLimiter(min_interval)
+        self.cache = cache
+
+        if session is None:
+            session = requests.Session()
+            # One keep-alive connection per worker
+            adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+
+    def get(self, url, headers=None):
+        """
+        GETs a URL, retrying on connection errors, timeouts and retryable status codes.
+
+        Returns:
+            requests.Response: The last response received.
+
+        Raises:
+            requests.RequestException: If every attempt failed.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.wait(url)
+            try:
+                resp = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+            else:
+                if resp.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                    resp.raise_for_status()
+                    return resp
+            time.sleep(self.backoff * 2 ** attempt)
+
+    def fetch(self, url):
+        """
+        Returns the HTML of a page.
+
+        With a cache, a cached page is revalidated with a conditional request and
+        served from disk on 304 Not Modified.
+        """
+        if self.cache is None:
+            return self.get(url).text
+
+        resp = self.get(url, headers=self.cache.validators(url))
+        if resp.status_code == 304:
+            html = self.cache.get(url)
+            if html is not None:
+                self.cache.touch(url)
+                return html
+            # Evicted since the validators were read
+            resp = self.get(url)
+
+        self.cache.put(url, resp.text, etag=resp.headers.get("ETag"), last_modified=resp.headers.get("Last-Modified"))
+        return resp.text
+
+    def fetch_all(self, urls):
+        """
+        Fetches URLs concurrently, at most `max_workers` at a time.
+
+        Results are yielded as soon as they complete, so not in the order of `urls`.
+        A failed URL does not stop the others.
+
+        Yields:
+            tuple: (url, html, error), `html` is None if `error` is set.
+        """
+        urls = iter(urls)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = {}
+
+            def submit_next():
+                url = next(urls, None)
+                if url is not None:
+                    in_flight[executor.submit(self.fetch, url)] = url
+
+            # Keep a bounded window of pending requests instead of submitting all URLs upfront
+            for _ in range(self.max_workers):
+                submit_next()
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url = in_flight.pop(future)
+                    error = future.exception()
+                    yield url, (None if error else future.result()), error
+                    submit_next()
+
+    def soup_all(self, urls, parser='html.parser'):
+        """
+        Fetches URLs concurrently and yields them parsed, ready for the `speech_decomposer` functions.
+        Failed URLs are reported and skipped.
+
+        Yields:
+            tuple: (url, BeautifulSoup)
+        """
+        for url, html, error in self.fetch_all(urls):
+            if error is not None:
+                print(f"Failed to fetch {url}: {error}")
+                continue
+            yield url, BeautifulSoup(html, parser)
+
+
+_default_fetcher = None
+
+
+def get_default_fetcher():
+    """
+    Returns a process-wide fetcher, so single-page helpers share its connection pool.
+    """
+    global _default_fetcher
+    if _default_fetcher is None:
+        _default_fetcher = PageFetcher()
+    return _default_fetcher
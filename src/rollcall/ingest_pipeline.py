@@ -0,0 +1,291 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from rollcall.page_extractor import extract_speech_page
+from rollcall.speeches_db import save_speeches
+
+# Marks the end of a stage's output
+_DONE = object()
+# Blocking queue operations wake up this often to check whether the pipeline stopped
+_POLL_SECONDS = 0.1
+
+
+class StageStats:
+    """
+    Thread-safe throughput counters of a pipeline stage.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.started_at = time.perf_counter()
+
+    def finish(self):
+        self.finished_at = time.perf_counter()
+
+    def record(self, items=1, busy_seconds=0.0, errors=0):
+        with self._lock:
+            self.items += items
+            self.busy_seconds += busy_seconds
+            self.errors += errors
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    @property
+    def throughput(self):
+        return self.items / self.elapsed if self.elapsed else 0.0
+
+    def __repr__(self):
+        return (f"<{self.name}: {self.items} items, {self.errors} errors, "
+                f"{self.throughput:.1f} items/sec, busy {self.busy_seconds:.1f}s over {self.elapsed:.1f}s>")
+
+
+def parse_page(task):
+    """
+    Parses one fetched page. Runs in a worker process, so it must stay a top-level function.
+
+    Args:
+        task (tuple): (id, url, html, candidate_last_name, candidate_full_name)
+
+    Returns:
+        tuple: (id, url, parsed record, parse seconds)
+    """
+    id, url, html, candidate_last_name, candidate_full_name = task
+    start = time.perf_counter()
+    parsed = extract_speech_page(html).to_record(candidate_last_name, candidate_full_name)
+    return id, url, parsed, time.perf_counter() - start
+
+
+class IngestPipeline:
+    """
+    Staged ingestion of transcript pages:
+
+        fetch (I/O threads) -> parse (process pool) -> write (single thread, batched)
+
+    Stages are joined by bounded queues, so a slow stage holds back the ones feeding it
+    instead of piling pages up in memory. Each stage keeps a `StageStats`.
+
+    Usage:
+        pipeline = IngestPipeline(fetcher, conn, writer, "Trump", "Donald Trump", "Donald Trump")
+        pipeline.run(ids_by_url)
+        print(pipeline.report())
+    """
+
+    def __init__(self, fetcher, conn, parquet_writer, candidate_last_name, candidate_full_name, person_name,
+                 parse_workers=None, queue_size=32, write_batch_size=50):
+        """
+        Args:
+            fetcher (PageFetcher): Fetcher used by the fetch stage.
+            conn (sqlite3.Connection): Database connection, only used by the write stage.
+            parquet_writer (SpeechParquetWriter): Parquet writer, only used by the write stage.
+            candidate_last_name (str): Last name used to select the candidate stats block.
+            candidate_full_name (str): Full name used to select the candidate transcriptions.
+            person_name (str): Name stored with the speeches.
+            parse_workers (int, optional): Number of parsing processes (defaults to the number of CPUs).
+            queue_size (int): Capacity of the queues between stages.
+            write_batch_size (int): Number of speeches written per database transaction.
+        """
+        self.fetcher = fetcher
+        self.conn = conn
+        self.parquet_writer = parquet_writer
+        self.candidate_last_name = candidate_last_name
+        self.candidate_full_name = candidate_full_name
+        self.person_name = person_name
+        self.parse_workers = parse_workers
+        self.queue_size = queue_size
+        self.write_batch_size = write_batch_size
+        self.stats = {name: StageStats(name) for name in ["fetch", "parse", "write"]}
+
+    def _put(self, q, item):
+        """
+        Puts an item on a queue, giving up when the pipeline is stopped.
+
+        Returns:
+            bool: False if the item was dropped because the pipeline stopped.
+        """
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q, block=True):
+        """
+        Gets an item from a queue, _DONE when the pipeline is stopped.
+
+        Raises:
+            queue.Empty: If `block` is False and the queue is empty.
+        """
+        if not block:
+            return q.get_nowait()
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _fail(self, error, *upstream):
+        """
+        Stops the pipeline after a stage failure and empties the queues feeding the failed
+        stage, so that the stages blocked on them can exit.
+        """
+        with self._error_lock:
+            if self._error is None:
+                self._error = error
+        self._stop.set()
+        for q in upstream:
+            while True:
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    break
+
+    def _fetch_stage(self, ids_by_url, fetched):
+        stats = self.stats["fetch"]
+        stats.start()
+        try:
+            for url, html, error in self.fetcher.fetch_all(ids_by_url):
+                if error is not None:
+                    print(f"Failed to fetch {url}: {error}")
+                    stats.record(items=0, errors=1)
+                    continue
+                stats.record()
+                # Blocks when the parse stage is behind
+                if not self._put(fetched, (ids_by_url[url], url, html, self.candidate_last_name, self.candidate_full_name)):
+                    break
+        except BaseException as error:
+            # The pages already fetched are still parsed and written, the error is raised by `run`
+            with self._error_lock:
+                if self._error is None:
+                    self._error = error
+        finally:
+            self._put(fetched, _DONE)
+            stats.finish()
+
+    def _parse_stage(self, fetched, parsed):
+        stats = self.stats["parse"]
+        stats.start()
+        try:
+            workers = self.parse_workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                in_flight = {}
+                max_in_flight = workers * 2
+                exhausted = False
+                while (not exhausted or in_flight) and not self._stop.is_set():
+                    # Top up the pool while there is room and input, without waiting
+                    # on the fetch stage while parsed pages are ready to be handed on
+                    while not exhausted and len(in_flight) < max_in_flight:
+                        try:
+                            task = self._get(fetched, block=not in_flight)
+                        except queue.Empty:
+                            break
+                        if task is _DONE:
+                            exhausted = True
+                            break
+                        in_flight[pool.submit(parse_page, task)] = task[1]
+                    if not in_flight:
+                        break
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        url = in_flight.pop(future)
+                        try:
+                            id, url, record, seconds = future.result()
+                        except BrokenProcessPool:
+                            raise
+                        except Exception as error:
+                            print(f"Failed to parse {url}: {error}")
+                            stats.record(items=0, errors=1)
+                            continue
+                        stats.record(busy_seconds=seconds)
+                        # Blocks when the write stage is behind
+                        self._put(parsed, (id, url, record))
+                for future in in_flight:
+                    future.cancel()
+        except BaseException as error:
+            # Nothing reads the fetched pages anymore, unblock the fetch stage
+            self._fail(error, fetched)
+        finally:
+            self._put(parsed, _DONE)
+            stats.finish()
+
+    def _write_batch(self, batch):
+        stats = self.stats["write"]
+        start = time.perf_counter()
+        # The batch reaches the Parquet files before its database commit
+        save_speeches(self.conn, batch, self.person_name, self.parquet_writer)
+        stats.record(items=len(batch), busy_seconds=time.perf_counter() - start)
+
+    def run(self, ids_by_url):
+        """
+        Ingests the given pages and returns the stage statistics.
+
+        If a stage fails, the other stages are stopped and the error is raised once every
+        thread has exited. Batches written before the failure stay written.
+
+        Args:
+            ids_by_url (dict): Speech id of each URL to ingest.
+
+        Returns:
+            dict: StageStats by stage name.
+        """
+        self._stop = threading.Event()
+        self._error = None
+        self._error_lock = threading.Lock()
+        fetched = queue.Queue(maxsize=self.queue_size)
+        parsed = queue.Queue(maxsize=self.queue_size)
+        threads = [
+            threading.Thread(target=self._fetch_stage, args=(ids_by_url, fetched), daemon=True),
+            threading.Thread(target=self._parse_stage, args=(fetched, parsed), daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        # The write stage runs on the calling thread, which owns the SQLite connection
+        stats = self.stats["write"]
+        stats.start()
+        batch = []
+        try:
+            while True:
+                item = self._get(parsed)
+                if item is _DONE:
+                    break
+                print(item[1])
+                batch.append(item)
+                if len(batch) >= self.write_batch_size:
+                    self._write_batch(batch)
+                    batch = []
+            if batch and not self._stop.is_set():
+                self._write_batch(batch)
+        except BaseException as error:
+            # Nothing reads the parsed pages anymore, unblock the parse stage
+            self._fail(error, parsed)
+        finally:
+            stats.finish()
+            for thread in threads:
+                thread.join()
+
+        if self._error is not None:
+            raise self._error
+        return self.stats
+
+    def report(self):
+        return "\n".join(repr(stats) for stats in self.stats.values())
@@ -0,0 +1,196 @@
+import gzip
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+
+class PageCache:
+    """
+    On-disk cache of raw transcript pages.
+
+    Pages are stored gzip-compressed under the SHA-256 of their content
+    (`objects/ab/abcd....html.gz`), so identical pages are stored once. A small
+    SQLite index maps each URL to its content hash and to the ETag/Last-Modified
+    validators used to revalidate it. When the compressed size exceeds
+    `max_bytes`, the least recently used pages are evicted.
+
+    Usage:
+        cache = PageCache("data/html_cache")
+        fetcher = PageFetcher(cache=cache)
+        for url in cache.urls():
+            soup = BeautifulSoup(cache.get(url), 'html.parser')
+    """
+
+    def __init__(self, cache_dir="data/html_cache", max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            cache_dir (str): Directory of the cache.
+            max_bytes (int): Maximum compressed size of the cached pages, in bytes.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        # The fetcher calls the cache from several threads
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.cache_dir / "index.db", check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS Pages (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL,
+                last_access REAL
+            );
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_hash ON Pages(content_hash);")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_access ON Pages(last_access);")
+        self._conn.commit()
+
+    def _object_path(self, content_hash):
+        return self.objects_dir / content_hash[:2] / f"{content_hash}.html.gz"
+
+    def entry(self, url):
+        """
+        Returns the index entry of a URL (content_hash, size, etag, last_modified, fetched_at), or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash, size, etag, last_modified, fetched_at FROM Pages WHERE url=?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(["content_hash", "size", "etag", "last_modified", "fetched_at"], row))
+
+    def validators(self, url):
+        """
+        Returns the conditional request headers (If-None-Match / If-Modified-Since) for a cached URL.
+        """
+        entry = self.entry(url)
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def get(self, url):
+        """
+        Returns the cached HTML of a URL, or None if it is not cached.
+        """
+        # Looked up and read under the lock, so a concurrent eviction cannot remove the page in between
+        with self._lock:
+            row = self._conn.execute("SELECT content_hash FROM Pages WHERE url=?", (url,)).fetchone()
+            if row is None:
+                return None
+            try:
+                data = self._object_path(row[0]).read_bytes()
+            except FileNotFoundError:
+                # Removed outside of this cache (e.g. by another process), a miss
+                return None
+            self._conn.execute("UPDATE Pages SET last_access=? WHERE url=?", (time.time(), url))
+            self._conn.commit()
+        return gzip.decompress(data).decode("utf-8")
+
+    def put(self, url, html, etag=None, last_modified=None):
+        """
+        Stores the HTML of a URL with its validators, then evicts pages if the cache is too large.
+
+        Returns:
+            str: The content hash of the page.
+        """
+        data = html.encode("utf-8")
+        content_hash = hashlib.sha256(data).hexdigest()
+        path = self._object_path(content_hash)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f".{path.name}.tmp")
+            tmp_path.write_bytes(gzip.compress(data))
+            tmp_path.replace(path)
+        size = path.stat().st_size
+
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT content_hash FROM Pages WHERE url=?", (url,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO Pages (url, content_hash, size, etag, last_modified, fetched_at, last_access) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, content_hash, size, etag, last_modified, now, now)
+            )
+            self._conn.commit()
+            if previous and previous[0] != content_hash:
+                self._delete_orphan(previous[0])
+        self.evict()
+        return content_hash
+
+    def touch(self, url):
+        """
+        Marks a cached URL as revalidated (e.g. after a 304 Not Modified).
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE Pages SET fetched_at=?, last_access=? WHERE url=?", (now, now, url))
+            self._conn.commit()
+
+    def urls(self):
+        """
+        Lists the cached URLs.
+        """
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT url FROM Pages ORDER BY url")]
+
+    def total_bytes(self):
+        """
+        Compressed size of the distinct cached pages, in bytes.
+        """
+        with self._lock:
+            return self._total_bytes()
+
+    def _total_bytes(self):
+        row = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT content_hash, size FROM Pages)"
+        ).fetchone()
+        return row[0]
+
+    def _delete_orphan(self, content_hash):
+        # Content-addressed objects may be shared by several URLs
+        still_used = self._conn.execute("SELECT 1 FROM Pages WHERE content_hash=? LIMIT 1", (content_hash,)).fetchone()
+        if not still_used:
+            self._object_path(content_hash).unlink(missing_ok=True)
+
+    def evict(self):
+        """
+        Removes the least recently used pages until the cache fits in `max_bytes`.
+
+        Returns:
+            int: Number of URLs evicted.
+        """
+        evicted = 0
+        with self._lock:
+            total = self._total_bytes()
+            if total <= self.max_bytes:
+                return 0
+            rows = self._conn.execute("SELECT url, content_hash FROM Pages ORDER BY last_access").fetchall()
+            for url, content_hash in rows:
+                if total <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM Pages WHERE url=?", (url,))
+                still_used = self._conn.execute("SELECT 1 FROM Pages WHERE content_hash=? LIMIT 1", (content_hash,)).fetchone()
+                if not still_used:
+                    path = self._object_path(content_hash)
+                    if path.exists():
+                        total -= path.stat().st_size
+                        path.unlink()
+                evicted += 1
+            self._conn.commit()
+        return evicted
+
+    def close(self):
+        self._conn.close()
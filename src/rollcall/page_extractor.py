@@ -0,0 +1,182 @@
+import json
+import re
+from dataclasses import dataclass, field
+from typing import List
+
+from lxml import etree
+
+# Class attributes of the factbase transcript page, as used by speech_decomposer
+TITLE_CLASS = "text-[#2F3C4B] text-center text-xl sm:text-2xl not-italic font-semibold leading-normal sm:leading-9 font-graphik"
+STATS_CONTAINER_CLASS = "flex flex-wrap gap-8 justify-between"
+STATS_BLOCK_CLASS = "flex-1 h-content"
+STATS_NAME_CLASS = "font-graphik text-sm font-medium leading-normal flex items-center"
+STATS_CONTENT_CLASS = "font-graphik text-xs font-medium text-[#2F3C4B]"
+CATEGORY_CLASS = "text-[#015582] text-sm font-normal leading-normal rounded-md bg-[#F4F4F5] border border-[#D9D9D9] p-2"
+ROW_CLASS = "flex gap-4 py-2"
+SPEAKER_CLASS = "text-md inline"
+TIMESTAMP_CLASS = "text-xs text-gray-600 inline ml-2"
+TEXT_CLASS = "flex-auto text-md text-gray-600 leading-loose"
+
+# Subtrees that never contain speech fields
+SKIPPED_TAGS = {"head", "script", "style", "noscript", "svg", "img"}
+
+_PARSER = etree.HTMLParser(no_network=True, recover=True)
+
+
+@dataclass
+class SpeechPage:
+    """
+    All the fields of a transcript page, extracted in a single traversal.
+
+    `speaker_stats` and `transcriptions` keep every speaker, the candidate is
+    selected afterwards with `candidate_stats` / `candidate_transcriptions`.
+    """
+    heading: str = ""
+    speaker_stats: List[tuple] = field(default_factory=list)  # (speaker name, [stat strings])
+    categories: List[str] = field(default_factory=list)
+    transcriptions: List[list] = field(default_factory=list)  # [speaker, timestamp, text]
+
+    @property
+    def title(self):
+        # Same patterns as speech_decomposer.get_title / get_date
+        return re.search(r"^(.+)-", self.heading).group(1).strip()
+
+    @property
+    def date(self):
+        return re.search(r"-\s(.+)", self.heading).group(1).strip()
+
+    def candidate_stats(self, candidate_last_name="Trump"):
+        """
+        Returns [nbr_sentences, nbr_words, nbr_seconds] of the candidate, like
+        `get_nbr_sentences_nbr_words_nbr_seconds`.
+        """
+        candidate_contents = None
+        for name, contents in self.speaker_stats:
+            if candidate_last_name in name:
+                candidate_contents = contents
+        nbr_sentences = ""
+        nbr_words = ""
+        nbr_seconds = ""
+        for content in candidate_contents or []:
+            if "sentences" in content:
+                nbr_sentences = re.search(r'\d+', content).group()
+            elif "words" in content:
+                nbr_words = re.search(r'\d+', content).group()
+            else:
+                nbr_seconds = re.search(r'\d+', content).group()
+        return [nbr_sentences, nbr_words, nbr_seconds]
+
+    def candidate_transcriptions(self, candidate_full_name="Donald Trump"):
+        """
+        Returns the [timestamp, text] rows of the candidate, like `get_candidate_transcriptions`.
+        """
+        return [row[1:] for row in self.transcriptions if candidate_full_name in row[0]]
+
+    def to_record(self, candidate_last_name, candidate_full_name):
+        """
+        Returns the fields stored in the Speeches table, plus the candidate transcriptions.
+        """
+        nbr_sentences, nbr_words, nbr_seconds = self.candidate_stats(candidate_last_name)
+        return {
+            "title": self.title,
+            "date": self.date,
+            "nbr_sentences": nbr_sentences,
+            "nbr_words": nbr_words,
+            "nbr_seconds": nbr_seconds,
+            "categories": json.dumps(self.categories, ensure_ascii=False),
+            "transcriptions": self.candidate_transcriptions(candidate_full_name)
+        }
+
+
+def _class(element):
+    # Class attributes are compared as a whole, like BeautifulSoup's class_="a b c"
+    value = element.get("class")
+    return " ".join(value.split()) if value else ""
+
+
+def _text(element):
+    # Equivalent of BeautifulSoup's get_text(strip=True)
+    return "".join(part.strip() for part in element.itertext())
+
+
+def _find(element, class_name):
+    for child in element.iter():
+        if isinstance(child.tag, str) and _class(child) == class_name:
+            return child
+    return None
+
+
+def _find_all(element, class_name):
+    return [child for child in element.iter() if isinstance(child.tag, str) and _class(child) == class_name]
+
+
+def _parse_stats(container):
+    stats = []
+    for block in _find_all(container, STATS_BLOCK_CLASS):
+        name = _find(block, STATS_NAME_CLASS)
+        contents = [_text(content) for content in _find_all(block, STATS_CONTENT_CLASS)]
+        stats.append((_text(name) if name is not None else "", contents))
+    return stats
+
+
+def _parse_row(row):
+    speaker = _find(row, SPEAKER_CLASS)
+    timestamp = _find(row, TIMESTAMP_CLASS)  # certains speech n'ont pas de timestamp
+    text = _find(row, TEXT_CLASS)
+    return [
+        _text(speaker) if speaker is not None else "",
+        _text(timestamp) if timestamp is not None else "",
+        _text(text) if text is not None else ""
+    ]
+
+
+def extract_speech_page(html):
+    """
+    Parses a transcript page with lxml and extracts every field in one walk of the tree.
+
+    The walk stops descending as soon as it reaches a field (title, stats container,
+    category, transcript row) and skips subtrees that cannot hold one.
+
+    Args:
+        html (str or bytes): The page HTML.
+
+    Returns:
+        SpeechPage: The extracted fields.
+    """
+    if isinstance(html, str):
+        html = html.encode("utf-8")
+    root = etree.fromstring(html, _PARSER)
+    page = SpeechPage()
+    if root is None:
+        return page
+
+    categories = {}
+    found_title = False
+    found_stats = False
+    stack = [root]
+    while stack:
+        element = stack.pop()
+        if not isinstance(element.tag, str) or element.tag in SKIPPED_TAGS:
+            continue
+        class_name = _class(element)
+        if class_name == TITLE_CLASS:
+            if not found_title:
+                page.heading = _text(element)
+                found_title = True
+            continue
+        if class_name == STATS_CONTAINER_CLASS and not found_stats:
+            page.speaker_stats = _parse_stats(element)
+            found_stats = True
+            continue
+        if class_name == CATEGORY_CLASS:
+            for part in _text(element).split('>'):
+                categories[part.strip()] = None
+            continue
+        if class_name == ROW_CLASS:
+            page.transcriptions.append(_parse_row(element))
+            continue
+        # Children pushed in reverse so they are visited in document order
+        stack.extend(reversed(element))
+
+    page.categories = list(categories)
+    return page
@@ -1,11 +1,48 @@
-import time
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+from rollcall.url_extractor import extract_urls, count_urls
 
-def scroll_to_bottom(browser):
-    prev_height = 0
+def wait_for_more_links(browser, previous_count, timeout=10):
+    """
+    Waits until the page shows more transcript links than `previous_count`.
+    Returns False if nothing was loaded within `timeout` seconds (end of the list).
+    """
+    try:
+        WebDriverWait(browser, timeout, poll_frequency=0.2).until(lambda b: count_urls(b) > previous_count)
+        return True
+    except TimeoutException:
+        return False
+
+def scroll_to_bottom(browser, timeout=10):
+    # Waits for new links after each scroll instead of sleeping a fixed time
+    while True:
+        count = count_urls(browser)
+        browser.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        if not wait_for_more_links(browser, count, timeout):
+            break
+
+def scroll_until_known(browser, known_urls, timeout=10):
+    """
+    Scrolls the search page until a freshly loaded batch of links is entirely known.
+
+    The search page lists the newest speeches first, so once a whole batch is already
+    in the database, every older speech is too.
+
+    Args:
+        browser: Selenium browser on the search page, filters applied.
+        known_urls (set): URLs already in the Speeches table.
+        timeout (float): Seconds to wait for a batch before assuming the end of the list.
+
+    Returns:
+        list: Every URL loaded on the page, in page order.
+    """
+    urls = []
     while True:
-        browser.execute_script("window.scrollBy(0, 3000);")
-        time.sleep(2)
-        new_height = browser.execute_script("return window.scrollY;")
-        if new_height == prev_height:
+        batch = extract_urls(browser, start=len(urls))
+        urls.extend(batch)
+        if batch and all(url in known_urls for url in batch):
+            break
+        browser.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        if not wait_for_more_links(browser, len(urls), timeout):
             break
-        prev_height = new_height
\ No newline at end of file
+    return urls
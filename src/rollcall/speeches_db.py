@@ -1,9 +1,31 @@
+import re
 import sqlite3
-import pandas as pd
-from pathlib import Path
+try:
+    from parquet.dataset import SpeechParquetWriter
+except ImportError:  # imported as src.rollcall from the project root
+    from src.parquet.dataset import SpeechParquetWriter
 
-def init_db(db_path="data/speeches.db"):
+def candidate_from_url(url):
+    """
+    Returns the candidate slug of a factbase URL (".../factbase/trump/transcript/..." -> "trump").
+    """
+    match = re.search(r"/factbase/([^/]+)/", url or "")
+    return match.group(1) if match else None
+
+def connect(db_path="data/speeches.db"):
+    """
+    Opens a connection with the per-connection pragmas used for ingestion.
+    """
     conn = sqlite3.connect(db_path)
+    # WAL is persistent; with it, NORMAL sync is crash-safe and readers don't block the writer
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute("PRAGMA temp_store=MEMORY;")
+    conn.execute("PRAGMA cache_size=-65536;")  # 64 MB
+    return conn
+
+def init_db(db_path="data/speeches.db"):
+    conn = connect(db_path)
     # Table Speeches
     conn.execute("""
         CREATE TABLE IF NOT EXISTS Speeches (
@@ -15,7 +37,8 @@ def init_db(db_path="data/speeches.db"):
             nbr_words INTEGER,
             nbr_seconds INTEGER,
             categories TEXT,
-            person_name TEXT
+            person_name TEXT,
+            candidate TEXT
         );
     """)
 
@@ -30,50 +53,127 @@ def init_db(db_path="data/speeches.db"):
             FOREIGN KEY (speech_id) REFERENCES Speeches(id)
         );
     """)
+
+    # Databases created before the candidate column: add it and fill it from the URLs
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(Speeches)")]
+    if "candidate" not in columns:
+        conn.execute("ALTER TABLE Speeches ADD COLUMN candidate TEXT;")
+    missing = conn.execute("SELECT id, url FROM Speeches WHERE candidate IS NULL").fetchall()
+    if missing:
+        conn.executemany("UPDATE Speeches SET candidate=? WHERE id=?", [(candidate_from_url(url), id) for id, url in missing])
+
+    # Work queue: pending speeches of a candidate, without scanning the table
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_speeches_pending ON Speeches(candidate, id) WHERE title IS NULL;")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transcriptions_speech_id ON Transcriptions(speech_id);")
     conn.commit()
     return conn
 
+def pending_speeches(conn, candidate):
+    """
+    Returns the (id, url) of the speeches of a candidate that have not been processed yet.
+
+    A speech leaves the queue in the same transaction that stores its transcriptions
+    (see `save_speeches`), so an interrupted run resumes where it stopped.
+    """
+    return conn.execute(
+        "SELECT id, url FROM Speeches WHERE title IS NULL AND candidate=? ORDER BY id", (candidate,)
+    ).fetchall()
+
 def add_speech_to_parquet(speech_data, transcription_data, output_dir="data", file_prefix=""):
     """
-    Appends a new speech and its transcription to the existing Parquet files.
-    If files don't exist, creates them.
+    Appends a new speech and its transcription as a new fragment of the Parquet files.
+    The existing files are never read or rewritten; run `compact_dataset` to merge fragments.
+
+    Prefer `SpeechParquetWriter` when adding many speeches, it writes one fragment per batch.
     
     Args:
         speech_data (dict): Dictionary containing speech data
         transcription_data (dict): Dictionary containing transcription data
         output_dir (str): Directory where parquet files are stored
     """
-    output_path = Path(output_dir)
-    speeches_filename = f"{file_prefix}speeches.parquet" if file_prefix else "speeches.parquet"
-    transcriptions_filename = f"{file_prefix}transcriptions.parquet" if file_prefix else "transcriptions.parquet"
-    
-    speeches_file = output_path / speeches_filename
-    transcriptions_file = output_path / transcriptions_filename
-    
-    # Process Speech
-    new_speech_df = pd.DataFrame([speech_data])
-    
-    # Ensure numeric columns are actually numeric
-    numeric_cols = ['nbr_sentences', 'nbr_words', 'nbr_seconds']
-    for col in numeric_cols:
-        if col in new_speech_df.columns:
-            new_speech_df[col] = pd.to_numeric(new_speech_df[col], errors='coerce')
-            
-    if speeches_file.exists():
-        existing_speeches = pd.read_parquet(speeches_file)
-        updated_speeches = pd.concat([existing_speeches, new_speech_df], ignore_index=True)
-    else:
-        updated_speeches = new_speech_df
-    updated_speeches.to_parquet(speeches_file, index=False)
-    
-    # Process Transcription
-    if isinstance(transcription_data, list):
-        new_transcription_df = pd.DataFrame(transcription_data)
-    else:
-        new_transcription_df = pd.DataFrame([transcription_data])
-    if transcriptions_file.exists():
-        existing_transcriptions = pd.read_parquet(transcriptions_file)
-        updated_transcriptions = pd.concat([existing_transcriptions, new_transcription_df], ignore_index=True)
-    else:
-        updated_transcriptions = new_transcription_df
-    updated_transcriptions.to_parquet(transcriptions_file, index=False)
+    with SpeechParquetWriter(output_dir=output_dir, file_prefix=file_prefix) as writer:
+        writer.add(speech_data, transcription_data)
+
+def _next_transcription_id(cur):
+    # AUTOINCREMENT never reuses ids, so start past both the sequence and the current max
+    seq = cur.execute("SELECT seq FROM sqlite_sequence WHERE name='Transcriptions'").fetchone()
+    max_id = cur.execute("SELECT COALESCE(MAX(id), 0) FROM Transcriptions").fetchone()[0]
+    return max(seq[0] if seq else 0, max_id) + 1
+
+def save_speeches(conn, parsed_speeches, person_name, parquet_writer=None):
+    """
+    Writes a batch of parsed speeches to the database in a single transaction,
+    replacing their previous transcriptions.
+
+    Every statement is an `executemany` over the whole batch. Transcription ids are
+    allocated inside the transaction so they can be returned without one INSERT per row.
+    If the process dies mid-batch, the transaction is rolled back and the speeches
+    stay pending.
+
+    With a `parquet_writer`, the batch is written to the Parquet files before the commit,
+    so a speech never leaves the queue without being in the Parquet files. If writing
+    them fails, the fragments already written are removed and the transaction is
+    rolled back.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the speeches database.
+        parsed_speeches (list): (id, url, parsed) tuples, `parsed` as returned by `SpeechPage.to_record`.
+        person_name (str): Name of the candidate.
+        parquet_writer (SpeechParquetWriter, optional): Writer flushed before the commit.
+
+    Returns:
+        list: (speech_data, transcription_data_list) rows for the Parquet files, one per speech.
+    """
+    rows = []
+    speech_params = []
+    transcription_params = []
+    fragments = []
+    # IMMEDIATE takes the write lock upfront, so the allocated ids cannot be taken by another writer
+    conn.execute("BEGIN IMMEDIATE;")
+    try:
+        cur = conn.cursor()
+        next_id = _next_transcription_id(cur)
+        for id, url, parsed in parsed_speeches:
+            speech_params.append((parsed["title"], parsed["date"], parsed["nbr_sentences"], parsed["nbr_words"], parsed["nbr_seconds"], parsed["categories"], person_name, id))
+
+            transcription_data_list = []
+            for timestamp, text in parsed["transcriptions"]:
+                transcription_params.append((next_id, id, timestamp, text))
+                transcription_data_list.append({
+                    "id": next_id,
+                    "speech_id": id,
+                    "timestamp": timestamp,
+                    "text": text,
+                    "duration": None,
+                    "person_name": person_name
+                })
+                next_id += 1
+
+            speech_data = {
+                "id": id,
+                "url": url,
+                "title": parsed["title"],
+                "date": parsed["date"],
+                "nbr_sentences": parsed["nbr_sentences"],
+                "nbr_words": parsed["nbr_words"],
+                "nbr_seconds": parsed["nbr_seconds"],
+                "categories": parsed["categories"],
+                "person_name": person_name
+            }
+            rows.append((speech_data, transcription_data_list))
+
+        # A re-parse replaces the transcriptions of the speech instead of duplicating them
+        cur.executemany("DELETE FROM Transcriptions WHERE speech_id=?", [(id,) for id, _, _ in parsed_speeches])
+        cur.executemany("INSERT INTO Transcriptions (id, speech_id, timestamp, text) VALUES (?, ?, ?, ?);", transcription_params)
+        cur.executemany(""" Update Speeches Set title=?, date=?, nbr_sentences=?, nbr_words=?, nbr_seconds=?,categories=?, person_name=? where id=?""", speech_params)
+        if parquet_writer is not None:
+            for speech_data, transcription_data_list in rows:
+                fragments.extend(parquet_writer.add(speech_data, transcription_data_list))
+            fragments.extend(parquet_writer.flush())
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        for fragment in fragments:
+            fragment.unlink(missing_ok=True)
+        raise
+    return rows
@@ -1,10 +1,17 @@
-
-import sqlite3
+from rollcall.speeches_db import candidate_from_url, connect
 
 def store_urls(urls, db_path="data/speeches.db"):
-    conn = sqlite3.connect(db_path)
-    for url in urls:
-        conn.execute("INSERT OR IGNORE INTO Speeches (url) VALUES (?)", (url,))
+    conn = connect(db_path)
+    # One transaction for the whole batch
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO Speeches (url, candidate) VALUES (?, ?)",
+            [(url, candidate_from_url(url)) for url in urls]
+        )
+    conn.close()
 
-    conn.commit()
+def get_known_urls(db_path="data/speeches.db"):
+    conn = connect(db_path)
+    urls = {row[0] for row in conn.execute("SELECT url FROM Speeches")}
     conn.close()
+    return urls
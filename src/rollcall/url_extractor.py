@@ -1,6 +1,14 @@
 from selenium.webdriver.common.by import By
 
-def extract_urls(browser):
-    links=browser.find_elements(By.CSS_SELECTOR,'a[title="View Transcript"]')
-    urls=[link.get_attribute("href") for link in links]
+TRANSCRIPT_LINK_SELECTOR = 'a[title="View Transcript"]'
+
+def extract_urls(browser, start=0):
+    # A single script call instead of one WebDriver round trip per link
+    urls=browser.execute_script(
+        "return Array.from(document.querySelectorAll(arguments[0])).slice(arguments[1]).map(a => a.href);",
+        TRANSCRIPT_LINK_SELECTOR, start
+    )
     return urls
+
+def count_urls(browser):
+    return len(browser.find_elements(By.CSS_SELECTOR, TRANSCRIPT_LINK_SELECTOR))
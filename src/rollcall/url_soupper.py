@@ -1,6 +1,9 @@
-import requests
 from bs4 import BeautifulSoup
-def url_soupper(url):
-    resp=requests.get(url)
-    soup=BeautifulSoup(resp.text,'html.parser')
+from rollcall.fetcher import get_default_fetcher
+
+def url_soupper(url, fetcher=None):
+    # Shared pooled session with timeout and retries instead of a bare requests.get
+    fetcher=fetcher or get_default_fetcher()
+    html=fetcher.fetch(url)
+    soup=BeautifulSoup(html,'html.parser')
     return soup
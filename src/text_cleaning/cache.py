@@ -0,0 +1,170 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+CACHE_FILE = "cleaning_cache.sqlite"
+# Total size of the cached outputs, least recently used entries are evicted past it
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+# Host parameters per SQL statement, below SQLite's limit
+_SQL_CHUNK = 500
+
+Result = Union[str, Dict[str, str]]
+
+
+def text_key(cleaner: str, text: str) -> bytes:
+    """
+    Content address of the output of a cleaner on a text. `cleaner` names the function,
+    its options and the config version, e.g. "text_cleaning.cleaner.fused_cleaning:1".
+    """
+    return hashlib.sha1(f"{cleaner}\0{text}".encode("utf-8")).digest()
+
+
+class CleaningCache:
+    """
+    Outputs of the cleaners stored on disk by (input text hash, cleaner, config version),
+    shared by every file and run: identical paragraphs are only cleaned once, and a full
+    re-run after an unrelated change is served from the cache.
+
+    The SQLite file is bounded by `max_bytes` of cached outputs, least recently used
+    entries are evicted first.
+
+    Usage:
+        with CleaningCache("data/cleaning_cache.sqlite") as cache:
+            cleaned = cache.apply("basic_normalization:1", texts, basic_normalization_batch)
+            print(cache.stats)
+    """
+
+    def __init__(self, path=CACHE_FILE, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0}
+        self._lock = threading.Lock()
+        # Hits of the last lookup of each thread, files can be cleaned in parallel threads
+        self._local = threading.local()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key BLOB PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_last_used ON cache (last_used)")
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    def get_many(self, cleaner: str, texts: List[str]) -> List[Optional[Result]]:
+        """
+        Cached outputs of `cleaner` on each text, None for the misses.
+        """
+        keys = [text_key(cleaner, text) for text in texts]
+        found = {}
+        with self._lock:
+            unique = list(dict.fromkeys(keys))
+            for i in range(0, len(unique), _SQL_CHUNK):
+                chunk = unique[i:i + _SQL_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(self._conn.execute(
+                    f"SELECT key, value FROM cache WHERE key IN ({placeholders})", chunk
+                ).fetchall())
+                self._conn.execute(f"UPDATE cache SET last_used = ? WHERE key IN ({placeholders})",
+                                   [time.time()] + chunk)
+            self._conn.commit()
+        results = [json.loads(found[key]) if key in found else None for key in keys]
+        hits = sum(result is not None for result in results)
+        with self._lock:
+            self.stats["hits"] += hits
+            self.stats["misses"] += len(results) - hits
+        self._local.hits = hits
+        return results
+
+    @property
+    def last_hits(self) -> int:
+        """
+        Number of hits of the last `get_many` / `apply` call of the current thread.
+        """
+        return getattr(self._local, 'hits', 0)
+
+    def put_many(self, cleaner: str, texts: List[str], results: List[Result]):
+        """
+        Stores the outputs of `cleaner` on each text, then evicts past `max_bytes`.
+        """
+        now = time.time()
+        rows = []
+        for text, result in zip(texts, results):
+            value = json.dumps(result)
+            rows.append((text_key(cleaner, text), value, len(value), now))
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)", rows)
+            self._conn.commit()
+            self._evict()
+
+    def apply(self, cleaner: str, texts: List[str], compute: Callable[[List[str]], Union[List, Dict[str, List]]]):
+        """
+        Outputs of a cleaner on each text, computing only the texts missing from the cache
+        (each distinct one once).
+
+        Args:
+            cleaner (str): Name of the cleaner, its options and version.
+            texts (list): Input texts.
+            compute (Callable): Cleans a list of texts, returns a list, or a dict of lists for
+                                cleaners producing several columns.
+
+        Returns:
+            list or dict: Same shape as the output of `compute` on `texts`.
+        """
+        results = self.get_many(cleaner, texts)
+        missing = list(dict.fromkeys(text for text, result in zip(texts, results) if result is None))
+        if missing:
+            computed = compute(missing)
+            if isinstance(computed, dict):
+                computed = [dict(zip(computed, values)) for values in zip(*computed.values())]
+            self.put_many(cleaner, missing, computed)
+            by_text = dict(zip(missing, computed))
+            results = [by_text[text] if result is None else result for text, result in zip(texts, results)]
+        if results and isinstance(results[0], dict):
+            return {col: [result[col] for result in results] for col in results[0]}
+        return results
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        while total > self.max_bytes:
+            # Oldest entries first, down to 90% so that the next writes don't evict again
+            rows = self._conn.execute(
+                "SELECT key, size FROM cache ORDER BY last_used LIMIT ?", (_SQL_CHUNK,)
+            ).fetchall()
+            if not rows:
+                break
+            target = total - int(self.max_bytes * 0.9)
+            evicted = []
+            for key, size in rows:
+                if target <= 0:
+                    break
+                evicted.append(key)
+                target -= size
+                total -= size
+            self._conn.execute(f"DELETE FROM cache WHERE key IN ({','.join('?' * len(evicted))})", evicted)
+            self.stats["evicted"] += len(evicted)
+            if target <= 0:
+                break
+        self._conn.commit()
+
+    def info(self) -> Dict:
+        """
+        Hit/miss counts of this instance plus the number of entries and bytes on disk.
+        """
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {**self.stats, "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+                "entries": entries, "bytes": size}
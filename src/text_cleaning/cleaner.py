@@ -1,18 +1,78 @@
+import json
+import os
 import re
+import numpy as np
 import spacy
-import simplemma
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
 from typing import List, Optional
 
-# Load spacy model globally to avoid reloading it multiple times
 try:
-    nlp = spacy.load('en_core_web_sm')
-except OSError:
-    print("Downloading 'en_core_web_sm' model...")
-    from spacy.cli import download
-    download("en_core_web_sm")
-    nlp = spacy.load('en_core_web_sm')
+    from src.text_cleaning.lemmas import lemmatize_column, lemmatize_word
+except ImportError:  # imported as text_cleaning with src/ on the path
+    from text_cleaning.lemmas import lemmatize_column, lemmatize_word
+
+MODEL_NAME = 'en_core_web_sm'
+# "tokenizer": blank English pipeline, same tokenizer rules, lexical flags and stopwords as the
+# model, which is all the cleaners use. "model": the full en_core_web_sm pipeline.
+ENGINES = ['tokenizer', 'model']
+DEFAULT_ENGINE = 'tokenizer'
+
+# Pipelines are loaded on first use, one per engine
+_pipelines = {}
+_engine = DEFAULT_ENGINE
+
+def set_engine(engine: str):
+    """
+    Selects the spaCy pipeline used by the cleaners, one of `ENGINES`.
+    """
+    global _engine
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
+    _engine = engine
+
+def get_engine() -> str:
+    """
+    Returns the selected engine.
+    """
+    return _engine
+
+def get_nlp(engine: Optional[str] = None):
+    """
+    Returns the spaCy pipeline of an engine (the selected one by default), loading it on first use.
+
+    Raises:
+        OSError: If the model engine is used and en_core_web_sm is not installed.
+    """
+    engine = engine or _engine
+    if engine not in _pipelines:
+        if engine == 'model':
+            try:
+                _pipelines[engine] = spacy.load(MODEL_NAME)
+            except OSError as e:
+                raise OSError(f"spaCy model '{MODEL_NAME}' is not installed, run "
+                              f"`python -m spacy download {MODEL_NAME}` or use the 'tokenizer' engine") from e
+        elif engine == 'tokenizer':
+            _pipelines[engine] = spacy.blank('en')
+        else:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
+    return _pipelines[engine]
+
+def __getattr__(name):
+    # `cleaner.nlp` used to be the model loaded at import
+    if name == 'nlp':
+        return get_nlp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Components not needed by the stepwise cleaners, only the tokenizer and lexical flags are used
+STEP_DISABLED_COMPONENTS = ['parser', 'ner', 'textcat', 'lemmatizer', 'tagger']
+# Texts per nlp.pipe batch
+DEFAULT_BATCH_SIZE = 1000
+# Version of the cleaning steps, stored with their outputs: bump it when their output changes
+# so that the next incremental run recomputes every row
+CLEANING_VERSION = "1"
 
 def basic_normalization(text: str) -> str:
     """
@@ -46,10 +106,19 @@ def basic_normalization(text: str) -> str:
     # but enable only tokenizer.
     # Actually, the user asked to disable unnecessary components for performance.
     
-    doc = nlp(text, disable=['parser', 'ner', 'textcat', 'lemmatizer', 'tagger'])
+    doc = get_nlp()(text, disable=STEP_DISABLED_COMPONENTS)
     tokens = [token.text for token in doc if not token.is_punct]
     return " ".join(tokens)
 
+def basic_normalization_batch(texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE, n_process: int = 1) -> List[str]:
+    """
+    Batch version of `basic_normalization`, same output for each text.
+    Texts go through `nlp.pipe` instead of one `nlp` call per text.
+    """
+    prepared = [re.sub(r"\[.*?\]", "", text, flags=re.DOTALL).lower() if text else "" for text in texts]
+    docs = get_nlp().pipe(prepared, batch_size=batch_size, n_process=n_process, disable=STEP_DISABLED_COMPONENTS)
+    return [" ".join(token.text for token in doc if not token.is_punct) for doc in docs]
+
 def token_cleaning(text: str) -> str:
     """
     Step 2: Token Cleaning
@@ -60,9 +129,11 @@ def token_cleaning(text: str) -> str:
     if not text:
         return ""
     
-    doc = nlp(text, disable=['parser', 'ner', 'textcat', 'lemmatizer', 'tagger'])
-    stopwords = nlp.Defaults.stop_words
-    
+    nlp = get_nlp()
+    doc = nlp(text, disable=STEP_DISABLED_COMPONENTS)
+    return _kept_tokens(doc, nlp.Defaults.stop_words)
+
+def _kept_tokens(doc, stopwords) -> str:
     tokens = []
     for token in doc:
         if token.is_space:
@@ -76,6 +147,16 @@ def token_cleaning(text: str) -> str:
         
     return " ".join(tokens)
 
+def token_cleaning_batch(texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE, n_process: int = 1) -> List[str]:
+    """
+    Batch version of `token_cleaning`, same output for each text.
+    """
+    nlp = get_nlp()
+    stopwords = nlp.Defaults.stop_words
+    docs = nlp.pipe([text or "" for text in texts], batch_size=batch_size, n_process=n_process,
+                    disable=STEP_DISABLED_COMPONENTS)
+    return [_kept_tokens(doc, stopwords) for doc in docs]
+
 def lemmatization(text: str) -> str:
     """
     Step 3: Lemmatization
@@ -88,10 +169,82 @@ def lemmatization(text: str) -> str:
     # But simplemma needs words.
     
     tokens = text.split()
-    lemmatized_tokens = [simplemma.lemmatize(token, lang='en') for token in tokens]
+    lemmatized_tokens = [lemmatize_word(token) for token in tokens]
     
     return " ".join(lemmatized_tokens)
 
+def lemmatization_batch(texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE, n_process: int = 1) -> List[str]:
+    """
+    Batch version of `lemmatization`, same output for each text. Each distinct word of the
+    column is lemmatized once (see `lemmas.lemmatize_column`), batch_size and n_process are unused.
+    """
+    return lemmatize_column(texts)
+
+# Columns emitted by `fused_cleaning`, in pipeline order
+FUSED_COLUMNS = ['text_basic', 'text_no_stopwords', 'text_lemmatized']
+
+def fused_cleaning_batch(texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE, n_process: int = 1,
+                         vocab: Optional[dict] = None) -> dict:
+    """
+    Runs the three steps in a single spaCy pass: each text is tokenized once and
+    `text_basic`, `text_no_stopwords` and `text_lemmatized` are all built from that Doc.
+
+    The output is the same as chaining `basic_normalization`, `token_cleaning` and
+    `lemmatization`. `token_cleaning` re-tokenizes the space-joined `text_basic`; since the
+    tokenizer splits on spaces first, that equals re-tokenizing each kept token on its own,
+    which is done once per distinct token instead of once per occurrence.
+
+    Args:
+        texts (list): Raw texts.
+        batch_size (int): Texts per nlp.pipe batch.
+        n_process (int): Processes used by nlp.pipe.
+        vocab (dict, optional): token -> id mapping, extended with the new tokens. When given,
+                                the token ids of each column are returned too, as
+                                `<column>_ids` lists of int32 arrays.
+
+    Returns:
+        dict: One list of cleaned texts per column of `FUSED_COLUMNS`.
+    """
+    nlp = get_nlp()
+    stopwords = nlp.Defaults.stop_words
+    # Token text -> tokens kept by token_cleaning
+    kept_cache = {}
+
+    def kept(word):
+        if word not in kept_cache:
+            kept_cache[word] = _kept_tokens(nlp.tokenizer(word), stopwords).split()
+        return kept_cache[word]
+
+    prepared = [re.sub(r"\[.*?\]", "", text, flags=re.DOTALL).lower() if text else "" for text in texts]
+    docs = nlp.pipe(prepared, batch_size=batch_size, n_process=n_process, disable=STEP_DISABLED_COMPONENTS)
+    columns = {col: [] for col in FUSED_COLUMNS}
+    ids = {col: [] for col in FUSED_COLUMNS}
+    for doc in docs:
+        basic = [token.text for token in doc if not token.is_punct]
+        no_stopwords = [word for token in basic for word in kept(token)]
+        lemmatized = [lemmatize_word(word) for word in no_stopwords]
+        for col, tokens in zip(FUSED_COLUMNS, [basic, no_stopwords, lemmatized]):
+            columns[col].append(" ".join(tokens))
+            if vocab is not None:
+                # Same tokens as `str.split()` of the joined text, space tokens included
+                words = " ".join(tokens).split()
+                ids[col].append(np.array([vocab.setdefault(word, len(vocab)) for word in words], dtype=np.int32))
+    if vocab is not None:
+        columns.update({f"{col}_ids": values for col, values in ids.items()})
+    return columns
+
+def fused_cleaning(text: str) -> dict:
+    """
+    Single-text version of `fused_cleaning_batch`.
+    """
+    return {col: values[0] for col, values in fused_cleaning_batch([text], batch_size=1).items()}
+
+# Batch forms picked up by text_cleaning.pipeline.apply_processing_step
+basic_normalization.batch = basic_normalization_batch
+token_cleaning.batch = token_cleaning_batch
+lemmatization.batch = lemmatization_batch
+fused_cleaning.batch = fused_cleaning_batch
+
 # Keep existing functions for backward compatibility or refactor if needed.
 # For now, we leave them as is or slightly modify them to use the new steps if appropriate,
 # but the user didn't strictly ask to remove the old one, just to "Implement the logic in a dedicated module".
@@ -116,6 +269,7 @@ def clean_text(
         text = re.sub(r'\[.*?\]', '', text)
 
     # Tokenize with spacy (disable unnecessary components for speed)
+    nlp = get_nlp()
     doc = nlp(text, disable=['parser', 'ner', 'textcat'])
     
     stopwords = nlp.Defaults.stop_words
@@ -138,8 +292,8 @@ def clean_text(
         
         # Lemmatize if requested
         if lemmatize:
-            # simplemma.lemmatize returns the lemma
-            lemma = simplemma.lemmatize(word, lang='en')
+            # simplemma lemma, memoized per distinct word
+            lemma = lemmatize_word(word)
             tokens.append(lemma)
         else:
             tokens.append(word)
@@ -166,6 +320,7 @@ def clean_docs(
     # Use nlp.pipe only if we are generic cleaning. 
     # For specialized steps, we might want specialized batch functions 
     # but for now we keep this old function as is.
+    nlp = get_nlp()
     docs = nlp.pipe(texts, n_process=n_process, batch_size=batch_size, disable=['parser', 'ner', 'textcat'])
     
     stopwords = nlp.Defaults.stop_words
@@ -182,7 +337,7 @@ def clean_docs(
                 
             word = token.text.lower()
             if lemmatize:
-                tokens.append(simplemma.lemmatize(word, lang='en'))
+                tokens.append(lemmatize_word(word))
             else:
                 tokens.append(word)
         cleaned_texts.append(" ".join(tokens))
@@ -196,35 +351,74 @@ def apply_cleaning_to_parquet(
     remove_punctuation: bool = True,
     lemmatize: bool = True,
     remove_brackets: bool = False,
-    overwrite: bool = False
+    overwrite: bool = False,
+    n_process: int = 1,
+    batch_size: int = 100,
+    cache=None,
+    stream: bool = False,
+    stream_rows: int = 50_000
 ):
     """
     Legacy function: Applies text cleaning to the 'text' column of a parquet file.
+    `n_process` and `batch_size` are passed to `clean_docs` (nlp.pipe). With a `cache`
+    (`text_cleaning.cache.CleaningCache`), only the texts it misses are cleaned.
+
+    With `stream=True`, the file is cleaned `stream_rows` rows at a time and written to a
+    new file through a `ParquetWriter`, swapped in at the end: memory stays bounded by one
+    batch instead of the whole file.
     """
     path = Path(parquet_path)
     if not path.exists():
         raise FileNotFoundError(f"File not found: {path}")
-        
-    df = pd.read_parquet(path)
-    
-    if 'text' not in df.columns:
+
+    columns = pq.read_schema(path).names
+    if 'text' not in columns:
         raise ValueError("Parquet file must contain a 'text' column")
         
-    if output_column in df.columns and not overwrite:
+    if output_column in columns and not overwrite:
         print(f"Column '{output_column}' already exists. Skipping. Set overwrite=True to force update.")
         return
         
     print(f"Cleaning text for column '{output_column}'...")
-    cleaned_texts = clean_docs(
-        df['text'].fillna("").tolist(),
-        remove_stopwords=remove_stopwords,
-        remove_punctuation=remove_punctuation,
-        lemmatize=lemmatize,
-        remove_brackets=remove_brackets
-    )
-    
-    df[output_column] = cleaned_texts
-    
-    df.to_parquet(path, index=False)
-    print(f"Saved updated parquet to {path}")
+    options = {
+        "remove_stopwords": remove_stopwords,
+        "remove_punctuation": remove_punctuation,
+        "lemmatize": lemmatize,
+        "remove_brackets": remove_brackets,
+    }
 
+    def clean(texts):
+        texts = texts.fillna("").tolist()
+        if cache is None:
+            return clean_docs(texts, n_process=n_process, batch_size=batch_size, **options)
+        # The options change the output, they are part of the cache key
+        cleaner = f"clean_docs:{json.dumps(options, sort_keys=True)}:{CLEANING_VERSION}"
+        return cache.apply(cleaner, texts, lambda values: clean_docs(values, n_process=n_process,
+                                                                     batch_size=batch_size, **options))
+
+    if stream:
+        parquet_file = pq.ParquetFile(path)
+        schema = parquet_file.schema_arrow.remove_metadata()
+        if output_column not in schema.names:
+            schema = schema.append(pa.field(output_column, pa.string()))
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        try:
+            with pq.ParquetWriter(tmp_path, schema) as writer:
+                for batch in parquet_file.iter_batches(batch_size=stream_rows):
+                    df = batch.to_pandas()
+                    df[output_column] = clean(df['text'])
+                    writer.write_table(pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False))
+            os.replace(tmp_path, path)
+        finally:
+            # A failed run leaves the original file untouched and no partial file behind
+            if tmp_path.exists():
+                tmp_path.unlink()
+    else:
+        df = pd.read_parquet(path)
+        df[output_column] = clean(df['text'])
+        df.to_parquet(path, index=False)
+
+    if cache is not None:
+        info = cache.info()
+        print(f"Cache: {info['hits']} hits, {info['misses']} misses ({info['hit_rate']:.0%})")
+    print(f"Saved updated parquet to {path}")
@@ -0,0 +1,204 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+try:
+    from src.parquet.dataset import input_hash_column
+    from src.text_cleaning.pipeline import (STEP_VERSION, STREAM_ROWS, _log_report, _run_step, _update_frame,
+                                            _write_frame, step_name, stream_processing_steps)
+except ImportError:  # imported as text_cleaning with src/ on the path
+    from parquet.dataset import input_hash_column
+    from text_cleaning.pipeline import (STEP_VERSION, STREAM_ROWS, _log_report, _run_step, _update_frame,
+                                        _write_frame, step_name, stream_processing_steps)
+
+
+@dataclass
+class Step:
+    """
+    A cleaning step of a `CleaningDAG`: `func` maps each text of `input_col` to its
+    output, a dict of column -> value when the step has several `output_cols`
+    (e.g. `fused_cleaning`). A `.batch` form of `func` is used when there is one.
+    """
+    name: str
+    func: Callable
+    input_col: str
+    output_cols: List[str]
+    version: str = STEP_VERSION
+
+    def as_dict(self, upstream: str = "") -> Dict:
+        """
+        The step in the format of `run_processing_steps`, keyed on the versions of its upstream steps.
+        """
+        step = {"name": self.name, "input_col": self.input_col, "func": self.func, "version": self.version,
+                "upstream": upstream}
+        if len(self.output_cols) == 1:
+            step["output_col"] = self.output_cols[0]
+        else:
+            step["output_cols"] = list(self.output_cols)
+        return step
+
+
+class CleaningDAG:
+    """
+    Cleaning steps wired by their columns: a step depends on the step producing its
+    `input_col`, columns already in the file (e.g. `text`) are the roots.
+
+    Each run only recomputes what changed, using the input hashes of `run_processing_steps`:
+    the rows whose input changed, and every row of the steps whose version, or the version
+    of an upstream step, changed. Steps whose inputs are ready run at the same time, and
+    `run` cleans several files at the same time. Threads only overlap the work handed to
+    processes, pass a `ShardedExecutor` to use several cores.
+
+    Usage:
+        dag = CleaningDAG([
+            Step("normalize", basic_normalization, "text", ["text_basic"]),
+            Step("tokens", token_cleaning, "text_basic", ["text_no_stopwords"]),
+            Step("lemmas", lemmatization, "text_no_stopwords", ["text_lemmatized"]),
+        ])
+        reports = dag.run(["data/transcriptions.parquet", "data/other_transcriptions.parquet"])
+    """
+
+    def __init__(self, steps: List[Step]):
+        """
+        Raises:
+            ValueError: If two steps share a name or an output column, or if the steps form a cycle.
+        """
+        self.steps = {}
+        self.producers = {}
+        for step in steps:
+            if step.name in self.steps:
+                raise ValueError(f"Duplicate step name '{step.name}'")
+            self.steps[step.name] = step
+            for col in step.output_cols:
+                if col in self.producers:
+                    raise ValueError(f"Column '{col}' is produced by both '{self.producers[col]}' and '{step.name}'")
+                self.producers[col] = step.name
+        self.dependencies = {
+            step.name: {self.producers[step.input_col]} if step.input_col in self.producers else set()
+            for step in steps
+        }
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        order = []
+        done = set()
+        while len(order) < len(self.steps):
+            # Declaration order among the ready steps
+            ready = [name for name in self.steps if name not in done and self.dependencies[name] <= done]
+            if not ready:
+                cycle = [name for name in self.steps if name not in done]
+                raise ValueError(f"Cycle between the steps {cycle}")
+            order.extend(ready)
+            done.update(ready)
+        return order
+
+    def upstream(self, name: str) -> List[str]:
+        """
+        Names of every step `name` depends on, directly or not, in run order.
+        """
+        ancestors = set()
+        pending = list(self.dependencies[name])
+        while pending:
+            dependency = pending.pop()
+            if dependency not in ancestors:
+                ancestors.add(dependency)
+                pending.extend(self.dependencies[dependency])
+        return [step for step in self.order if step in ancestors]
+
+    def step_dict(self, name: str) -> Dict:
+        upstream = ",".join(step_name(self.steps[dependency].as_dict()) for dependency in self.upstream(name))
+        return self.steps[name].as_dict(upstream)
+
+    def step_dicts(self) -> List[Dict]:
+        """
+        Every step in run order, in the format of `run_processing_steps`.
+        """
+        return [self.step_dict(name) for name in self.order]
+
+    def run_file(self, parquet_path, overwrite: bool = False, batch_size: int = 1000, n_process: int = 1,
+                 executor=None, cache=None, max_parallel: Optional[int] = None, stream: bool = False,
+                 stream_rows: int = STREAM_ROWS) -> List[Dict]:
+        """
+        Runs the steps on one file with a single read and, if a column changed, a single write.
+
+        Args:
+            parquet_path (str or Path): Path of the transcription file.
+            overwrite (bool): Recompute every row of every step.
+            batch_size (int): Texts per batch, for steps with a batch form.
+            n_process (int): Processes used by the batch forms.
+            executor (ShardedExecutor, optional): Process pool cleaning the rows in shards.
+            cache (CleaningCache, optional): Persistent cache of the cleaned texts.
+            max_parallel (int, optional): Steps running at the same time. Defaults to all the ready ones.
+            stream (bool): Process the file in batches of `stream_rows` rows (see
+                           `stream_processing_steps`), the steps then run one after the other.
+            stream_rows (int): Rows per batch in streaming mode.
+
+        Returns:
+            list: The report of `run_processing_steps`: per step, the recomputed 'rows', 'reused'
+                  rows, input 'tokens' and wall 'seconds', and the 'process_peak_mb' on the 'read' entry.
+        """
+        path = Path(parquet_path)
+        if stream:
+            return stream_processing_steps(path, self.step_dicts(), overwrite=overwrite, batch_size=batch_size,
+                                           n_process=n_process, executor=executor, cache=cache,
+                                           stream_rows=stream_rows)
+        if not path.exists():
+            raise FileNotFoundError(f"File not found: {path}")
+
+        logging.info(f"Reading {path}...")
+        start = time.perf_counter()
+        df = pd.read_parquet(path)
+        report = [{"name": "read", "rows": len(df), "seconds": time.perf_counter() - start, "skipped": False}]
+
+        steps = {name: self.step_dict(name) for name in self.order}
+        entries = {}
+        pending = list(self.order)
+        changed = False
+        with ThreadPoolExecutor(max_workers=max_parallel or len(steps) or 1) as pool:
+            futures = {}
+
+            def submit_ready():
+                for name in [name for name in pending if self.dependencies[name] <= entries.keys()]:
+                    pending.remove(name)
+                    # The step reads its own copy of its columns while finished steps are written into df
+                    step = self.steps[name]
+                    columns = [step.input_col] + [col for output in step.output_cols
+                                                  for col in (output, input_hash_column(output))]
+                    frame = df[[col for col in dict.fromkeys(columns) if col in df.columns]]
+                    futures[pool.submit(_run_step, frame, steps[name], path, overwrite, batch_size, n_process,
+                                        executor, cache)] = name
+
+            submit_ready()
+            while futures:
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = futures.pop(future)
+                    entries[name], update = future.result()
+                    changed |= _update_frame(df, update)
+                submit_ready()
+
+        report += [entries[name] for name in self.order]
+        if changed:
+            report.append(_write_frame(df, path))
+        _log_report(report)
+        return report
+
+    def run(self, parquet_paths: List, parallel_files: bool = True, **options) -> Dict[str, List[Dict]]:
+        """
+        Runs the steps on several files, at the same time unless `parallel_files` is False.
+        `options` are those of `run_file`.
+
+        Returns:
+            dict: The report of each file, by path.
+        """
+        parquet_paths = [str(path) for path in parquet_paths]
+        if not parallel_files or len(parquet_paths) < 2:
+            return {path: self.run_file(path, **options) for path in parquet_paths}
+        with ThreadPoolExecutor(max_workers=len(parquet_paths)) as pool:
+            reports = pool.map(lambda path: self.run_file(path, **options), parquet_paths)
+            return dict(zip(parquet_paths, reports))
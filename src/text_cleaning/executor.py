@@ -0,0 +1,144 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Union
+
+try:
+    from src.text_cleaning import cleaner
+    from src.text_cleaning.lemmas import load_lemma_table
+except ImportError:  # imported as text_cleaning with src/ on the path
+    from text_cleaning import cleaner
+    from text_cleaning.lemmas import load_lemma_table
+
+# Texts per shard: large enough to amortize pickling, small enough to balance the workers
+DEFAULT_SHARD_SIZE = 2000
+
+
+def _init_worker(engine: str, lemma_table: Optional[str]):
+    # Loaded once per worker, reused by every shard it cleans
+    cleaner.set_engine(engine)
+    cleaner.get_nlp()
+    # Spawned workers start with an empty table, without it every word goes through simplemma
+    if lemma_table is not None:
+        load_lemma_table(lemma_table)
+
+
+def _clean_shard(func: Callable, texts: List[str], batch_size: int):
+    """
+    Cleans one shard in a worker, with the batch form of the step when it has one.
+
+    Returns:
+        tuple: (results, worker pid, seconds)
+    """
+    start = time.perf_counter()
+    batch_func = getattr(func, 'batch', None)
+    if batch_func is not None:
+        results = batch_func(texts, batch_size=batch_size, n_process=1)
+    else:
+        results = [func(text) for text in texts]
+    return results, os.getpid(), time.perf_counter() - start
+
+
+class ShardedExecutor:
+    """
+    Cleans texts in a pool of processes, each loading the spaCy pipeline once.
+
+    Texts are split into shards of `shard_size`, cleaned in any order and reassembled in
+    the original order. `map` can be called from several threads at once, e.g. to clean
+    both transcription files over the same pool.
+
+    Usage:
+        with ShardedExecutor(n_workers=8) as executor:
+            cleaned = executor.map(basic_normalization, texts)
+            executor.log_throughput()
+
+    Step functions are sent to the workers by reference, they must be importable
+    module-level functions (no lambdas).
+    """
+
+    def __init__(self, n_workers: Optional[int] = None, shard_size: int = DEFAULT_SHARD_SIZE,
+                 batch_size: int = cleaner.DEFAULT_BATCH_SIZE, engine: Optional[str] = None,
+                 lemma_table: Optional[Union[str, os.PathLike]] = None):
+        """
+        Args:
+            n_workers (int, optional): Number of processes. Defaults to the number of CPUs.
+            shard_size (int): Texts per shard.
+            batch_size (int): Texts per nlp.pipe batch inside a shard.
+            engine (str, optional): Cleaning engine of the workers. Defaults to the selected one.
+            lemma_table (str or Path, optional): Lemma table preloaded by each worker (see `load_lemma_table`).
+        """
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.shard_size = shard_size
+        self.batch_size = batch_size
+        self.engine = engine or cleaner.get_engine()
+        self.lemma_table = str(lemma_table) if lemma_table is not None else None
+        self.worker_stats: Dict[int, Dict] = {}
+        self._lock = threading.Lock()
+        # Spawned rather than forked: forking while other threads run can deadlock the child
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.n_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.engine, self.lemma_table),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self._pool.shutdown()
+
+    def map(self, func: Callable, texts: List[str], label: Optional[str] = None) -> Union[List, Dict[str, List]]:
+        """
+        Applies a cleaning step to every text.
+
+        Args:
+            func (Callable): Step function (e.g. `basic_normalization`, `fused_cleaning`).
+            texts (list): Texts to clean.
+            label (str, optional): Name used in the progress logs.
+
+        Returns:
+            list or dict: The results in the order of `texts`. Steps returning a dict of
+                          columns (`fused_cleaning`) give a dict of lists.
+        """
+        label = label or getattr(func, '__name__', 'step')
+        texts = list(texts)
+        shards = [texts[i:i + self.shard_size] for i in range(0, len(texts), self.shard_size)]
+        futures = {self._pool.submit(_clean_shard, func, shard, self.batch_size): index
+                   for index, shard in enumerate(shards)}
+
+        results = [None] * len(shards)
+        next_log = 0.1
+        for done, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            results[index], pid, seconds = future.result()
+            self._record(pid, len(shards[index]), seconds)
+            if done / len(shards) >= next_log or done == len(shards):
+                logging.info(f"{label}: {done}/{len(shards)} shards")
+                while next_log <= done / len(shards):
+                    next_log += 0.1
+
+        if results and isinstance(results[0], dict):
+            return {key: [value for result in results for value in result[key]] for key in results[0]}
+        return [value for result in results for value in result]
+
+    def _record(self, pid: int, rows: int, seconds: float):
+        with self._lock:
+            stats = self.worker_stats.setdefault(pid, {"shards": 0, "rows": 0, "seconds": 0.0})
+            stats["shards"] += 1
+            stats["rows"] += rows
+            stats["seconds"] += seconds
+
+    def log_throughput(self):
+        """
+        Logs the rows cleaned by each worker and its throughput.
+        """
+        for pid, stats in sorted(self.worker_stats.items()):
+            rate = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+            logging.info(f"worker {pid}: {stats['shards']} shards, {stats['rows']} rows, {rate:.0f} rows/sec")
@@ -0,0 +1,246 @@
+import json
+import os
+import re
+import shutil
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from src.text_cleaning import cleaner
+    from src.text_cleaning.lemmas import lemmatize_word
+except ImportError:  # imported as text_cleaning with src/ on the path
+    from text_cleaning import cleaner
+    from text_cleaning.lemmas import lemmatize_word
+
+FORMATS = ['npy', 'jsonl']
+EXPORT_DIR = "cleaned_tokens"
+MANIFEST_FILE = "manifest.json"
+VOCAB_FILE = "vocab.json"
+# Rows fetched from SQLite per batch
+DEFAULT_BATCH_SIZE = 2000
+# Tokens per shard file, the export only holds one shard in memory
+DEFAULT_SHARD_TOKENS = 2_000_000
+# Lemmas of the model engine need the tagger, attribute ruler and lemmatizer only
+EXPORT_DISABLED_COMPONENTS = ['parser', 'ner', 'textcat']
+# Bump when the exported tokens change
+EXPORT_VERSION = 1
+
+TRANSCRIPTIONS_QUERY = "SELECT id, speech_id, text FROM Transcriptions WHERE text IS NOT NULL ORDER BY id"
+
+
+def clean_phrase(text: str) -> str:
+    """
+    Splits a transcription on sentence punctuation, drops the bracketed annotations
+    (e.g. [APPLAUSE]) and joins the non-empty pieces with spaces.
+    """
+    chunks = [re.sub(r"\[.*?\]", "", part).strip() for part in re.split(r"[.!?]+", str(text))]
+    return " ".join(filter(None, chunks))
+
+
+def iter_transcriptions(db_path, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Tuple[int, int, str]]]:
+    """
+    Pages through the Transcriptions table, yields lists of (id, speech_id, text) of at
+    most `batch_size` rows.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute(TRANSCRIPTIONS_QUERY)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+
+def lemma_tokens(texts: List[str], batch_size: int = cleaner.DEFAULT_BATCH_SIZE, n_process: int = 1) -> List[List[str]]:
+    """
+    Lemmas of the tokens of each text that are neither punctuation, spaces nor stopwords.
+
+    With the model engine the lemmas are spaCy's (`token.lemma_`), with the tokenizer
+    engine they come from `lemmatize_word`, computed once per distinct word.
+    """
+    model = cleaner.get_engine() == 'model'
+    docs = cleaner.get_nlp().pipe(texts, batch_size=batch_size, n_process=n_process,
+                                  disable=EXPORT_DISABLED_COMPONENTS)
+    return [[token.lemma_ if model else lemmatize_word(token.text)
+             for token in doc if not (token.is_punct or token.is_space or token.is_stop)]
+            for doc in docs]
+
+
+class _ShardWriter:
+    """
+    Buffers the tokens of the exported transcriptions and writes them in shards of
+    about `shard_tokens` tokens.
+    """
+
+    def __init__(self, directory: Path, fmt: str, shard_tokens: int):
+        self.directory = directory
+        self.fmt = fmt
+        self.shard_tokens = shard_tokens
+        self.vocab: Dict[str, int] = {}
+        self.shards: List[str] = []
+        self.n_rows = 0
+        self.n_tokens = 0
+        self._reset()
+
+    def _reset(self):
+        self._ids: List[int] = []
+        self._speech_ids: List[int] = []
+        self._tokens: List[List[str]] = []
+        self._buffered = 0
+
+    def add(self, transcription_id: int, speech_id: int, tokens: List[str]):
+        self._ids.append(transcription_id)
+        self._speech_ids.append(speech_id)
+        if self.fmt == 'npy':
+            vocab = self.vocab
+            self._tokens.append([vocab.setdefault(token, len(vocab)) for token in tokens])
+        else:
+            self._tokens.append(tokens)
+        self._buffered += len(tokens)
+        self.n_rows += 1
+        self.n_tokens += len(tokens)
+        if self._buffered >= self.shard_tokens:
+            self.flush()
+
+    def flush(self):
+        if not self._ids:
+            return
+        name = f"tokens-{len(self.shards):05d}.{'npz' if self.fmt == 'npy' else 'jsonl'}"
+        path = self.directory / name
+        if self.fmt == 'npy':
+            lengths = np.fromiter((len(ids) for ids in self._tokens), dtype=np.int64, count=len(self._tokens))
+            offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=offsets[1:])
+            flat = np.fromiter((i for ids in self._tokens for i in ids), dtype=np.int32, count=int(offsets[-1]))
+            # Uncompressed: loading is a plain read of the arrays
+            np.savez(path, ids=flat, offsets=offsets,
+                     transcription_ids=np.asarray(self._ids, dtype=np.int64),
+                     speech_ids=np.asarray(self._speech_ids, dtype=np.int64))
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                for transcription_id, speech_id, tokens in zip(self._ids, self._speech_ids, self._tokens):
+                    f.write(json.dumps({"id": transcription_id, "speech_id": speech_id, "tokens": tokens},
+                                       ensure_ascii=False, separators=(",", ":")))
+                    f.write("\n")
+        self.shards.append(name)
+        self._reset()
+
+
+def export_tokens(db_path="data/speeches.db", output_dir=None, fmt: str = 'npy',
+                  batch_size: int = DEFAULT_BATCH_SIZE, shard_tokens: int = DEFAULT_SHARD_TOKENS,
+                  n_process: int = 1) -> Dict:
+    """
+    Exports the lemmatized tokens of every transcription, without punctuation and stopwords.
+
+    Transcriptions are read from SQLite in batches of `batch_size` rows and lemmatized
+    through `nlp.pipe`, so memory is bounded by one batch plus one shard (and the
+    vocabulary of the npy format) whatever the size of the corpus.
+
+    Written to `output_dir` (by default `cleaned_tokens/` next to the database):
+    - npy: `tokens-NNNNN.npz` shards holding the int32 token ids of the transcriptions
+      (`ids`), the start of each one in `ids` (`offsets`), their `transcription_ids` and
+      `speech_ids`, plus `vocab.json`, the token of each id.
+    - jsonl: `tokens-NNNNN.jsonl` shards, one {"id", "speech_id", "tokens"} line per transcription.
+    - `manifest.json`: format, shards and counts.
+
+    The directory is replaced once the export is complete.
+
+    Args:
+        db_path (str): Path of the SQLite database.
+        output_dir (str, optional): Output directory.
+        fmt (str): One of `FORMATS`.
+        batch_size (int): Rows fetched and lemmatized per batch.
+        shard_tokens (int): Tokens per shard.
+        n_process (int): Processes of `nlp.pipe`.
+
+    Returns:
+        dict: The manifest.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}', expected one of {FORMATS}")
+    output_dir = Path(output_dir) if output_dir else Path(db_path).with_name(EXPORT_DIR)
+    tmp_dir = output_dir.with_name(f".{output_dir.name}.tmp")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
+    writer = _ShardWriter(tmp_dir, fmt, shard_tokens)
+    for rows in iter_transcriptions(db_path, batch_size):
+        texts = [clean_phrase(text) for _, _, text in rows]
+        for (transcription_id, speech_id, _), tokens in zip(rows, lemma_tokens(texts, n_process=n_process)):
+            writer.add(transcription_id, speech_id, tokens)
+    writer.flush()
+
+    manifest = {
+        "version": EXPORT_VERSION,
+        "format": fmt,
+        "engine": cleaner.get_engine(),
+        "shards": writer.shards,
+        "transcriptions": writer.n_rows,
+        "tokens": writer.n_tokens,
+    }
+    if fmt == 'npy':
+        # Ids follow the order of first appearance
+        (tmp_dir / VOCAB_FILE).write_text(json.dumps(list(writer.vocab), ensure_ascii=False), encoding="utf-8")
+        manifest["vocab_size"] = len(writer.vocab)
+    (tmp_dir / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    os.replace(tmp_dir, output_dir)
+    return manifest
+
+
+def read_manifest(export_dir) -> Dict:
+    return json.loads((Path(export_dir) / MANIFEST_FILE).read_text(encoding="utf-8"))
+
+
+def load_vocab(export_dir) -> Optional[List[str]]:
+    """
+    Token of each id of an npy export, None for a jsonl export.
+    """
+    path = Path(export_dir) / VOCAB_FILE
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def iter_token_shards(export_dir) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Yields the arrays of each shard of an npy export: ids, offsets, transcription_ids, speech_ids.
+    The tokens of the i-th transcription of a shard are `ids[offsets[i]:offsets[i + 1]]`.
+    """
+    export_dir = Path(export_dir)
+    manifest = read_manifest(export_dir)
+    if manifest["format"] != 'npy':
+        raise ValueError(f"{export_dir} is a {manifest['format']} export")
+    for name in manifest["shards"]:
+        with np.load(export_dir / name) as shard:
+            yield {key: shard[key] for key in shard.files}
+
+
+def iter_exported_tokens(export_dir) -> Iterator[Tuple[int, int, List[str]]]:
+    """
+    Yields (transcription id, speech id, tokens) for each transcription of an export, in id order.
+    """
+    export_dir = Path(export_dir)
+    manifest = read_manifest(export_dir)
+    if manifest["format"] == 'jsonl':
+        for name in manifest["shards"]:
+            with open(export_dir / name, encoding="utf-8") as f:
+                for line in f:
+                    row = json.loads(line)
+                    yield row["id"], row["speech_id"], row["tokens"]
+        return
+    vocab = np.array(load_vocab(export_dir), dtype=object)
+    for shard in iter_token_shards(export_dir):
+        offsets = shard["offsets"]
+        tokens = vocab[shard["ids"]] if len(vocab) else np.array([], dtype=object)
+        for i, (transcription_id, speech_id) in enumerate(zip(shard["transcription_ids"], shard["speech_ids"])):
+            yield int(transcription_id), int(speech_id), tokens[offsets[i]:offsets[i + 1]].tolist()
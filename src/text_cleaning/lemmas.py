@@ -0,0 +1,115 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import simplemma
+
+LANG = 'en'
+# Distinct surface forms kept in memory, a speech corpus vocabulary fits well below this
+LEMMA_CACHE_SIZE = 200_000
+LEMMA_TABLE_FILE = "lemmas.parquet"
+# A table written by another simplemma version may hold different lemmas
+VERSION_METADATA_KEY = b"simplemma_version"
+
+# Preloaded word -> lemma table, looked up before simplemma
+_table: Dict[str, str] = {}
+
+
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def lemmatize_word(word: str) -> str:
+    """
+    Lemma of a word, as `simplemma.lemmatize(word, lang='en')`, computed once per distinct word.
+    """
+    lemma = _table.get(word)
+    if lemma is None:
+        lemma = simplemma.lemmatize(word, lang=LANG)
+    return lemma
+
+
+def lemmatize_words(words: Iterable[str]) -> List[str]:
+    """
+    Lemmas of a sequence of words.
+    """
+    return [lemmatize_word(word) for word in words]
+
+
+def lemmatize_column(texts) -> List[str]:
+    """
+    Lemmatizes space-separated texts, the same as `" ".join(lemmatize_words(text.split()))`
+    for each text, nulls giving "".
+
+    The words of every text are dictionary-encoded in Arrow, so each distinct word is
+    lemmatized once and the lemmas are mapped back onto the tokens with a single take.
+
+    Args:
+        texts (list, pd.Series or pa.Array): Space-separated texts.
+
+    Returns:
+        list: One lemmatized string per text.
+    """
+    if not isinstance(texts, (pa.Array, pa.ChunkedArray)):
+        texts = pa.array([None if text is None or text != text else str(text) for text in texts], type=pa.string())
+    elif isinstance(texts, pa.ChunkedArray):
+        texts = texts.combine_chunks()
+    lists = pc.utf8_split_whitespace(pc.fill_null(texts, ""))
+    words = pc.list_flatten(lists)
+    rows = pc.list_parent_indices(lists)
+    # Leading, trailing and repeated spaces give empty strings
+    non_empty = pc.not_equal(pc.utf8_length(words), 0)
+    words, rows = words.filter(non_empty), rows.filter(non_empty)
+
+    encoded = pc.dictionary_encode(words)
+    lemmas = pa.array(lemmatize_words(encoded.dictionary.to_pylist()), type=pa.string())
+    lemmatized = lemmas.take(encoded.indices)
+
+    counts = np.bincount(rows.to_numpy(), minlength=len(texts))
+    offsets = np.zeros(len(texts) + 1, dtype=np.int32)
+    np.cumsum(counts, out=offsets[1:])
+    rebuilt = pa.ListArray.from_arrays(pa.array(offsets), lemmatized)
+    return pc.binary_join(rebuilt, " ").to_pylist()
+
+
+def load_lemma_table(path) -> int:
+    """
+    Preloads a lemma table written by `save_lemma_table`. A table written with another
+    simplemma version is ignored.
+
+    Returns:
+        int: Number of entries loaded.
+    """
+    path = Path(path)
+    if not path.exists():
+        return 0
+    metadata = pq.read_schema(path).metadata or {}
+    if metadata.get(VERSION_METADATA_KEY, b"").decode() != simplemma.__version__:
+        return 0
+    table = pq.read_table(path)
+    _table.update(zip(table.column('word').to_pylist(), table.column('lemma').to_pylist()))
+    # Lemmas cached before the preload may come from the previous table
+    lemmatize_word.cache_clear()
+    return table.num_rows
+
+
+def save_lemma_table(path, words: Optional[Iterable[str]] = None) -> int:
+    """
+    Writes the preloaded table plus the lemmas of `words` (e.g. a corpus vocabulary).
+
+    Returns:
+        int: Number of entries written.
+    """
+    path = Path(path)
+    entries = dict(_table)
+    if words is not None:
+        words = [word for word in set(words) if word not in entries]
+        entries.update(zip(words, lemmatize_words(words)))
+    table = pa.table({'word': pa.array(list(entries), pa.string()), 'lemma': pa.array(list(entries.values()), pa.string())})
+    table = table.sort_by('word').replace_schema_metadata({VERSION_METADATA_KEY: simplemma.__version__})
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+    return table.num_rows
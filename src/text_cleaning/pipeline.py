@@ -1,59 +1,465 @@
+import os
+import sys
+import time
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Callable, Dict, List, Optional
+import hashlib
 import logging
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    from src.parquet.dataset import input_hash_column
+except ImportError:  # imported as text_cleaning with src/ on the path
+    from parquet.dataset import input_hash_column
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Rows per batch of the streaming mode
+STREAM_ROWS = 50_000
+
+# Default version of a step. Stored in the input hashes, changing it recomputes every row.
+STEP_VERSION = "1"
+
 def apply_processing_step(
     parquet_path: str,
     input_col: str,
     output_col: str,
     step_func: Callable[[str], str],
     overwrite: bool = False,
+    batch_size: int = 1000,
+    n_process: int = 1,
+    version: str = STEP_VERSION,
+    cache=None,
     **kwargs
 ):
     """
     Applies a processing step to a column in a parquet file and saves the result to a new column.
+    Only rows whose output is missing or stale are computed, see `run_processing_steps`.
     
     Args:
         parquet_path (str): Path to the parquet file.
         input_col (str): Name of the input column.
         output_col (str): Name of the output column.
         step_func (Callable): Function to apply to each element of the input column.
-        overwrite (bool): Whether to overwrite the output column if it already exists.
+        overwrite (bool): Whether to recompute every row of the output column.
+        batch_size (int): Texts per batch, for steps with a batch form (`step_func.batch`).
+        n_process (int): Processes used by the batch form.
+        version (str): Version of the step, bump it when its output changes.
+        cache (CleaningCache, optional): Persistent cache of the cleaned texts.
         **kwargs: Additional arguments to pass to step_func (not used currently but good for extensibility).
     """
-    path = Path(parquet_path)
-    if not path.exists():
-        raise FileNotFoundError(f"File not found: {path}")
-        
-    logging.info(f"Reading {path}...")
-    df = pd.read_parquet(path)
+    step = {"name": f"{input_col} -> {output_col}", "input_col": input_col, "output_col": output_col,
+            "func": step_func, "version": version}
+    run_processing_steps(parquet_path, [step], overwrite=overwrite, batch_size=batch_size, n_process=n_process,
+                         cache=cache)
+
+
+def _compute(values: List[str], step_func: Callable, batch_size: int, n_process: int, executor=None,
+             label: Optional[str] = None):
+    """
+    Runs a step on a list of texts: over the executor's process pool, with the step's batch
+    form (`step_func.batch`, e.g. the nlp.pipe versions of the spaCy steps) or row by row.
+    """
+    if executor is not None:
+        return executor.map(step_func, values, label=label)
+    batch_func = getattr(step_func, 'batch', None)
+    if batch_func is not None:
+        return batch_func(values, batch_size=batch_size, n_process=n_process)
+    return [step_func(text) for text in values]
+
+
+def _apply_step(texts: pd.Series, step_func: Callable[[str], str], batch_size: int = 1000,
+                n_process: int = 1, executor=None, label: Optional[str] = None, cache=None,
+                cache_key: Optional[str] = None) -> pd.Series:
+    """
+    Applies a step to a column. NaNs give empty strings without calling the step.
     
+    Steps with a batch form get the whole column at once, with the same output as the
+    row-wise apply. With an `executor` (`text_cleaning.executor.ShardedExecutor`), the
+    column is cleaned in shards over its process pool. With a `cache`
+    (`text_cleaning.cache.CleaningCache`), only the texts it misses are cleaned.
+    """
+    present = texts.notna()
+    values = [str(text) for text in texts[present]]
+
+    def compute(values):
+        return _compute(values, step_func, batch_size, n_process, executor, label)
+
+    results = cache.apply(cache_key, values, compute) if cache is not None else compute(values)
+    output = pd.Series("", index=texts.index, dtype=object)
+    output[present] = results
+    return output
+
+
+def _apply_multi_step(texts: pd.Series, step_func: Callable[[str], Dict[str, str]], output_cols: List[str],
+                      batch_size: int = 1000, n_process: int = 1, executor=None,
+                      label: Optional[str] = None, cache=None, cache_key: Optional[str] = None) -> Dict[str, pd.Series]:
+    """
+    Applies a step producing several columns at once (e.g. `fused_cleaning`), which
+    returns a dict of column -> value per text, or of column -> list for the batch form.
+    """
+    present = texts.notna()
+    values = [str(text) for text in texts[present]]
+
+    def compute(values):
+        outputs = _compute(values, step_func, batch_size, n_process, executor, label)
+        if isinstance(outputs, list):
+            outputs = {col: [result[col] for result in outputs] for col in output_cols}
+        return {col: outputs[col] for col in output_cols}
+
+    if not values:
+        outputs = {}
+    elif cache is not None:
+        outputs = cache.apply(cache_key, values, compute)
+    else:
+        outputs = compute(values)
+    columns = {}
+    for col in output_cols:
+        columns[col] = pd.Series("", index=texts.index, dtype=object)
+        columns[col][present] = outputs.get(col, [])
+    return columns
+
+
+def _function_name(func: Callable) -> str:
+    """
+    Module-qualified name of a function, e.g. "text_cleaning.cleaner.fused_cleaning".
+    The `src.` prefix is dropped so the name does not depend on how the module was imported.
+    """
+    name = getattr(func, '__qualname__', getattr(func, '__name__', repr(func)))
+    module = getattr(func, '__module__', None)
+    if module is None:
+        # Methods of builtin types (str.lower)
+        module = getattr(getattr(func, '__objclass__', None), '__module__', None)
+    if module is None:
+        return name
+    if module.startswith('src.'):
+        module = module[len('src.'):]
+    return f"{module}.{name}"
+
+
+def is_cacheable(func: Callable) -> bool:
+    """
+    False for lambdas and functions defined inside another function: their names do not
+    identify them, two of them could share a key in the cleaning cache.
+    """
+    name = getattr(func, '__qualname__', getattr(func, '__name__', ''))
+    return '<lambda>' not in name and '<locals>' not in name
+
+
+def step_name(step: Dict) -> str:
+    """
+    Identifies a step function and version in the input hashes and the cleaning cache,
+    e.g. "text_cleaning.cleaner.fused_cleaning:1".
+    """
+    return f"{_function_name(step['func'])}:{step.get('version', STEP_VERSION)}"
+
+
+def input_hashes(texts: pd.Series, step: Dict) -> pd.Series:
+    """
+    Hash of each input cell (NaN as "") keyed by the step function and version, so a new
+    input or a new version of the step both change the hash of the row. Steps run by
+    `text_cleaning.dag` also key it on the versions of their upstream steps ('upstream').
+    """
+    key_source = step_name(step)
+    if step.get('upstream'):
+        key_source += f"|{step['upstream']}"
+    key = hashlib.md5(key_source.encode()).hexdigest()[:16]
+    values = texts.fillna("").astype(str)
+    return pd.util.hash_pandas_object(values, index=False, hash_key=key)
+
+
+def _stale_rows(df: pd.DataFrame, output_cols: List[str], hashes: pd.Series) -> pd.Series:
+    """
+    Rows to recompute: an output or its hash is missing, or the hash differs.
+    Columns written before hashes were stored are trusted where they have a value.
+    """
+    stale = pd.Series(False, index=df.index)
+    for col in output_cols:
+        hash_col = input_hash_column(col)
+        if col not in df.columns:
+            return pd.Series(True, index=df.index)
+        stale |= df[col].isna()
+        if hash_col in df.columns:
+            stale |= df[hash_col].isna() | (df[hash_col] != hashes)
+    return stale
+
+
+def _output_columns(step: Dict) -> List[str]:
+    return step.get('output_cols', [step.get('output_col')])
+
+
+def _peak_memory_mb() -> Optional[float]:
+    """
+    Peak resident memory of the process so far, None where `resource` is missing (Windows).
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+def _run_step(df: pd.DataFrame, step: Dict, path: Path, overwrite: bool, batch_size: int, n_process: int,
+              executor=None, cache=None):
+    """
+    Computes the stale rows of one step without modifying `df`, so that independent
+    steps can run at the same time. `_update_frame` then writes the result.
+
+    Returns:
+        tuple: (report entry, update passed to `_update_frame`)
+    """
+    input_col = step['input_col']
+    output_cols = _output_columns(step)
     if input_col not in df.columns:
         raise ValueError(f"Input column '{input_col}' not found in {path}. Available columns: {df.columns.tolist()}")
-        
-    if output_col in df.columns and not overwrite:
-        logging.info(f"Column '{output_col}' already exists. Skipping. Set overwrite=True to force update.")
-        return
 
-    logging.info(f"Applying processing step: {input_col} -> {output_col}")
+    start = time.perf_counter()
+    hashes = input_hashes(df[input_col], step)
+    stale = pd.Series(True, index=df.index) if overwrite else _stale_rows(df, output_cols, hashes)
+    n_stale = int(stale.sum())
+    entry = {"name": step['name'], "rows": n_stale, "reused": len(df) - n_stale, "recomputed": n_stale, "tokens": 0}
+
+    outputs = {}
+    if n_stale:
+        logging.info(f"--- {step['name']}: {input_col} -> {', '.join(output_cols)} ({n_stale} of {len(df)} rows) ---")
+        if cache is not None and not is_cacheable(step['func']):
+            logging.warning(f"{step['name']}: lambdas and local functions are not cached, use a module-level function")
+            cache = None
+        texts = df.loc[stale, input_col]
+        options = {"executor": executor, "label": f"{path.name}: {step['name']}", "cache": cache,
+                   "cache_key": step_name(step)}
+        if 'output_cols' in step:
+            outputs = _apply_multi_step(texts, step['func'], output_cols, batch_size, n_process, **options)
+        else:
+            outputs = {output_cols[0]: _apply_step(texts, step['func'], batch_size, n_process, **options)}
+        if cache is not None:
+            entry["cache_hits"] = cache.last_hits
+        entry["tokens"] = int(texts.dropna().astype(str).str.split().str.len().sum())
+    else:
+        logging.info(f"Column(s) {output_cols} up to date. Skipping. Set overwrite=True to force update.")
+
+    entry.update({"seconds": time.perf_counter() - start, "skipped": n_stale == 0})
+    return entry, {"output_cols": output_cols, "stale": stale, "outputs": outputs, "hashes": hashes}
+
+
+def _update_frame(df: pd.DataFrame, update: Dict) -> bool:
+    """
+    Writes the outputs and input hashes computed by `_run_step` into `df`.
+
+    Returns:
+        bool: Whether a column changed.
+    """
+    stale = update['stale']
+    for col, values in update['outputs'].items():
+        if col not in df.columns:
+            df[col] = pd.Series(None, index=df.index, dtype=object)
+        df.loc[stale, col] = values
+    changed = False
+    recomputed = bool(stale.any())
+    for col in update['output_cols']:
+        hash_col = input_hash_column(col)
+        if hash_col not in df.columns or recomputed:
+            df[hash_col] = update['hashes']
+            changed = True
+    return changed
+
+
+def _process_frame(df: pd.DataFrame, steps: List[Dict], path: Path, overwrite: bool, batch_size: int,
+                   n_process: int, executor=None, cache=None):
+    """
+    Runs the steps on the rows of `df` in place, only on the stale rows (see `run_processing_steps`).
+
+    Returns:
+        tuple: (report entry of each step, whether a column changed)
+    """
+    entries = []
+    changed = False
+    for step in steps:
+        entry, update = _run_step(df, step, path, overwrite, batch_size, n_process, executor, cache)
+        changed |= _update_frame(df, update)
+        entries.append(entry)
+    return entries, changed
+
+
+def _write_frame(df: pd.DataFrame, path: Path) -> Dict:
+    """
+    Replaces the file by `df` through a temporary file swapped in atomically.
+
+    Returns:
+        dict: Report entry of the write.
+    """
+    logging.info(f"Saving updated parquet at {path}...")
+    start = time.perf_counter()
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return {"name": "write", "rows": len(df), "seconds": time.perf_counter() - start, "skipped": False}
+
+
+def _log_report(report: List[Dict]):
+    """
+    Logs the report of a run, after adding the peak memory of the process so far to its
+    first entry ('read' or 'stream') as 'process_peak_mb'. It is the peak of the whole
+    process (`ru_maxrss`), not of a step: steps and files run concurrently.
+    """
+    report[0]['process_peak_mb'] = _peak_memory_mb()
+    for entry in report:
+        if entry['skipped']:
+            logging.info(f"{entry['name']}: skipped, {entry['reused']} rows reused")
+        else:
+            rate = entry['rows'] / entry['seconds'] if entry['seconds'] else 0.0
+            details = f", {entry['reused']} reused" if 'reused' in entry else ""
+            if 'cache_hits' in entry:
+                details += f", {entry['cache_hits']} from cache"
+            if entry.get('tokens'):
+                details += f", {entry['tokens'] / entry['seconds'] if entry['seconds'] else 0.0:.0f} tokens/sec"
+            logging.info(f"{entry['name']}: {entry['rows']} rows in {entry['seconds']:.2f}s ({rate:.0f} rows/sec){details}")
+    if report[0]['process_peak_mb'] is not None:
+        logging.info(f"process peak memory: {report[0]['process_peak_mb']:.0f} MB")
+
+
+def run_processing_steps(parquet_path: str, steps: List[Dict], overwrite: bool = False, batch_size: int = 1000,
+                         n_process: int = 1, executor=None, cache=None, stream: bool = False,
+                         stream_rows: int = STREAM_ROWS) -> List[Dict]:
+    """
+    Applies a chain of processing steps to a parquet file with a single read and a single write.
     
-    # Apply the function. 
-    # We use basic apply for simplicity. For massive datasets, nlp.pipe in batches would be faster,
-    # but our step functions (like basic_normalization) assume single string input.
-    # Given the requirements, this loop is acceptable.
-    # We handlle NaNs by treating them as empty strings.
+    Each step reads its input column from the output of the previous steps in memory.
+    Every derived column is written at once, through a temporary file swapped in
+    atomically, so an interrupted run leaves the file untouched.
+
+    Runs are incremental: next to each output column, `<column>__input_hash` stores the
+    hash of the input cell and of the step version (`step['version']`). Only rows whose
+    output is missing or whose hash changed are recomputed, e.g. the transcriptions
+    appended since the last run, or every row after a version bump. A recomputed row
+    changes the input of the next steps, which recompute it in turn.
+
+    With `stream=True`, the file is read and written `stream_rows` rows at a time (see
+    `stream_processing_steps`), memory no longer grows with the size of the corpus.
     
-    # Helper to apply safely
-    def safe_apply(text):
-        if pd.isna(text):
-            return ""
-        return step_func(str(text))
+    Args:
+        parquet_path (str): Path to the parquet file.
+        steps (list): Steps as dicts with 'name', 'input_col', 'output_col' and 'func' keys. A step
+                      producing several columns gives 'output_cols' instead of 'output_col'.
+                      An optional 'version' defaults to `STEP_VERSION`.
+        overwrite (bool): Whether to recompute every row, even up-to-date ones.
+        batch_size (int): Texts per batch, for steps with a batch form.
+        n_process (int): Processes used by the batch forms.
+        executor (ShardedExecutor, optional): Process pool cleaning the rows in shards.
+        cache (CleaningCache, optional): Outputs already computed for the same texts, by any
+                                         file or run, are read from it instead of recomputed.
+        stream (bool): Process the file in batches of `stream_rows` rows.
+        stream_rows (int): Rows per batch in streaming mode.
         
-    df[output_col] = df[input_col].apply(safe_apply)
-    
-    logging.info(f"Saving updated parquet at {path}...")
-    df.to_parquet(path, index=False)
-    logging.info("Done.")
+    Returns:
+        list: Timing of each step, dicts with 'name', 'rows', 'seconds' and 'skipped'. Steps also
+              report the number of 'reused' and 'recomputed' rows ('rows' is the recomputed ones),
+              the whitespace 'tokens' of their recomputed inputs. The first entry holds the peak
+              memory of the process at the end of the run, 'process_peak_mb'.
+    """
+    if stream:
+        return stream_processing_steps(parquet_path, steps, overwrite=overwrite, batch_size=batch_size,
+                                       n_process=n_process, executor=executor, cache=cache, stream_rows=stream_rows)
+
+    path = Path(parquet_path)
+    if not path.exists():
+        raise FileNotFoundError(f"File not found: {path}")
+
+    logging.info(f"Reading {path}...")
+    start = time.perf_counter()
+    df = pd.read_parquet(path)
+    report = [{"name": "read", "rows": len(df), "seconds": time.perf_counter() - start, "skipped": False}]
+
+    entries, changed = _process_frame(df, steps, path, overwrite, batch_size, n_process, executor, cache)
+    report += entries
+
+    if changed:
+        report.append(_write_frame(df, path))
+
+    _log_report(report)
+    return report
+
+
+def _stream_schema(schema: pa.Schema, steps: List[Dict]) -> pa.Schema:
+    """
+    Schema of the streamed output: the input columns, then the new text and hash columns.
+    """
+    schema = schema.remove_metadata()
+    for step in steps:
+        for col in _output_columns(step):
+            for name, type_ in [(col, pa.string()), (input_hash_column(col), pa.uint64())]:
+                if name not in schema.names:
+                    schema = schema.append(pa.field(name, type_))
+    return schema
+
+
+def stream_processing_steps(parquet_path: str, steps: List[Dict], overwrite: bool = False, batch_size: int = 1000,
+                            n_process: int = 1, executor=None, cache=None,
+                            stream_rows: int = STREAM_ROWS) -> List[Dict]:
+    """
+    Streaming form of `run_processing_steps`, same output and arguments.
+
+    The file is read `stream_rows` rows at a time; each batch goes through the steps and
+    is appended to a new file by a `ParquetWriter`, swapped in atomically at the end.
+    Peak memory is bounded by one batch whatever the size of the corpus. When every row
+    was up to date, the new file is discarded and the original left untouched.
+
+    Returns:
+        list: Same report as `run_processing_steps`, summed over the batches.
+    """
+    path = Path(parquet_path)
+    if not path.exists():
+        raise FileNotFoundError(f"File not found: {path}")
+
+    parquet_file = pq.ParquetFile(path)
+    names = parquet_file.schema_arrow.names
+    available = set(names)
+    for step in steps:
+        if step['input_col'] not in available:
+            raise ValueError(f"Input column '{step['input_col']}' not found in {path}. Available columns: {names}")
+        available.update(_output_columns(step))
+    schema = _stream_schema(parquet_file.schema_arrow, steps)
+
+    logging.info(f"Streaming {path} ({parquet_file.metadata.num_rows} rows, {stream_rows} rows per batch)...")
+    totals = {}
+    rows = 0
+    changed = False
+    start = time.perf_counter()
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        with pq.ParquetWriter(tmp_path, schema) as writer:
+            for batch in parquet_file.iter_batches(batch_size=stream_rows):
+                df = batch.to_pandas()
+                entries, batch_changed = _process_frame(df, steps, path, overwrite, batch_size, n_process,
+                                                        executor, cache)
+                changed |= batch_changed
+                writer.write_table(pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False),
+                                   row_group_size=stream_rows)
+                rows += len(df)
+                for entry in entries:
+                    total = totals.setdefault(entry['name'], {"name": entry['name'], "rows": 0, "reused": 0,
+                                                              "recomputed": 0, "tokens": 0, "seconds": 0.0,
+                                                              "skipped": True})
+                    for key in ["rows", "reused", "recomputed", "tokens", "seconds"]:
+                        total[key] += entry[key]
+                    if 'cache_hits' in entry:
+                        total['cache_hits'] = total.get('cache_hits', 0) + entry['cache_hits']
+                    total['skipped'] &= entry['skipped']
+        if changed:
+            os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    report = [{"name": "stream", "rows": rows, "seconds": time.perf_counter() - start, "skipped": False,
+               "written": changed}]
+    report += list(totals.values())
+    _log_report(report)
+    return report
@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.app.bundle import (ANALYSIS_COLUMNS, build_bundle, is_bundle_current, prepare_speeches,  # noqa: E402
+                            read_bundle)
+from src.filtering_corpus.speech_corpus import SpeechCorpus  # noqa: E402
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    pd.DataFrame({
+        "id": [1, 2],
+        "title": ["Rally in Tulsa, OK - June 20, 2020", "Remarks in Paris - May 1, 2017"],
+        "date": ["June 20, 2020", "May 1, 2017"],
+        "categories": ['["Rally", "Campaign"]', None],
+    }).to_parquet(tmp_path / "speeches.parquet", index=False)
+    transcriptions = pd.DataFrame({"id": [1, 2, 3], "speech_id": [1, 1, 2], "text": ["Hello there.", "Bye.", "Bonjour."]})
+    for col in ANALYSIS_COLUMNS[1:]:
+        transcriptions[col] = transcriptions["text"].str.lower()
+    transcriptions.to_parquet(tmp_path / "transcriptions.parquet", index=False)
+    return tmp_path
+
+
+def test_bundle_matches_derived_columns(data_dir):
+    expected = prepare_speeches(SpeechCorpus(data_dir=str(data_dir)).get_full_speeches(ANALYSIS_COLUMNS))
+    build_bundle(data_dir)
+    assert is_bundle_current(data_dir)
+
+    df = read_bundle(data_dir)
+    assert df["categories"].tolist() == [["Rally", "Campaign"], ["Uncategorized"]]
+    assert df["state"].tolist()[0] == "OK" and pd.isna(df["state"].tolist()[1])
+    assert df["word_count_text"].tolist() == [3, 1]
+    for col in ["label", "campaign", "location"] + ANALYSIS_COLUMNS:
+        assert df[col].tolist() == expected[col].tolist()
+
+
+def test_bundle_is_stale_after_update(data_dir):
+    build_bundle(data_dir)
+    pd.DataFrame({"id": [4], "speech_id": [2], "text": ["Merci."]}).to_parquet(
+        data_dir / "transcriptions.parquet", index=False
+    )
+    assert not is_bundle_current(data_dir)
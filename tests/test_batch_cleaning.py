@@ -0,0 +1,38 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.text_cleaning.cleaner import (basic_normalization, basic_normalization_batch,
+                                       token_cleaning, token_cleaning_batch)
+from src.text_cleaning.pipeline import apply_processing_step
+
+TEXTS = [
+    '[Audience chants "USA"] Well, that was good timing, wasn\'t it? [Laughs] We had to get that right.',
+    "",
+    "[Applause]",
+    "Don't stop -- U.S.A. 100% e-mail, it's 3:00 p.m.",
+    "  Multiple   spaces\n\nand new lines  ",
+    "We're going to win, win, win. We'll win so much!",
+]
+
+
+@pytest.mark.parametrize("step, batch", [(basic_normalization, basic_normalization_batch),
+                                         (token_cleaning, token_cleaning_batch)])
+@pytest.mark.parametrize("batch_size", [1, 4, 1000])
+def test_batch_matches_row_wise(step, batch, batch_size):
+    assert batch(TEXTS, batch_size=batch_size) == [step(text) for text in TEXTS]
+
+
+def test_apply_processing_step_uses_batch_form(tmp_path):
+    path = tmp_path / "transcriptions.parquet"
+    pd.DataFrame({"id": range(len(TEXTS) + 1), "text": TEXTS + [None]}).to_parquet(path, index=False)
+    apply_processing_step(str(path), "text", "text_basic", basic_normalization, batch_size=2)
+    apply_processing_step(str(path), "text_basic", "text_no_stopwords", token_cleaning, batch_size=2)
+
+    df = pd.read_parquet(path)
+    assert df["text_basic"].tolist() == [basic_normalization(text) for text in TEXTS] + [""]
+    assert df["text_no_stopwords"].tolist() == [token_cleaning(text) for text in df["text_basic"]]
@@ -0,0 +1,131 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.text_cleaning import cleaner
+from src.text_cleaning.cache import CleaningCache
+from src.text_cleaning.cleaner import FUSED_COLUMNS, apply_cleaning_to_parquet, clean_docs, fused_cleaning
+from src.text_cleaning.pipeline import run_processing_steps, step_name
+
+TEXTS = ["Thank you very much.", "[Applause]", "Thank you very much.", "We will win, win, win!"]
+
+
+def test_apply_cleans_each_missing_text_once(tmp_path):
+    calls = []
+
+    def upper(values):
+        calls.append(list(values))
+        return [value.upper() for value in values]
+
+    with CleaningCache(tmp_path / "cache.sqlite") as cache:
+        assert cache.apply("upper:1", TEXTS, upper) == [text.upper() for text in TEXTS]
+        assert calls == [[TEXTS[0], TEXTS[1], TEXTS[3]]]
+        assert cache.info()["misses"] == 4
+
+    # Persisted across runs, keyed by cleaner and version
+    with CleaningCache(tmp_path / "cache.sqlite") as cache:
+        assert cache.apply("upper:1", TEXTS + ["New"], upper) == [text.upper() for text in TEXTS + ["New"]]
+        assert calls[1:] == [["New"]]
+        assert cache.stats["hits"] == 4
+        cache.apply("upper:2", TEXTS[:1], upper)
+        assert calls[2:] == [[TEXTS[0]]]
+
+
+def test_size_bounded_eviction(tmp_path):
+    with CleaningCache(tmp_path / "cache.sqlite", max_bytes=200) as cache:
+        texts = [f"text {i}" for i in range(50)]
+        cache.apply("upper:1", texts, lambda values: [value.upper() * 3 for value in values])
+        info = cache.info()
+        assert info["bytes"] <= 200
+        assert info["evicted"] > 0
+        # The most recent entries are kept
+        assert cache.get_many("upper:1", texts[-1:]) == [texts[-1].upper() * 3]
+
+
+def test_pipeline_run_from_cache(tmp_path):
+    step = {"name": "fused", "input_col": "text", "output_cols": FUSED_COLUMNS, "func": fused_cleaning}
+    frames = []
+    with CleaningCache(tmp_path / "cache.sqlite") as cache:
+        for name in ["transcriptions", "other_transcriptions"]:
+            path = tmp_path / f"{name}.parquet"
+            pd.DataFrame({"id": range(len(TEXTS) + 1), "text": TEXTS + [None]}).to_parquet(path, index=False)
+            report = run_processing_steps(str(path), [step], cache=cache)
+            frames.append(pd.read_parquet(path))
+        # Every distinct text of the second file was cleaned for the first one
+        assert report[1]["cache_hits"] == len(TEXTS)
+    pd.testing.assert_frame_equal(*frames)
+
+
+def test_apply_cleaning_to_parquet_with_cache(tmp_path):
+    path = tmp_path / "transcriptions.parquet"
+    pd.DataFrame({"id": range(len(TEXTS)), "text": TEXTS}).to_parquet(path, index=False)
+    with CleaningCache(tmp_path / "cache.sqlite") as cache:
+        apply_cleaning_to_parquet(str(path), "clean_v1", remove_brackets=True, cache=cache)
+        apply_cleaning_to_parquet(str(path), "clean_v1_no_lemma", remove_brackets=True, lemmatize=False, cache=cache)
+        # Other options, other outputs
+        assert cache.info()["hits"] == 0
+        apply_cleaning_to_parquet(str(path), "clean_v1", remove_brackets=True, overwrite=True, cache=cache)
+        assert cache.info()["hits"] == len(TEXTS)
+    df = pd.read_parquet(path)
+    assert df["clean_v1"].tolist() == clean_docs(TEXTS, remove_brackets=True)
+    assert df["clean_v1_no_lemma"].tolist() == clean_docs(TEXTS, remove_brackets=True, lemmatize=False)
+
+
+def test_apply_cleaning_to_parquet_streaming(tmp_path):
+    texts = TEXTS * 5 + [None]
+    paths = {}
+    for name, stream in [("memory", False), ("stream", True)]:
+        paths[name] = tmp_path / f"{name}.parquet"
+        pd.DataFrame({"id": range(len(texts)), "text": texts}).to_parquet(paths[name], index=False)
+        apply_cleaning_to_parquet(str(paths[name]), "clean_v1", remove_brackets=True, stream=stream, stream_rows=6)
+    pd.testing.assert_frame_equal(pd.read_parquet(paths["stream"]), pd.read_parquet(paths["memory"]))
+
+
+def test_apply_cleaning_to_parquet_streaming_failure(tmp_path, monkeypatch):
+    path = tmp_path / "transcriptions.parquet"
+    pd.DataFrame({"id": range(12), "text": TEXTS * 3}).to_parquet(path, index=False)
+    before = path.read_bytes()
+    batches = []
+
+    def failing(texts, **options):
+        # The second batch fails, after the first one was written
+        batches.append(texts)
+        if len(batches) == 2:
+            raise RuntimeError("out of memory")
+        return texts
+
+    monkeypatch.setattr(cleaner, "clean_docs", failing)
+    with pytest.raises(RuntimeError):
+        apply_cleaning_to_parquet(str(path), "clean_v1", stream=True, stream_rows=6)
+    assert path.read_bytes() == before
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def upper(text):
+    return text.upper()
+
+
+def test_cache_key_is_module_qualified():
+    assert step_name({"func": fused_cleaning, "version": "1"}) == "text_cleaning.cleaner.fused_cleaning:1"
+    assert step_name({"func": str.lower}) == "builtins.str.lower:1"
+    # Same name, another module
+    other = type(upper)(upper.__code__, {}, "upper")
+    other.__module__ = "other_module"
+    assert step_name({"func": upper}) != step_name({"func": other})
+
+
+def test_lambdas_are_not_cached(tmp_path):
+    path = tmp_path / "transcriptions.parquet"
+    pd.DataFrame({"id": range(len(TEXTS)), "text": TEXTS}).to_parquet(path, index=False)
+    with CleaningCache(tmp_path / "cache.sqlite") as cache:
+        steps = [{"name": "upper", "input_col": "text", "output_col": "text_upper", "func": lambda text: text.upper()},
+                 {"name": "lower", "input_col": "text", "output_col": "text_lower", "func": str.lower}]
+        report = run_processing_steps(str(path), steps, cache=cache)
+        assert "cache_hits" not in report[1]
+        assert cache.info()["misses"] == len(TEXTS)
+    df = pd.read_parquet(path)
+    assert df["text_upper"].tolist() == [text.upper() for text in TEXTS]
@@ -0,0 +1,127 @@
+import functools
+import sys
+import threading
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.text_cleaning.dag import CleaningDAG, Step  # noqa: E402
+from src.text_cleaning.pipeline import run_processing_steps  # noqa: E402
+
+
+def upper(text):
+    return text.upper()
+
+
+def reverse(text):
+    return text[::-1]
+
+
+def make_steps(lower_version="1", upper_func=upper, reverse_func=reverse):
+    # text -> text_basic, then two independent branches on text_basic
+    return [
+        Step("Upper", upper_func, "text_basic", ["text_no_stopwords"]),
+        Step("Lower", str.lower, "text", ["text_basic"], lower_version),
+        Step("Reverse", reverse_func, "text_basic", ["text_lemmatized"]),
+    ]
+
+
+@pytest.fixture
+def parquet_path(tmp_path):
+    path = tmp_path / "transcriptions.parquet"
+    pd.DataFrame({"id": [1, 2, 3], "text": ["We Will Win", None, "Make It Great"]}).to_parquet(path, index=False)
+    return path
+
+
+def counting(func, calls):
+    # Same qualified name as `func`, so the step keeps its input hashes
+    @functools.wraps(func)
+    def step(text):
+        calls.append(text)
+        return func(text)
+    return step
+
+
+def test_order_and_output_match_sequential_run(parquet_path, tmp_path):
+    dag = CleaningDAG(make_steps())
+    assert dag.order == ["Lower", "Upper", "Reverse"]
+    assert dag.upstream("Reverse") == ["Lower"]
+
+    sequential_path = tmp_path / "sequential.parquet"
+    pd.read_parquet(parquet_path).to_parquet(sequential_path, index=False)
+    run_processing_steps(str(sequential_path), dag.step_dicts())
+
+    report = dag.run_file(parquet_path)
+    pd.testing.assert_frame_equal(pd.read_parquet(parquet_path), pd.read_parquet(sequential_path), check_like=True)
+    assert pd.read_parquet(parquet_path)["text_lemmatized"].tolist() == ["niw lliw ew", "", "taerg ti ekam"]
+    assert [entry["name"] for entry in report] == ["read", "Lower", "Upper", "Reverse", "write"]
+
+    entry = report[1]
+    assert entry["tokens"] == 6
+    assert set(entry) >= {"rows", "seconds"}
+    # Process-wide, reported once per run
+    assert "process_peak_mb" in report[0]
+    assert not any("peak_mb" in entry or "process_peak_mb" in entry for entry in report[1:])
+
+
+def test_unchanged_steps_are_skipped(parquet_path):
+    CleaningDAG(make_steps()).run_file(parquet_path)
+    before = parquet_path.stat().st_mtime_ns
+    report = CleaningDAG(make_steps()).run_file(parquet_path)
+    assert all(entry["skipped"] for entry in report[1:])
+    assert parquet_path.stat().st_mtime_ns == before
+
+
+def test_upstream_version_bump_recomputes_downstream(parquet_path):
+    CleaningDAG(make_steps()).run_file(parquet_path)
+    upper_calls, reverse_calls = [], []
+    steps = make_steps(lower_version="2", upper_func=counting(upper, upper_calls),
+                       reverse_func=counting(reverse, reverse_calls))
+    report = CleaningDAG(steps).run_file(parquet_path)
+    # Same output from the new Lower, but every downstream row is recomputed
+    assert [entry["rows"] for entry in report[1:4]] == [3, 3, 3]
+    assert len(upper_calls) == len(reverse_calls) == 3
+
+
+def test_downstream_version_bump_only_recomputes_that_step(parquet_path):
+    CleaningDAG(make_steps()).run_file(parquet_path)
+    steps = make_steps()
+    steps[2].version = "2"
+    report = CleaningDAG(steps).run_file(parquet_path)
+    assert [(entry["name"], entry["skipped"]) for entry in report[1:4]] == [
+        ("Lower", True), ("Upper", True), ("Reverse", False)
+    ]
+
+
+def test_independent_branches_run_in_parallel(parquet_path):
+    # Each branch waits for the other one: a sequential run would break the barrier
+    barrier = threading.Barrier(2, timeout=10)
+
+    def waiting(func):
+        @functools.wraps(func)
+        def step(text):
+            barrier.wait()
+            return func(text)
+        return step
+
+    steps = make_steps(upper_func=waiting(upper), reverse_func=waiting(reverse))
+    CleaningDAG(steps).run_file(parquet_path)
+    assert pd.read_parquet(parquet_path)["text_no_stopwords"].tolist() == ["WE WILL WIN", "", "MAKE IT GREAT"]
+
+
+def test_run_several_files(parquet_path, tmp_path):
+    other_path = tmp_path / "other_transcriptions.parquet"
+    pd.DataFrame({"id": [7], "text": ["Hello There"]}).to_parquet(other_path, index=False)
+    reports = CleaningDAG(make_steps()).run([parquet_path, other_path])
+    assert list(reports) == [str(parquet_path), str(other_path)]
+    assert pd.read_parquet(other_path)["text_basic"].tolist() == ["hello there"]
+
+
+def test_invalid_graphs():
+    with pytest.raises(ValueError, match="produced by both"):
+        CleaningDAG([Step("A", upper, "text", ["x"]), Step("B", reverse, "text", ["x"])])
+    with pytest.raises(ValueError, match="Cycle"):
+        CleaningDAG([Step("A", upper, "y", ["x"]), Step("B", reverse, "x", ["y"])])
@@ -0,0 +1,69 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+import spacy
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from rollcall.page_extractor import extract_speech_page
+from src.text_cleaning import cleaner
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "factbase"
+
+TEXTS = [
+    '[Audience chants "USA"] Well, that was good timing, wasn\'t it? [Laughs] We had to get that right.',
+    "",
+    "[Applause]",
+    "Don't stop -- U.S.A. 100% e-mail, it's 3:00 p.m. We cannot, we're gonna.",
+    "  Multiple   spaces\n\nand new lines  ",
+    "We're going to win, win, win. We'll win so much! The workers were running.",
+]
+
+
+def corpus():
+    texts = list(TEXTS)
+    for page_path in sorted(FIXTURES_DIR.glob("*.html")):
+        page = extract_speech_page(page_path.read_text(encoding="utf-8"))
+        texts += [text for _, text in page.candidate_transcriptions("Donald Trump")]
+    return texts
+
+
+def run_engine(engine, texts):
+    cleaner.set_engine(engine)
+    try:
+        basic = [cleaner.basic_normalization(text) for text in texts]
+        return {
+            "basic": basic,
+            "basic_batch": cleaner.basic_normalization_batch(texts, batch_size=2),
+            "no_stopwords": [cleaner.token_cleaning(text) for text in basic],
+            "fused": cleaner.fused_cleaning_batch(texts),
+            "clean_text": [cleaner.clean_text(text, remove_brackets=True) for text in texts],
+            "clean_docs": cleaner.clean_docs(texts, lemmatize=False),
+        }
+    finally:
+        cleaner.set_engine(cleaner.DEFAULT_ENGINE)
+
+
+def test_import_does_not_load_a_pipeline():
+    # In a fresh interpreter, the modules of this one already ran the cleaners
+    code = (
+        "from src.text_cleaning import cleaner\n"
+        "assert cleaner._pipelines == {}\n"
+        "assert cleaner.basic_normalization('Hello, World!') == 'hello world'\n"
+        "assert list(cleaner._pipelines) == ['tokenizer']\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).parent.parent, check=True)
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        cleaner.set_engine("gpu")
+
+
+@pytest.mark.skipif(not spacy.util.is_package(cleaner.MODEL_NAME), reason="en_core_web_sm is not installed")
+def test_tokenizer_engine_matches_model():
+    texts = corpus()
+    assert run_engine("tokenizer", texts) == run_engine("model", texts)
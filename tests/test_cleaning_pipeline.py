@@ -0,0 +1,150 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.text_cleaning.pipeline import apply_processing_step, run_processing_steps  # noqa: E402
+
+STEPS = [
+    {"name": "Lower", "input_col": "text", "output_col": "text_basic", "func": str.lower},
+    {"name": "No short words", "input_col": "text_basic", "output_col": "text_no_stopwords",
+     "func": lambda text: " ".join(word for word in text.split() if len(word) > 2)},
+    {"name": "Reverse", "input_col": "text_no_stopwords", "output_col": "text_lemmatized", "func": lambda text: text[::-1]},
+]
+
+
+@pytest.fixture
+def parquet_path(tmp_path):
+    path = tmp_path / "transcriptions.parquet"
+    pd.DataFrame({"id": [1, 2, 3], "text": ["We Will Win", None, "Make It Great"]}).to_parquet(path, index=False)
+    return path
+
+
+def test_fused_run_matches_stepwise(parquet_path, tmp_path):
+    stepwise_path = tmp_path / "stepwise.parquet"
+    pd.read_parquet(parquet_path).to_parquet(stepwise_path, index=False)
+    for step in STEPS:
+        apply_processing_step(str(stepwise_path), step["input_col"], step["output_col"], step["func"])
+
+    report = run_processing_steps(str(parquet_path), STEPS)
+    pd.testing.assert_frame_equal(pd.read_parquet(parquet_path), pd.read_parquet(stepwise_path))
+    assert [entry["name"] for entry in report] == ["read", "Lower", "No short words", "Reverse", "write"]
+    assert all(entry["rows"] == 3 for entry in report)
+
+
+def test_single_read_and_write(parquet_path, monkeypatch):
+    calls = {"read": 0, "write": 0}
+    read_parquet, to_parquet = pd.read_parquet, pd.DataFrame.to_parquet
+
+    def counting_read(*args, **kwargs):
+        calls["read"] += 1
+        return read_parquet(*args, **kwargs)
+
+    def counting_write(self, *args, **kwargs):
+        calls["write"] += 1
+        return to_parquet(self, *args, **kwargs)
+
+    monkeypatch.setattr(pd, "read_parquet", counting_read)
+    monkeypatch.setattr(pd.DataFrame, "to_parquet", counting_write)
+    run_processing_steps(str(parquet_path), STEPS)
+    assert calls == {"read": 1, "write": 1}
+
+
+def test_existing_columns_are_skipped(parquet_path):
+    run_processing_steps(str(parquet_path), STEPS[:1])
+    before = parquet_path.stat().st_mtime_ns
+    report = run_processing_steps(str(parquet_path), STEPS[:1])
+    assert report[-1]["skipped"]
+    assert parquet_path.stat().st_mtime_ns == before
+
+    with pytest.raises(ValueError):
+        run_processing_steps(str(parquet_path), STEPS[2:])
+
+
+def counting_steps(calls):
+    def lower(text):
+        calls.append(text)
+        return text.lower()
+    return [{"name": "Lower", "input_col": "text", "output_col": "text_basic", "func": lower},
+            {"name": "Reverse", "input_col": "text_basic", "output_col": "text_lemmatized", "func": lambda text: text[::-1]}]
+
+
+def test_only_new_and_changed_rows_are_recomputed(parquet_path):
+    calls = []
+    run_processing_steps(str(parquet_path), counting_steps(calls))
+    # The null text gives "" without a call
+    assert len(calls) == 2
+
+    df = pd.read_parquet(parquet_path)
+    df.loc[df["id"] == 3, "text"] = "Make It Greater"
+    df = pd.concat([df, pd.DataFrame({"id": [4], "text": ["New Speech"]})], ignore_index=True)
+    df.to_parquet(parquet_path, index=False)
+
+    calls.clear()
+    report = run_processing_steps(str(parquet_path), counting_steps(calls))
+    assert sorted(calls) == ["Make It Greater", "New Speech"]
+    assert [(entry["reused"], entry["recomputed"]) for entry in report[1:3]] == [(2, 2), (2, 2)]
+
+    # Same result as a full run
+    df = pd.read_parquet(parquet_path)
+    fresh_path = parquet_path.with_name("fresh.parquet")
+    df[["id", "text"]].to_parquet(fresh_path, index=False)
+    run_processing_steps(str(fresh_path), counting_steps([]))
+    pd.testing.assert_frame_equal(pd.read_parquet(fresh_path), df)
+
+
+def test_version_bump_recomputes_every_row(parquet_path):
+    calls = []
+    run_processing_steps(str(parquet_path), counting_steps(calls))
+    steps = counting_steps(calls)
+    steps[0]["version"] = "2"
+    calls.clear()
+    report = run_processing_steps(str(parquet_path), steps)
+    assert report[1]["recomputed"] == 3
+    # Same outputs, so the next step has nothing to redo
+    assert report[2]["skipped"]
+
+
+def test_columns_without_hashes_are_trusted(parquet_path):
+    df = pd.read_parquet(parquet_path)
+    df["text_basic"] = ["kept", None, "kept"]
+    df.to_parquet(parquet_path, index=False)
+
+    calls = []
+    report = run_processing_steps(str(parquet_path), counting_steps(calls)[:1])
+    assert (report[1]["reused"], report[1]["recomputed"]) == (2, 1)
+    assert pd.read_parquet(parquet_path)["text_basic"].tolist() == ["kept", "", "kept"]
+
+
+def test_streaming_matches_in_memory(tmp_path, monkeypatch):
+    texts = [f"Speech {i} We Will Win" if i % 7 else None for i in range(50)]
+    paths = {}
+    for name in ["memory", "stream"]:
+        paths[name] = tmp_path / f"{name}.parquet"
+        pd.DataFrame({"id": range(50), "text": texts}).to_parquet(paths[name], index=False, row_group_size=10)
+
+    batches = []
+    iter_batches = pq.ParquetFile.iter_batches
+
+    def counting_batches(self, *args, **kwargs):
+        for batch in iter_batches(self, *args, **kwargs):
+            batches.append(batch.num_rows)
+            yield batch
+
+    monkeypatch.setattr(pq.ParquetFile, "iter_batches", counting_batches)
+    run_processing_steps(str(paths["memory"]), STEPS)
+    report = run_processing_steps(str(paths["stream"]), STEPS, stream=True, stream_rows=16)
+    assert batches == [16, 16, 16, 2]
+    assert [entry["recomputed"] for entry in report[1:]] == [50, 50, 50]
+    pd.testing.assert_frame_equal(pd.read_parquet(paths["stream"]), pd.read_parquet(paths["memory"]))
+
+    # Up to date: nothing recomputed and the file is left untouched
+    before = paths["stream"].stat().st_mtime_ns
+    report = run_processing_steps(str(paths["stream"]), STEPS, stream=True, stream_rows=16)
+    assert all(entry["skipped"] for entry in report[1:])
+    assert paths["stream"].stat().st_mtime_ns == before
+    assert not list(tmp_path.glob(".*.tmp"))
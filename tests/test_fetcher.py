@@ -0,0 +1,158 @@
+import sys
+import threading
+import time
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from rollcall.fetcher import PageFetcher
+from rollcall.speech_decomposer import get_title, get_date, get_candidate_transcriptions
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "factbase"
+PAGE = "trump-speech-rally-tulsa-oklahoma-june-20-2020.html"
+
+
+class FlakyHandler(SimpleHTTPRequestHandler):
+    """Serves the saved factbase pages, answering 503 to the first requests of /flaky/ paths."""
+    failures_left = {}
+
+    def do_GET(self):
+        if self.path.startswith("/flaky/"):
+            remaining = self.failures_left.get(self.path, 2)
+            if remaining > 0:
+                self.failures_left[self.path] = remaining - 1
+                self.send_error(503)
+                return
+            self.path = self.path[len("/flaky"):]
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def factbase_server():
+    handler = partial(FlakyHandler, directory=str(FIXTURES_DIR))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    FlakyHandler.failures_left = {}
+
+
+def test_soup_all_feeds_decomposer(factbase_server):
+    fetcher = PageFetcher(max_workers=4, min_interval=0)
+    urls = [f"{factbase_server}/{PAGE}?copy={i}" for i in range(10)]
+
+    results = dict(fetcher.soup_all(urls))
+
+    assert set(results) == set(urls)
+    for soup in results.values():
+        assert get_title(soup) == "Speech: Donald Trump Holds a Campaign Rally in Tulsa, Oklahoma"
+        assert get_date(soup) == "June 20, 2020"
+        assert len(get_candidate_transcriptions(soup)) == 3
+
+
+def test_retries_with_backoff(factbase_server):
+    fetcher = PageFetcher(max_workers=1, max_retries=3, backoff=0.01, min_interval=0)
+    html = fetcher.fetch(f"{factbase_server}/flaky/{PAGE}")
+    assert "Tulsa, Oklahoma" in html
+
+
+def test_failed_url_does_not_stop_others(factbase_server):
+    fetcher = PageFetcher(max_workers=2, max_retries=1, backoff=0.01, min_interval=0)
+    urls = [f"{factbase_server}/{PAGE}", f"{factbase_server}/missing.html"]
+
+    results = {url: (html, error) for url, html, error in fetcher.fetch_all(urls)}
+
+    assert results[urls[0]][1] is None
+    assert results[urls[1]][0] is None
+    assert results[urls[1]][1] is not None
+
+
+def test_rate_limit_spaces_requests_per_host(factbase_server):
+    fetcher = PageFetcher(max_workers=4, min_interval=0.05)
+    start = time.monotonic()
+    list(fetcher.fetch_all([f"{factbase_server}/{PAGE}?copy={i}" for i in range(5)]))
+    # 5 requests to the same host need at least 4 intervals
+    assert time.monotonic() - start >= 0.2
+
+
+def test_cache_revalidates_with_last_modified(factbase_server, tmp_path):
+    from rollcall.page_cache import PageCache
+    cache = PageCache(tmp_path / "cache")
+    fetcher = PageFetcher(max_workers=1, min_interval=0, cache=cache)
+    url = f"{factbase_server}/{PAGE}"
+
+    first = fetcher.fetch(url)
+    assert cache.validators(url)["If-Modified-Since"]
+
+    # The stand-in server answers 304 to the conditional request, the page comes from disk
+    resp = fetcher.get(url, headers=cache.validators(url))
+    assert resp.status_code == 304
+    assert fetcher.fetch(url) == first
+    assert cache.urls() == [url]
+
+
+def test_cache_is_content_addressed_and_bounded(tmp_path):
+    from rollcall.page_cache import PageCache
+    html = (FIXTURES_DIR / PAGE).read_text(encoding="utf-8")
+    cache = PageCache(tmp_path / "cache")
+    cache.put("https://example.com/a", html)
+    cache.put("https://example.com/b", html)
+    # Same content, stored once
+    assert len(list((tmp_path / "cache" / "objects").rglob("*.html.gz"))) == 1
+
+    one_page = cache.total_bytes()
+    cache.max_bytes = one_page + 10
+    cache.put("https://example.com/c", html + "<!-- changed -->")
+    # The least recently used URLs were evicted to fit the limit
+    assert cache.total_bytes() <= cache.max_bytes
+    assert cache.get("https://example.com/c") is not None
+    assert cache.get("https://example.com/a") is None
+
+
+def test_cache_get_treats_missing_objects_as_misses(tmp_path):
+    from rollcall.page_cache import PageCache
+    html = (FIXTURES_DIR / PAGE).read_text(encoding="utf-8")
+    cache = PageCache(tmp_path / "cache")
+    cache.put("https://example.com/a", html)
+    for path in (tmp_path / "cache" / "objects").rglob("*.html.gz"):
+        path.unlink()
+    assert cache.get("https://example.com/a") is None
+
+
+def test_cache_get_during_eviction(tmp_path):
+    from rollcall.page_cache import PageCache
+    html = (FIXTURES_DIR / PAGE).read_text(encoding="utf-8")
+    cache = PageCache(tmp_path / "cache")
+    cache.put("https://example.com/0", html)
+    # Room for about two pages: every put evicts the oldest one while readers run
+    cache.max_bytes = cache.total_bytes() * 2 + 10
+    errors = []
+    stop = threading.Event()
+
+    def read():
+        while not stop.is_set():
+            for i in range(20):
+                try:
+                    cache.get(f"https://example.com/{i}")
+                except Exception as e:
+                    errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for i in range(1, 20):
+        cache.put(f"https://example.com/{i}", html + f"<!-- {i} -->")
+    stop.set()
+    for reader in readers:
+        reader.join()
+    assert errors == []
+    assert cache.total_bytes() <= cache.max_bytes
@@ -0,0 +1,59 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.text_cleaning.cleaner import (FUSED_COLUMNS, basic_normalization, fused_cleaning,
+                                       fused_cleaning_batch, lemmatization, token_cleaning)
+from src.text_cleaning.pipeline import run_processing_steps
+
+TEXTS = [
+    '[Audience chants "USA"] Well, that was good timing, wasn\'t it? [Laughs] We had to get that right.',
+    "",
+    "[Applause]",
+    "Don't stop -- U.S.A. 100% e-mail, it's 3:00 p.m. We cannot, we're gonna.",
+    "  Multiple   spaces\n\nand new lines  ",
+    "We're going to win, win, win. We'll win so much! The workers were running.",
+]
+
+
+def stepwise(text):
+    basic = basic_normalization(text)
+    no_stopwords = token_cleaning(basic)
+    return {"text_basic": basic, "text_no_stopwords": no_stopwords, "text_lemmatized": lemmatization(no_stopwords)}
+
+
+@pytest.mark.parametrize("batch_size", [1, 4, 1000])
+def test_fused_matches_stepwise(batch_size):
+    fused = fused_cleaning_batch(TEXTS, batch_size=batch_size)
+    expected = [stepwise(text) for text in TEXTS]
+    for col in FUSED_COLUMNS:
+        assert fused[col] == [row[col] for row in expected]
+    assert fused_cleaning(TEXTS[0]) == expected[0]
+
+
+def test_fused_token_ids():
+    vocab = {}
+    fused = fused_cleaning_batch(TEXTS, vocab=vocab)
+    words = list(vocab)
+    for col in FUSED_COLUMNS:
+        assert [" ".join(words[i] for i in ids) for ids in fused[f"{col}_ids"]] == \
+               [" ".join(text.split()) for text in fused[col]]
+
+
+def test_run_processing_steps_with_fused_step(tmp_path):
+    path = tmp_path / "transcriptions.parquet"
+    pd.DataFrame({"id": range(len(TEXTS) + 1), "text": TEXTS + [None]}).to_parquet(path, index=False)
+    step = {"name": "fused", "input_col": "text", "output_cols": FUSED_COLUMNS, "func": fused_cleaning}
+    run_processing_steps(str(path), [step], batch_size=2)
+
+    df = pd.read_parquet(path)
+    expected = [stepwise(text) for text in TEXTS + [""]]
+    for col in FUSED_COLUMNS:
+        assert df[col].tolist() == [row[col] for row in expected]
+
+    report = run_processing_steps(str(path), [step])
+    assert report[1]["skipped"]
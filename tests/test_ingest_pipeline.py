@@ -0,0 +1,146 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from rollcall import ingest_pipeline  # noqa: E402
+from rollcall.ingest_pipeline import IngestPipeline  # noqa: E402
+from rollcall.speeches_db import init_db  # noqa: E402
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "factbase"
+PAGE = "trump-speech-rally-tulsa-oklahoma-june-20-2020.html"
+# Longest a run may take before it is considered hung
+TIMEOUT = 60
+
+
+class FakeFetcher:
+    """Serves the same saved page for every URL and counts the pages handed out."""
+
+    def __init__(self):
+        self.html = (FIXTURES_DIR / PAGE).read_text(encoding="utf-8")
+        self.fetched = 0
+
+    def fetch_all(self, urls):
+        for url in urls:
+            self.fetched += 1
+            yield url, self.html, None
+
+
+class FakeWriter:
+    def __init__(self, block=None, fail=False):
+        self.speeches = []
+        self.block = block
+        self.fail = fail
+
+    def add(self, speech_data, transcription_data_list):
+        if self.block is not None:
+            self.block.wait(TIMEOUT)
+        if self.fail:
+            raise RuntimeError("disk full")
+        self.speeches.append(speech_data)
+        return []
+
+    def flush(self):
+        return []
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "speeches.db"
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = init_db(db_path)
+    yield conn
+    conn.close()
+
+
+def make_pipeline(conn, writer, n_pages, **kwargs):
+    urls = [f"https://rollcall.com/factbase/trump/transcript/speech-{i}" for i in range(n_pages)]
+    conn.executemany("INSERT INTO Speeches (url, candidate) VALUES (?, 'trump')", [(url,) for url in urls])
+    conn.commit()
+    ids_by_url = dict(conn.execute("SELECT url, id FROM Speeches"))
+    fetcher = FakeFetcher()
+    pipeline = IngestPipeline(fetcher, conn, writer, "Trump", "Donald Trump", "Donald Trump",
+                              parse_workers=1, **kwargs)
+    return pipeline, fetcher, ids_by_url
+
+
+def run_in_thread(pipeline, ids_by_url, db_path):
+    # Runs the pipeline on another thread, so that a hang fails the test instead of blocking it
+    outcome = {}
+
+    def target():
+        # The write stage needs a connection of the thread running the pipeline
+        pipeline.conn = init_db(db_path)
+        try:
+            outcome["stats"] = pipeline.run(ids_by_url)
+        except BaseException as error:
+            outcome["error"] = error
+        finally:
+            pipeline.conn.close()
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread, outcome
+
+
+def test_every_page_is_written_to_its_speech(conn):
+    writer = FakeWriter()
+    pipeline, fetcher, ids_by_url = make_pipeline(conn, writer, 7, write_batch_size=3)
+    stats = pipeline.run(ids_by_url)
+
+    assert stats["fetch"].items == stats["parse"].items == stats["write"].items == 7
+    assert sorted(speech["id"] for speech in writer.speeches) == sorted(ids_by_url.values())
+    saved = dict(conn.execute("SELECT url, id FROM Speeches WHERE title IS NOT NULL"))
+    assert saved == ids_by_url
+
+
+def test_slow_writer_holds_back_fetching(conn, db_path):
+    release = threading.Event()
+    writer = FakeWriter(block=release)
+    pipeline, fetcher, ids_by_url = make_pipeline(conn, writer, 30, queue_size=1, write_batch_size=1)
+    thread, outcome = run_in_thread(pipeline, ids_by_url, db_path)
+
+    time.sleep(2)
+    # One page in each queue, two in the pool, one being written and one waiting on a full queue
+    assert fetcher.fetched <= 8
+    release.set()
+    thread.join(TIMEOUT)
+    assert not thread.is_alive()
+    assert "error" not in outcome
+    assert len(writer.speeches) == 30
+
+
+def test_parse_stage_failure_stops_the_pipeline(conn, db_path, monkeypatch):
+    class BrokenPool:
+        def __init__(self, max_workers):
+            raise OSError("cannot start workers")
+
+    monkeypatch.setattr(ingest_pipeline, "ProcessPoolExecutor", BrokenPool)
+    writer = FakeWriter()
+    pipeline, fetcher, ids_by_url = make_pipeline(conn, writer, 30, queue_size=2)
+    thread, outcome = run_in_thread(pipeline, ids_by_url, db_path)
+
+    thread.join(TIMEOUT)
+    assert not thread.is_alive()
+    assert isinstance(outcome["error"], OSError)
+    assert writer.speeches == []
+    assert fetcher.fetched < 30
+
+
+def test_write_stage_failure_stops_the_pipeline(conn, db_path):
+    writer = FakeWriter(fail=True)
+    pipeline, fetcher, ids_by_url = make_pipeline(conn, writer, 30, queue_size=1, write_batch_size=1)
+    thread, outcome = run_in_thread(pipeline, ids_by_url, db_path)
+
+    thread.join(TIMEOUT)
+    assert not thread.is_alive()
+    assert isinstance(outcome["error"], RuntimeError)
+    assert fetcher.fetched < 30
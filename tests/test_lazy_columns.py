@@ -0,0 +1,111 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from filtering_corpus.other_candidates import OtherCandidatesCorpus  # noqa: E402
+from filtering_corpus.speech_corpus import SpeechCorpus  # noqa: E402
+from parquet.partition import write_partitioned_corpus  # noqa: E402
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    speeches = pd.DataFrame({
+        "id": [1, 2, 3],
+        "title": ["Rally in Tulsa, Oklahoma - June 20, 2020", "Interview - May 1, 2016", "Speech - July 4, 2024"],
+        "date": ["June 20, 2020", "May 1, 2016", "July 4, 2024"],
+        "categories": '["Rally"]',
+    })
+    transcriptions = pd.DataFrame({
+        "id": range(1, 7),
+        "speech_id": [1, 1, 2, 2, 3, 3],
+        "timestamp": "00:00",
+        "person_name": ["Donald Trump"] * 4 + ["Joe Biden"] * 2,
+        "text": [f"Sentence {i}." for i in range(6)],
+        "text_basic": [f"sentence {i}" for i in range(6)],
+        "text_lemmatized": [f"lemma {i}" for i in range(6)],
+    })
+    speeches.to_parquet(tmp_path / "speeches.parquet", index=False)
+    transcriptions.to_parquet(tmp_path / "transcriptions.parquet", index=False)
+    transcriptions.to_parquet(tmp_path / "other_transcriptions.parquet", index=False)
+    return tmp_path
+
+
+def test_text_columns_are_loaded_on_demand(data_dir):
+    corpus = SpeechCorpus(data_dir=str(data_dir))
+    assert corpus.text_columns == ["text", "text_basic", "text_lemmatized"]
+    assert not set(corpus.text_columns) & set(corpus._transcriptions.columns)
+
+    full = corpus.get_full_speeches(text_columns="text_basic")
+    assert list(corpus._transcriptions.columns) == ["id", "speech_id", "timestamp", "person_name", "text_basic"]
+    assert full.set_index("id").loc[1, "text_basic"] == "sentence 0 sentence 1"
+
+
+def test_filtered_corpus_loads_its_own_rows(data_dir):
+    corpus = SpeechCorpus(data_dir=str(data_dir), columns=["text"]).get_campaign("2024")
+    transcriptions = corpus.get_transcriptions(["text", "text_lemmatized"])
+    assert transcriptions["text_lemmatized"].tolist() == ["lemma 4", "lemma 5"]
+    assert transcriptions["text"].tolist() == ["Sentence 4.", "Sentence 5."]
+
+
+def test_lazy_loading_matches_eager_reads(data_dir):
+    expected = pd.read_parquet(data_dir / "transcriptions.parquet")
+    pd.testing.assert_frame_equal(SpeechCorpus(data_dir=str(data_dir)).transcriptions, expected)
+
+    write_partitioned_corpus(data_dir)
+    corpus = SpeechCorpus(data_dir=str(data_dir), filters={"campaign": "2020"})
+    pd.testing.assert_frame_equal(corpus.transcriptions.reset_index(drop=True), expected.iloc[:2])
+
+    with pytest.raises(ValueError):
+        corpus.get_full_speeches(text_columns=["clean_v1"])
+
+
+def test_other_candidates_lazy_columns(data_dir):
+    biden = OtherCandidatesCorpus(data_dir=str(data_dir)).get_biden()
+    full = biden.get_full_speeches(text_columns=["text_lemmatized"])
+    assert full["text_lemmatized"].tolist() == ["lemma 4 lemma 5"]
+    assert "text" not in biden._transcriptions.columns
+
+
+def test_chained_filters_are_lazy(data_dir):
+    corpus = SpeechCorpus(data_dir=str(data_dir), columns=["text"])
+    filtered = corpus.filter_date(start_date="2017-01-01").get_rallies().get_by_location("tulsa")
+    # Nothing selected until the speeches or transcriptions are used
+    assert filtered._speeches is None and filtered._transcriptions_frame is None
+    assert repr(filtered) == "<SpeechCorpus: 1 speeches, 2 transcriptions>"
+    assert filtered._transcriptions_frame is None
+
+    assert filtered.speeches["id"].tolist() == [1]
+    assert filtered.get_transcriptions("text")["text"].tolist() == ["Sentence 0.", "Sentence 1."]
+    # The parent is untouched
+    assert len(corpus.speeches) == 3 and len(corpus._transcriptions) == 6
+
+
+def test_lazy_filters_match_eager_selection(data_dir):
+    corpus = SpeechCorpus(data_dir=str(data_dir))
+    speeches = corpus.speeches
+    expected = speeches[(speeches["campaign"] == "2020") & speeches["is_rally"]]
+
+    filtered = corpus.get_campaign("2020").filter({"is_rally": True, "category": "rally"})
+    pd.testing.assert_frame_equal(filtered.speeches, expected)
+    assert filtered.get_campaign_rallies("2024").speeches.empty
+    assert SpeechCorpus(data_dir=str(data_dir), filters={"campaign": ["2016", "2024"]}).speeches["id"].tolist() == [2, 3]
+
+
+def test_filtered_corpus_sees_columns_loaded_later(data_dir):
+    corpus = SpeechCorpus(data_dir=str(data_dir))
+    recent = corpus.remove_speeches_before(2020)
+    corpus.load_text_columns("text_basic")
+    # Rows are taken from the parent on first use, with the columns it loaded since
+    assert "text_basic" in recent._transcriptions.columns
+    assert recent.get_transcriptions("text_basic")["text_basic"].tolist() == [f"sentence {i}" for i in [0, 1, 4, 5]]
+
+
+def test_filters_apply_to_columns_loaded_at_construction(data_dir):
+    corpus = SpeechCorpus(data_dir=str(data_dir), filters={"campaign": "2024"}, columns=["text"])
+    assert len(corpus.transcriptions) == 2
+    assert corpus.get_transcriptions("text")["text"].tolist() == ["Sentence 4.", "Sentence 5."]
@@ -0,0 +1,66 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import simplemma
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.text_cleaning import lemmas
+from src.text_cleaning.cleaner import lemmatization, lemmatization_batch
+
+TEXTS = ["workers were running", "", None, "  the   running workers ", "mice geese running", float("nan")]
+
+
+def row_wise(text):
+    if not isinstance(text, str):
+        return ""
+    return " ".join(simplemma.lemmatize(word, lang="en") for word in text.split())
+
+
+def test_lemmatize_column_matches_row_wise():
+    expected = [row_wise(text) for text in TEXTS]
+    assert lemmas.lemmatize_column(TEXTS) == expected
+    assert lemmas.lemmatize_column(pd.Series(TEXTS)) == expected
+    assert lemmatization_batch(TEXTS) == expected
+    assert [lemmatization(text) if isinstance(text, str) else "" for text in TEXTS] == expected
+
+
+def test_each_distinct_word_is_lemmatized_once(monkeypatch):
+    calls = []
+
+    def counting(word, lang):
+        calls.append(word)
+        return word.upper()
+
+    monkeypatch.setattr(lemmas.simplemma, "lemmatize", counting)
+    lemmas.lemmatize_word.cache_clear()
+    try:
+        assert lemmas.lemmatize_column(["a b a", "b c", "a"]) == ["A B A", "B C", "A"]
+        assert sorted(calls) == ["a", "b", "c"]
+    finally:
+        lemmas.lemmatize_word.cache_clear()
+
+
+def test_lemma_table_round_trip(tmp_path, monkeypatch):
+    path = tmp_path / lemmas.LEMMA_TABLE_FILE
+    monkeypatch.setattr(lemmas, "_table", {})
+    assert lemmas.save_lemma_table(path, ["running", "geese", "running"]) == 2
+
+    monkeypatch.setattr(lemmas, "_table", {})
+    assert lemmas.load_lemma_table(path) == 2
+    assert lemmas._table == {"running": simplemma.lemmatize("running", lang="en"),
+                             "geese": simplemma.lemmatize("geese", lang="en")}
+
+    # Preloaded entries are served without calling simplemma
+    monkeypatch.setattr(lemmas.simplemma, "lemmatize", lambda word, lang: "unused")
+    assert lemmas.lemmatize_word("geese") == lemmas._table["geese"]
+    lemmas.lemmatize_word.cache_clear()
+
+
+def test_lemma_table_of_another_version_is_ignored(tmp_path, monkeypatch):
+    path = tmp_path / lemmas.LEMMA_TABLE_FILE
+    monkeypatch.setattr(lemmas, "_table", {})
+    lemmas.save_lemma_table(path, ["running"])
+    monkeypatch.setattr(lemmas.simplemma, "__version__", "0.0.0")
+    assert lemmas.load_lemma_table(path) == 0
@@ -0,0 +1,39 @@
+import sys
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from rollcall.page_extractor import extract_speech_page
+from rollcall.speech_decomposer import (get_title, get_date, get_cleaned_categories,
+                                        get_nbr_sentences_nbr_words_nbr_seconds, get_candidate_transcriptions)
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "factbase"
+PAGES = sorted(FIXTURES_DIR.glob("*.html"))
+
+
+@pytest.mark.parametrize("page_path", PAGES, ids=[p.stem for p in PAGES])
+@pytest.mark.parametrize("last_name,full_name", [("Trump", "Donald Trump"), ("Speaker", "Unknown Speaker")])
+def test_extractor_matches_decomposer(page_path, last_name, full_name):
+    html = page_path.read_text(encoding="utf-8")
+    soup = BeautifulSoup(html, "html.parser")
+
+    page = extract_speech_page(html)
+
+    assert page.title == get_title(soup)
+    assert page.date == get_date(soup)
+    assert page.candidate_stats(last_name) == get_nbr_sentences_nbr_words_nbr_seconds(soup, last_name)
+    # get_cleaned_categories goes through a set, only the content is comparable
+    assert sorted(page.categories) == sorted(get_cleaned_categories(soup))
+    assert page.candidate_transcriptions(full_name) == get_candidate_transcriptions(soup, full_name)
+
+
+def test_record_fields():
+    html = PAGES[0].read_text(encoding="utf-8")
+    record = extract_speech_page(html).to_record("Trump", "Donald Trump")
+    assert record["title"] == "Speech: Donald Trump Holds a Campaign Rally in Tulsa, Oklahoma"
+    assert record["nbr_sentences"] == "412"
+    assert len(record["transcriptions"]) == 3
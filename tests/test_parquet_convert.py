@@ -0,0 +1,102 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from parquet.convert import convert_sqlite_to_parquet  # noqa: E402
+from parquet.dataset import compact_dataset, fragment_paths, read_parquet_dataset  # noqa: E402
+from rollcall.speeches_db import init_db  # noqa: E402
+
+
+def add_speech(conn, title, texts):
+    url = f"https://rollcall.com/factbase/trump/transcript/{len(texts)}-{title}"
+    speech_id = conn.execute("INSERT INTO Speeches (url, title, nbr_words, person_name, candidate) "
+                             "VALUES (?, ?, '', 'Donald Trump', 'trump')", (url, title)).lastrowid
+    conn.executemany("INSERT INTO Transcriptions (speech_id, text) VALUES (?, ?)", [(speech_id, text) for text in texts])
+    conn.commit()
+
+
+def values(series):
+    return [None if pd.isna(value) else value for value in series]
+
+
+@pytest.fixture
+def db(tmp_path):
+    db_path = tmp_path / "speeches.db"
+    conn = init_db(db_path)
+    add_speech(conn, "A", ["one", "two", "three"])
+    add_speech(conn, "B", ["four", None])
+    # Not processed yet
+    conn.execute("INSERT INTO Speeches (url, candidate) VALUES ('pending', 'trump')")
+    conn.commit()
+    yield db_path, conn
+    conn.close()
+
+
+def test_full_conversion(db, tmp_path):
+    db_path, conn = db
+    counts = convert_sqlite_to_parquet(db_path, tmp_path, batch_size=2, row_group_size=3)
+    assert counts == {"speeches": 3, "transcriptions": 5}
+
+    transcriptions = pd.read_parquet(tmp_path / "transcriptions.parquet")
+    assert values(transcriptions["text"]) == ["one", "two", "three", "four", None]
+    assert transcriptions["person_name"].unique().tolist() == ["Donald Trump"]
+    speeches = pd.read_parquet(tmp_path / "speeches.parquet")
+    assert speeches["nbr_words"].isna().all()
+    # Batches of 2 rows are merged into row groups of 3
+    metadata = pq.ParquetFile(tmp_path / "transcriptions.parquet").metadata
+    assert [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)] == [3, 2]
+
+
+def test_full_conversion_preserves_derived_columns(db, tmp_path):
+    db_path, conn = db
+    convert_sqlite_to_parquet(db_path, tmp_path)
+    transcriptions = pd.read_parquet(tmp_path / "transcriptions.parquet")
+    transcriptions["text_basic"] = transcriptions["text"].str.upper()
+    transcriptions.to_parquet(tmp_path / "transcriptions.parquet", index=False)
+
+    add_speech(conn, "C", ["five"])
+    convert_sqlite_to_parquet(db_path, tmp_path, batch_size=2, row_group_size=2)
+    transcriptions = pd.read_parquet(tmp_path / "transcriptions.parquet")
+    assert transcriptions["id"].tolist() == [1, 2, 3, 4, 5, 6]
+    # Kept for the converted rows, left to the next cleaning run for the new one
+    assert values(transcriptions["text_basic"]) == ["ONE", "TWO", "THREE", "FOUR", None, None]
+
+
+def test_incremental_conversion(db, tmp_path):
+    db_path, conn = db
+    convert_sqlite_to_parquet(db_path, tmp_path)
+    transcriptions = pd.read_parquet(tmp_path / "transcriptions.parquet")
+    transcriptions["text_basic"] = "cleaned"
+    transcriptions.to_parquet(tmp_path / "transcriptions.parquet", index=False)
+
+    add_speech(conn, "C", ["five", "six"])
+    counts = convert_sqlite_to_parquet(db_path, tmp_path, incremental=True)
+    assert counts == {"speeches": 1, "transcriptions": 2}
+    assert len(fragment_paths(tmp_path / "transcriptions.parquet")) == 1
+
+    transcriptions = read_parquet_dataset(tmp_path / "transcriptions.parquet")
+    assert values(transcriptions["text"]) == ["one", "two", "three", "four", None, "five", "six"]
+    assert values(transcriptions["text_basic"]) == ["cleaned"] * 5 + [None, None]
+    speeches = read_parquet_dataset(tmp_path / "speeches.parquet")
+    assert sorted(speeches["title"].dropna()) == ["A", "B", "C"]
+
+    compact_dataset(tmp_path / "transcriptions.parquet")
+    assert pd.read_parquet(tmp_path / "transcriptions.parquet")["id"].tolist() == [1, 2, 3, 4, 5, 6, 7]
+
+
+def test_incremental_conversion_without_new_rows(db, tmp_path):
+    db_path, conn = db
+    # Only processed speeches are converted
+    assert convert_sqlite_to_parquet(db_path, tmp_path, incremental=True) == {"speeches": 2, "transcriptions": 5}
+    counts = convert_sqlite_to_parquet(db_path, tmp_path, incremental=True)
+    assert counts == {"speeches": 0, "transcriptions": 0}
+    # No empty fragment
+    assert len(fragment_paths(tmp_path / "speeches.parquet")) == 1
+    assert len(fragment_paths(tmp_path / "transcriptions.parquet")) == 1
+    assert not list(tmp_path.glob("**/.*.tmp"))
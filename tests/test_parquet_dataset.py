@@ -0,0 +1,102 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from parquet.dataset import (SpeechParquetWriter, compact_dataset, dataset_columns, dataset_exists,  # noqa: E402
+                             fragment_paths, fragments_dir, read_parquet_dataset, write_fragment)
+from parquet.speech_texts import build_speech_texts  # noqa: E402
+
+
+def speech(id):
+    return {"id": id, "url": f"https://example.com/{id}", "title": f"Speech {id}", "nbr_words": str(id * 10)}
+
+
+def transcriptions(id):
+    return [{"id": id * 10 + i, "speech_id": id, "text": f"line {i}"} for i in range(2)]
+
+
+def test_writer_buffers_speeches_into_fragments(tmp_path):
+    with SpeechParquetWriter(output_dir=tmp_path, batch_size=2) as writer:
+        for id in range(1, 4):
+            writer.add(speech(id), transcriptions(id))
+        # The first batch is written, the third speech is still buffered
+        assert len(fragment_paths(tmp_path / "speeches.parquet")) == 1
+    assert len(fragment_paths(tmp_path / "speeches.parquet")) == 2
+    assert not (tmp_path / "speeches.parquet").exists()
+
+    speeches = read_parquet_dataset(tmp_path / "speeches.parquet")
+    assert speeches["id"].tolist() == [1, 2, 3]
+    assert speeches["nbr_words"].tolist() == [10.0, 20.0, 30.0]
+    assert len(read_parquet_dataset(tmp_path / "transcriptions.parquet")) == 6
+
+
+def test_read_base_plus_fragments(tmp_path):
+    path = tmp_path / "transcriptions.parquet"
+    assert not dataset_exists(path)
+    # Base file with a cleaned column, fragment appended before it was cleaned
+    pd.DataFrame({"id": [1, 2], "text": ["a", "b"], "text_basic": ["a", "b"]}).to_parquet(path, index=False)
+    write_fragment(pd.DataFrame({"id": [3], "text": ["c"]}), path)
+
+    assert dataset_exists(path)
+    assert dataset_columns(path) == ["id", "text", "text_basic"]
+    df = read_parquet_dataset(path)
+    assert df["id"].tolist() == [1, 2, 3]
+    assert df["text_basic"].tolist()[:2] == ["a", "b"] and pd.isna(df["text_basic"].iloc[2])
+    assert read_parquet_dataset(path, columns=["id", "text_basic"]).columns.tolist() == ["id", "text_basic"]
+
+
+def test_compaction_merges_fragments(tmp_path):
+    path = tmp_path / "transcriptions.parquet"
+    pd.DataFrame({"id": [1], "text": ["a"]}).to_parquet(path, index=False)
+    for id in [2, 3, 4]:
+        write_fragment(pd.DataFrame({"id": [id], "text": [str(id)]}), path)
+
+    assert compact_dataset(path, row_group_size=2) == 3
+    assert not fragments_dir(path).exists()
+    assert pq.ParquetFile(path).metadata.num_row_groups == 2
+    assert pd.read_parquet(path)["id"].tolist() == [1, 2, 3, 4]
+    # Nothing left to merge
+    assert compact_dataset(path) == 0
+
+
+def test_read_missing_dataset(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        read_parquet_dataset(tmp_path / "speeches.parquet")
+
+
+def test_speeches_db_imports_from_project_root():
+    # Without src/ on the path, as the app and the notebooks import it
+    code = "from src.rollcall.speeches_db import SpeechParquetWriter"
+    subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, check=True)
+
+
+def test_compaction_keeps_the_latest_row_of_an_id(tmp_path):
+    path = tmp_path / "speeches.parquet"
+    # A speech written again after a crash between its fragment and its commit
+    write_fragment(pd.DataFrame({"id": [1, 2], "title": ["A", "B"]}), path)
+    write_fragment(pd.DataFrame({"id": [2, 3], "title": ["B again", "C"]}), path)
+    compact_dataset(path)
+    df = pd.read_parquet(path)
+    assert df["id"].tolist() == [1, 2, 3]
+    assert df["title"].tolist() == ["A", "B again", "C"]
+
+
+def test_readers_skip_replayed_rows(tmp_path):
+    path = tmp_path / "transcriptions.parquet"
+    pd.DataFrame({"id": [1, 2], "speech_id": [1, 1], "text": ["a", "b"]}).to_parquet(path, index=False)
+    # The batch of transcription 2 written again after a crash before its commit
+    write_fragment(pd.DataFrame({"id": [2], "speech_id": [1], "text": ["b"]}), path)
+
+    assert read_parquet_dataset(path)["id"].tolist() == [1, 2]
+    df = read_parquet_dataset(path, columns=["speech_id", "text"])
+    assert list(df.columns) == ["speech_id", "text"]
+    assert df["text"].tolist() == ["a", "b"]
+    speech_texts = pd.read_parquet(build_speech_texts(path))
+    assert speech_texts["text"].tolist() == ["a b"]
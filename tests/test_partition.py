@@ -0,0 +1,71 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from parquet.partition import (campaign_for_year, filter_expression, is_partitioned_current,  # noqa: E402
+                               read_partitioned, write_partitioned_corpus)
+from filtering_corpus.speech_corpus import SpeechCorpus  # noqa: E402
+
+DATES = ["2015-06-16", "2016-11-08", "2019-12-18", "2020-06-20", "2023-03-25", "2024-07-13", None]
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    speeches = pd.DataFrame({
+        "id": range(1, len(DATES) + 1),
+        "title": [f"Speech {i} Rally in Tulsa, Oklahoma - {d}" for i, d in enumerate(DATES)],
+        "date": [pd.Timestamp(d).strftime("%B %d, %Y") if d else "" for d in DATES],
+        "categories": '["Rally"]',
+    })
+    transcriptions = pd.DataFrame({
+        "id": range(1, 3 * len(DATES) + 1),
+        "speech_id": [i for i in range(1, len(DATES) + 1) for _ in range(3)],
+        "text": [f"sentence {i}" for i in range(3 * len(DATES))],
+    })
+    speeches.to_parquet(tmp_path / "speeches.parquet", index=False)
+    transcriptions.to_parquet(tmp_path / "transcriptions.parquet", index=False)
+    return tmp_path
+
+
+def test_campaign_for_year():
+    assert campaign_for_year(2016) == "2016"
+    assert campaign_for_year(2025) == "2024"
+    assert campaign_for_year(2018) == "Other"
+    assert campaign_for_year(float("nan")) is None
+
+
+def test_partitioned_filters_match_flat_corpus(data_dir):
+    flat = SpeechCorpus(data_dir=str(data_dir))
+    write_partitioned_corpus(data_dir, row_group_size=2)
+    assert is_partitioned_current(data_dir)
+
+    cases = [
+        ({"campaign": "2020"}, flat.get_campaign("2020")),
+        ({"start_date": "2019-01-01", "end_date": "2020-06-20"}, flat.filter_date("2019-01-01", "2020-06-20")),
+        ({"campaign": "2024", "is_rally": True}, flat.get_campaign_rallies("2024")),
+    ]
+    for filters, expected in cases:
+        partitioned = SpeechCorpus(data_dir=str(data_dir), filters=filters)
+        assert sorted(partitioned.speeches["id"]) == sorted(expected.speeches["id"])
+        assert sorted(partitioned.transcriptions["id"]) == sorted(expected.transcriptions["id"])
+        assert list(partitioned.transcriptions.columns) == list(flat.transcriptions.columns)
+
+
+def test_pushdown_prunes_partitions(data_dir):
+    speeches_dir, _ = write_partitioned_corpus(data_dir, row_group_size=2)
+    assert len(read_partitioned(speeches_dir, {"campaign": "2024"})) == 2
+    assert len(read_partitioned(speeches_dir, {"start_date": "2024-01-01"})) == 1
+    assert filter_expression({}) is None
+
+
+def test_stale_partitions_are_ignored(data_dir):
+    write_partitioned_corpus(data_dir)
+    speeches = pd.read_parquet(data_dir / "speeches.parquet")
+    speeches.iloc[:2].to_parquet(data_dir / "speeches.parquet", index=False)
+    assert not is_partitioned_current(data_dir)
+    assert len(SpeechCorpus(data_dir=str(data_dir), filters={"campaign": "2024"}).speeches) == 0
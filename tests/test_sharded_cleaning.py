@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+import simplemma
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.text_cleaning.cleaner import (FUSED_COLUMNS, basic_normalization, fused_cleaning, fused_cleaning_batch,
+                                       lemmatization)
+from src.text_cleaning.executor import ShardedExecutor
+from src.text_cleaning.lemmas import VERSION_METADATA_KEY
+from src.text_cleaning.pipeline import run_processing_steps
+
+TEXTS = [f"[Applause] Speech number {i}, we're going to WIN! The workers were running." for i in range(53)] + ["", "Thank you."]
+
+
+@pytest.fixture(scope="module")
+def executor():
+    with ShardedExecutor(n_workers=2, shard_size=7) as executor:
+        yield executor
+
+
+def test_results_are_reassembled_in_order(executor):
+    assert executor.map(basic_normalization, TEXTS) == basic_normalization.batch(TEXTS)
+    # Steps without a batch form run row by row in the workers
+    assert executor.map(str.upper, TEXTS) == [text.upper() for text in TEXTS]
+
+
+def test_multi_column_steps(executor):
+    assert executor.map(fused_cleaning, TEXTS) == fused_cleaning_batch(TEXTS)
+
+
+def test_worker_stats(executor):
+    executor.map(lemmatization, TEXTS)
+    assert 1 <= len(executor.worker_stats) <= 2
+    assert sum(stats["rows"] for stats in executor.worker_stats.values()) >= len(TEXTS)
+
+
+def test_run_processing_steps_with_executor(executor, tmp_path):
+    step = {"name": "fused", "input_col": "text", "output_cols": FUSED_COLUMNS, "func": fused_cleaning}
+    frames = []
+    for name, kwargs in [("local", {}), ("sharded", {"executor": executor})]:
+        path = tmp_path / f"{name}.parquet"
+        pd.DataFrame({"id": range(len(TEXTS) + 1), "text": TEXTS + [None]}).to_parquet(path, index=False)
+        run_processing_steps(str(path), [step], **kwargs)
+        frames.append(pd.read_parquet(path))
+    pd.testing.assert_frame_equal(*frames)
+
+
+def test_workers_preload_the_lemma_table(tmp_path):
+    # A lemma simplemma would never give, so it can only come from the table
+    path = tmp_path / "lemmas.parquet"
+    table = pa.table({"word": ["workers"], "lemma": ["from-the-table"]})
+    pq.write_table(table.replace_schema_metadata({VERSION_METADATA_KEY: simplemma.__version__}), path)
+    with ShardedExecutor(n_workers=1, lemma_table=path) as executor:
+        assert executor.map(lemmatization, ["the workers were running"]) == ["the from-the-table be run"]
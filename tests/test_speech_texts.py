@@ -0,0 +1,93 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from filtering_corpus.other_candidates import OtherCandidatesCorpus  # noqa: E402
+from filtering_corpus.speech_corpus import SpeechCorpus  # noqa: E402
+from parquet.dataset import write_fragment  # noqa: E402
+from parquet.speech_texts import (build_speech_texts, is_speech_texts_current,  # noqa: E402
+                                  read_speech_texts, speech_texts_path)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    speeches = pd.DataFrame({
+        "id": [1, 2, 3],
+        "title": ["Rally in Tulsa, Oklahoma - June 20, 2020", "Interview - May 1, 2016", "Speech - July 4, 2024"],
+        "date": ["June 20, 2020", "May 1, 2016", "July 4, 2024"],
+        "categories": '["Rally"]',
+    })
+    transcriptions = pd.DataFrame({
+        "id": [1, 2, 3, 4, 5, 6, 7],
+        "speech_id": [1, 1, 2, 2, 3, 3, 3],
+        "timestamp": "00:00",
+        "person_name": ["Donald Trump"] * 4 + ["Joe Biden"] * 3,
+        "text": ["First.", "Second.", "Hello.", "World.", "A", "B", "C"],
+        "text_basic": ["first", "second", "hello", "world", "a", "b", "c"],
+    })
+    speeches.to_parquet(tmp_path / "speeches.parquet", index=False)
+    transcriptions.to_parquet(tmp_path / "transcriptions.parquet", index=False)
+    transcriptions.to_parquet(tmp_path / "other_transcriptions.parquet", index=False)
+    return tmp_path
+
+
+def test_speech_texts_match_groupby(data_dir):
+    corpus = SpeechCorpus(data_dir=str(data_dir))
+    expected = corpus.get_full_speeches(text_columns=["text", "text_basic"])
+
+    path = build_speech_texts(data_dir / "transcriptions.parquet")
+    assert path == speech_texts_path(data_dir / "transcriptions.parquet")
+    full = SpeechCorpus(data_dir=str(data_dir)).get_full_speeches(text_columns=["text", "text_basic"])
+    pd.testing.assert_frame_equal(full, expected)
+    assert full.set_index("id").loc[1, "text"] == "First. Second."
+
+
+def test_served_without_reading_transcription_text(data_dir):
+    build_speech_texts(data_dir / "transcriptions.parquet")
+    corpus = SpeechCorpus(data_dir=str(data_dir)).get_campaign("2016")
+    full = corpus.get_full_speeches(text_columns="text_basic")
+    assert full["text_basic"].tolist() == ["hello world"]
+    assert "text_basic" not in corpus._transcriptions.columns
+
+
+def test_other_candidates_speech_texts(data_dir):
+    expected = OtherCandidatesCorpus(data_dir=str(data_dir)).get_biden().get_full_speeches(["text"])
+    build_speech_texts(data_dir / "other_transcriptions.parquet")
+    biden = OtherCandidatesCorpus(data_dir=str(data_dir)).get_biden()
+    pd.testing.assert_frame_equal(biden.get_full_speeches(["text"]), expected)
+
+
+def test_stale_table_is_not_served(data_dir):
+    transcriptions_path = data_dir / "transcriptions.parquet"
+    build_speech_texts(transcriptions_path)
+    assert is_speech_texts_current(transcriptions_path)
+    assert read_speech_texts(transcriptions_path, ["text"], speech_ids=[]).empty
+    assert read_speech_texts(transcriptions_path, ["missing"]) is None
+
+    write_fragment(pd.DataFrame({"id": [8], "speech_id": [3], "text": ["D"]}), transcriptions_path)
+    assert not is_speech_texts_current(transcriptions_path)
+    full = SpeechCorpus(data_dir=str(data_dir)).get_full_speeches(text_columns="text")
+    assert full.set_index("id").loc[3, "text"] == "A B C D"
+
+
+def test_null_transcriptions_are_joined_as_empty_strings(data_dir):
+    for name in ["transcriptions.parquet", "other_transcriptions.parquet"]:
+        transcriptions = pd.read_parquet(data_dir / name)
+        transcriptions.loc[[1, 5], "text"] = None
+        transcriptions.to_parquet(data_dir / name, index=False)
+
+    expected = SpeechCorpus(data_dir=str(data_dir)).get_full_speeches(text_columns="text")
+    assert expected.set_index("id").loc[1, "text"] == "First. "
+    build_speech_texts(data_dir / "transcriptions.parquet")
+    pd.testing.assert_frame_equal(SpeechCorpus(data_dir=str(data_dir)).get_full_speeches(text_columns="text"), expected)
+
+    expected = OtherCandidatesCorpus(data_dir=str(data_dir)).get_biden().get_full_speeches(["text"])
+    assert expected["text"].tolist() == ["A  C"]
+    build_speech_texts(data_dir / "other_transcriptions.parquet")
+    pd.testing.assert_frame_equal(OtherCandidatesCorpus(data_dir=str(data_dir)).get_biden().get_full_speeches(["text"]),
+                                  expected)
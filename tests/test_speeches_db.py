@@ -0,0 +1,171 @@
+import importlib.util
+import sqlite3
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from parquet import dataset  # noqa: E402
+from parquet.convert import convert_sqlite_to_parquet  # noqa: E402
+from parquet.dataset import SpeechParquetWriter, dataset_exists, read_parquet_dataset  # noqa: E402
+from rollcall.page_cache import PageCache  # noqa: E402
+from rollcall.speeches_db import init_db, pending_speeches, save_speeches  # noqa: E402
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "factbase"
+PAGE = "trump-speech-rally-tulsa-oklahoma-june-20-2020.html"
+URL = f"https://rollcall.com/factbase/trump/transcript/{PAGE[:-5]}"
+
+
+def load_script(name):
+    spec = importlib.util.spec_from_file_location(name, PROJECT_ROOT / "scripts" / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_reparse_from_cache_rebuilds_parquet(tmp_path):
+    db_path = tmp_path / "speeches.db"
+    conn = init_db(db_path)
+    conn.execute("INSERT INTO Speeches (url, candidate) VALUES (?, 'trump')", (URL,))
+    conn.execute("INSERT INTO Transcriptions (speech_id, text) VALUES (1, 'stale text')")
+    conn.commit()
+    convert_sqlite_to_parquet(db_path=db_path, output_dir=tmp_path)
+    transcriptions = pd.read_parquet(tmp_path / "transcriptions.parquet")
+    # A cleaned column, attached to the old transcription ids
+    transcriptions["text_basic"] = "stale"
+    transcriptions.to_parquet(tmp_path / "transcriptions.parquet", index=False)
+
+    cache = PageCache(tmp_path / "cache")
+    cache.put(URL, (FIXTURES_DIR / PAGE).read_text(encoding="utf-8"))
+    process_speeches = load_script("process_speeches")
+    reparsed = process_speeches.reparse_from_cache(conn, cache, "trump", "Trump", "Donald Trump", "Donald Trump",
+                                                   db_path, output_dir=tmp_path)
+    assert reparsed == 1
+
+    expected = pd.read_sql_query("SELECT id, text FROM Transcriptions ORDER BY id", conn)
+    transcriptions = pd.read_parquet(tmp_path / "transcriptions.parquet")
+    assert len(expected) > 1 and "stale text" not in expected["text"].tolist()
+    assert transcriptions["id"].tolist() == expected["id"].tolist()
+    assert transcriptions["text"].tolist() == expected["text"].tolist()
+    # Left for the next cleaning run to recompute
+    assert transcriptions["text_basic"].isna().all()
+    assert pd.read_parquet(tmp_path / "speeches.parquet")["title"].notna().all()
+    conn.close()
+
+
+def parsed_record(title, texts):
+    return {"title": title, "date": "2020-06-20", "nbr_sentences": len(texts), "nbr_words": 2 * len(texts),
+            "nbr_seconds": 10, "categories": "Rally", "transcriptions": [("00:00", text) for text in texts]}
+
+
+def test_init_db_adds_and_backfills_candidate(tmp_path):
+    db_path = tmp_path / "speeches.db"
+    conn = sqlite3.connect(db_path)
+    # Schema of the databases created before the candidate column
+    conn.execute("CREATE TABLE Speeches (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT UNIQUE, title TEXT, date TEXT, "
+                 "nbr_sentences INTEGER, nbr_words INTEGER, nbr_seconds INTEGER, categories TEXT, person_name TEXT)")
+    conn.executemany("INSERT INTO Speeches (url) VALUES (?)", [(URL,), ("https://rollcall.com/factbase/biden/transcript/a",),
+                                                               ("https://example.com/other",)])
+    conn.commit()
+    conn.close()
+
+    conn = init_db(db_path)
+    assert conn.execute("SELECT candidate FROM Speeches ORDER BY id").fetchall() == [("trump",), ("biden",), (None,)]
+    # Running it again keeps the data
+    conn.close()
+    conn = init_db(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM Speeches WHERE candidate IS NOT NULL").fetchone()[0] == 2
+    conn.close()
+
+
+def test_pending_speeches_use_the_partial_index(tmp_path):
+    conn = init_db(tmp_path / "speeches.db")
+    conn.executemany("INSERT INTO Speeches (url, candidate, title) VALUES (?, ?, ?)", [
+        ("https://rollcall.com/factbase/trump/transcript/a", "trump", None),
+        ("https://rollcall.com/factbase/trump/transcript/b", "trump", "Done"),
+        ("https://rollcall.com/factbase/biden/transcript/c", "biden", None),
+        ("https://rollcall.com/factbase/trump/transcript/d", "trump", None),
+    ])
+    conn.commit()
+    assert pending_speeches(conn, "trump") == [(1, "https://rollcall.com/factbase/trump/transcript/a"),
+                                               (4, "https://rollcall.com/factbase/trump/transcript/d")]
+
+    plan = conn.execute("EXPLAIN QUERY PLAN SELECT id, url FROM Speeches WHERE title IS NULL AND candidate=? ORDER BY id",
+                        ("trump",)).fetchall()
+    assert "idx_speeches_pending" in " ".join(row[-1] for row in plan)
+    plan = conn.execute("EXPLAIN QUERY PLAN SELECT * FROM Transcriptions WHERE speech_id=?", (1,)).fetchall()
+    assert "idx_transcriptions_speech_id" in " ".join(row[-1] for row in plan)
+    conn.close()
+
+
+def test_save_speeches_writes_parquet_before_commit(tmp_path):
+    conn = init_db(tmp_path / "speeches.db")
+    conn.executemany("INSERT INTO Speeches (url, candidate) VALUES (?, 'trump')", [("a",), ("b",)])
+    conn.commit()
+    batch = [(1, "a", parsed_record("A", ["one", "two"])), (2, "b", parsed_record("B", ["three"]))]
+    writer = SpeechParquetWriter(output_dir=tmp_path, batch_size=1)
+    save_speeches(conn, batch, "Donald Trump", writer)
+
+    assert pending_speeches(conn, "trump") == []
+    transcriptions = read_parquet_dataset(tmp_path / "transcriptions.parquet").sort_values("id")
+    expected = pd.read_sql_query("SELECT id, text FROM Transcriptions ORDER BY id", conn)
+    assert transcriptions["id"].tolist() == expected["id"].tolist()
+    assert transcriptions["text"].tolist() == ["one", "two", "three"]
+    conn.close()
+
+
+def test_save_speeches_rolls_back_when_parquet_fails(tmp_path):
+    conn = init_db(tmp_path / "speeches.db")
+    conn.executemany("INSERT INTO Speeches (url, candidate) VALUES (?, 'trump')", [("a",), ("b",)])
+    conn.execute("INSERT INTO Transcriptions (speech_id, text) VALUES (1, 'previous')")
+    conn.commit()
+
+    class FailingWriter(SpeechParquetWriter):
+        def flush(self):
+            # The first batch reaches the disk, the second one fails
+            if self._speeches and self._speeches[0]["id"] == 2:
+                raise OSError("disk full")
+            return super().flush()
+
+    batch = [(1, "a", parsed_record("A", ["one"])), (2, "b", parsed_record("B", ["two"]))]
+    with pytest.raises(OSError):
+        save_speeches(conn, batch, "Donald Trump", FailingWriter(output_dir=tmp_path, batch_size=1))
+
+    # Still pending, previous transcriptions kept, and no fragment of the batch left behind
+    assert [id for id, _ in pending_speeches(conn, "trump")] == [1, 2]
+    assert conn.execute("SELECT speech_id, text FROM Transcriptions").fetchall() == [(1, "previous")]
+    assert not dataset_exists(tmp_path / "speeches.parquet")
+    assert not dataset_exists(tmp_path / "transcriptions.parquet")
+    # The connection is usable again
+    save_speeches(conn, batch, "Donald Trump", SpeechParquetWriter(output_dir=tmp_path))
+    assert pending_speeches(conn, "trump") == []
+    conn.close()
+
+
+def test_failed_flush_leaves_no_fragment(tmp_path, monkeypatch):
+    conn = init_db(tmp_path / "speeches.db")
+    conn.execute("INSERT INTO Speeches (url, candidate) VALUES ('a', 'trump')")
+    conn.commit()
+
+    write_fragment = dataset.write_fragment
+
+    def failing(df, parquet_path):
+        # The speeches fragment is written, the transcriptions one fails
+        if "transcriptions" in str(parquet_path):
+            raise OSError("disk full")
+        return write_fragment(df, parquet_path)
+
+    monkeypatch.setattr(dataset, "write_fragment", failing)
+    with pytest.raises(OSError):
+        with SpeechParquetWriter(output_dir=tmp_path) as writer:
+            save_speeches(conn, [(1, "a", parsed_record("A", ["one"]))], "Donald Trump", writer)
+
+    assert pending_speeches(conn, "trump") == [(1, "a")]
+    assert not dataset_exists(tmp_path / "speeches.parquet")
+    assert not dataset_exists(tmp_path / "transcriptions.parquet")
+    assert writer._speeches == [] and writer._transcriptions == []
+    conn.close()
@@ -0,0 +1,85 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.text_cleaning import export
+from src.text_cleaning.lemmas import lemmatize_word
+
+TRANSCRIPTIONS = [
+    (1, "We will make America great again. [APPLAUSE] Great!"),
+    (1, None),
+    (2, "The workers were running... Who knows?"),
+    (2, "[CHEERS]"),
+    (3, "Mice and geese! The wall, the wall."),
+]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "speeches.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE Transcriptions (id INTEGER PRIMARY KEY AUTOINCREMENT, speech_id INTEGER NOT NULL, "
+                 "timestamp TEXT, duration TEXT, text TEXT)")
+    conn.executemany("INSERT INTO Transcriptions (speech_id, text) VALUES (?, ?)", TRANSCRIPTIONS)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def expected_tokens():
+    # Row-wise reference, one nlp call per transcription
+    nlp = export.cleaner.get_nlp()
+    rows = []
+    for i, (speech_id, text) in enumerate(TRANSCRIPTIONS, start=1):
+        if text is None:
+            continue
+        doc = nlp(export.clean_phrase(text))
+        rows.append((i, speech_id, [lemmatize_word(token.text) for token in doc
+                                    if not (token.is_punct or token.is_space or token.is_stop)]))
+    return rows
+
+
+@pytest.mark.parametrize("fmt", export.FORMATS)
+def test_export_matches_row_wise(db_path, tmp_path, fmt):
+    output_dir = tmp_path / "tokens"
+    # Small batches and shards to go through several of each
+    manifest = export.export_tokens(db_path, output_dir, fmt=fmt, batch_size=2, shard_tokens=3)
+
+    expected = expected_tokens()
+    assert list(export.iter_exported_tokens(output_dir)) == expected
+    assert manifest["transcriptions"] == len(expected)
+    assert manifest["tokens"] == sum(len(tokens) for _, _, tokens in expected)
+    assert len(manifest["shards"]) > 1
+    assert "worker" in [token for _, _, tokens in expected for token in tokens]
+
+
+def test_npy_export_shards_and_vocab(db_path, tmp_path):
+    output_dir = tmp_path / "tokens"
+    export.export_tokens(db_path, output_dir, fmt="npy", batch_size=2, shard_tokens=3)
+    vocab = export.load_vocab(output_dir)
+    assert len(vocab) == len(set(vocab))
+
+    tokens = []
+    for shard in export.iter_token_shards(output_dir):
+        assert shard["ids"].dtype.name == "int32"
+        assert len(shard["offsets"]) == len(shard["transcription_ids"]) + 1
+        tokens.extend(vocab[i] for i in shard["ids"])
+    assert tokens == [token for _, _, row in expected_tokens() for token in row]
+
+
+def test_export_replaces_previous_output(db_path, tmp_path):
+    output_dir = tmp_path / "tokens"
+    export.export_tokens(db_path, output_dir, fmt="npy", shard_tokens=3)
+    export.export_tokens(db_path, output_dir, fmt="jsonl")
+    assert export.load_vocab(output_dir) is None
+    assert sorted(path.name for path in output_dir.iterdir()) == ["manifest.json", "tokens-00000.jsonl"]
+    assert not (tmp_path / ".tokens.tmp").exists()
+
+
+def test_unknown_format(db_path, tmp_path):
+    with pytest.raises(ValueError):
+        export.export_tokens(db_path, tmp_path / "tokens", fmt="csv")
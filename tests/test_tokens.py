@@ -0,0 +1,88 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from filtering_corpus.speech_corpus import SpeechCorpus  # noqa: E402
+from parquet.tokens import TokenCorpus, build_token_corpus, is_token_corpus_current  # noqa: E402
+
+TEXTS = ["make america great again", " the  wall , the wall ", "", "china china china", "Great people"]
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    pd.DataFrame({
+        "id": [1, 2, 3],
+        "title": ["Rally in Tulsa, Oklahoma - June 20, 2020", "Interview - May 1, 2016", "Speech - July 4, 2024"],
+        "date": ["June 20, 2020", "May 1, 2016", "July 4, 2024"],
+        "categories": '["Rally"]',
+    }).to_parquet(tmp_path / "speeches.parquet", index=False)
+    pd.DataFrame({
+        "id": range(1, 6),
+        "speech_id": [1, 1, 2, 3, 3],
+        "text": TEXTS,
+        "text_basic": TEXTS,
+        "text_lemmatized": [text.lower() for text in TEXTS],
+    }).to_parquet(tmp_path / "transcriptions.parquet", index=False)
+    build_token_corpus(tmp_path / "transcriptions.parquet")
+    return tmp_path
+
+
+def test_texts_are_rebuilt_from_ids(data_dir):
+    corpus = SpeechCorpus(data_dir=str(data_dir))
+    tokens = corpus.get_tokens()
+    assert tokens.columns == ["text_basic", "text_lemmatized"]
+    full = corpus.get_full_speeches(text_columns=tokens.columns)
+    for col in tokens.columns:
+        assert tokens.texts(col) == [" ".join(text.split()) for text in full[col]]
+    assert tokens.ids("text_basic").dtype == np.int32
+
+
+def test_vocabulary_is_shared_and_masked(data_dir):
+    tokens = TokenCorpus.load(data_dir / "transcriptions.parquet")
+    # "great" (2 + 1) and "Great" (1) are distinct tokens of the shared vocabulary
+    assert tokens.vocab[0] in {"china", "the", "wall"}
+    assert tokens.token_id("Great") >= 0 and tokens.token_id("Great") != tokens.token_id("great")
+    assert tokens.stopword_mask[tokens.token_id("the")]
+    assert tokens.punct_mask[tokens.token_id(",")]
+    assert not tokens.stopword_mask[tokens.token_id("wall")]
+
+
+def test_vectorized_counts_match_split(data_dir):
+    corpus = SpeechCorpus(data_dir=str(data_dir)).get_campaign("2024")
+    tokens = corpus.get_tokens(["text_lemmatized"])
+    text = corpus.get_full_speeches("text_lemmatized")["text_lemmatized"].iloc[0]
+    words = ["china", "great", "unknown"]
+    assert tokens.count_words("text_lemmatized", words).tolist() == [[text.split().count(word) for word in words]]
+
+    n_tokens, n_types = tokens.type_token_counts("text_lemmatized")
+    assert (n_tokens[0], n_types[0]) == (len(text.split()), len(set(text.split())))
+
+    from spacy.lang.en.stop_words import STOP_WORDS
+    rally = SpeechCorpus(data_dir=str(data_dir)).get_campaign("2020")
+    tokens = rally.get_tokens(["text_lemmatized"])
+    words = [word for word in rally.get_full_speeches("text_lemmatized")["text_lemmatized"].iloc[0].split()
+             if word not in STOP_WORDS and word != ","]
+    n_tokens, n_types = tokens.type_token_counts("text_lemmatized", tokens.stopword_mask | tokens.punct_mask)
+    assert (n_tokens.tolist(), n_types.tolist()) == ([len(words)], [len(set(words))])
+
+
+def test_subset_keeps_requested_order(data_dir):
+    tokens = TokenCorpus.load(data_dir / "transcriptions.parquet", columns=["text_basic"])
+    subset = tokens.subset([3, 1, 99])
+    assert subset.speech_ids.tolist() == [3, 1]
+    assert subset.texts("text_basic") == ["china china china Great people", "make america great again the wall , the wall"]
+    assert tokens.speech_tokens("text_basic", 3).tolist() == subset.speech_tokens("text_basic", 3).tolist()
+
+
+def test_stale_tokens_are_not_loaded(data_dir):
+    pd.DataFrame({"id": [1], "speech_id": [1], "text_basic": ["new"]}).to_parquet(
+        data_dir / "transcriptions.parquet", index=False
+    )
+    assert not is_token_corpus_current(data_dir / "transcriptions.parquet")
+    assert TokenCorpus.load(data_dir / "transcriptions.parquet") is None
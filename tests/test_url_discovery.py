@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+pytest.importorskip("selenium")
+pytest.importorskip("chromedriver_autoinstaller")
+
+from rollcall.scroller import scroll_until_known, scroll_to_bottom
+from rollcall.url_extractor import extract_urls
+
+SEARCH_PAGE = (Path(__file__).parent / "fixtures" / "search" / "index.html").resolve().as_uri()
+URL = "https://rollcall.com/factbase/trump/transcript/speech-{}"
+
+
+@pytest.fixture(scope="module")
+def browser():
+    from rollcall.browser_setup import get_browser
+    try:
+        browser = get_browser(headless=True)
+    except Exception as e:
+        pytest.skip(f"Chrome is not available: {e}")
+    yield browser
+    browser.quit()
+
+
+def test_scroll_until_known_stops_at_first_known_batch(browser):
+    browser.get(SEARCH_PAGE)
+    # Speeches 20 and older are already in the database
+    known_urls = {URL.format(i) for i in range(20, 50)}
+
+    urls = scroll_until_known(browser, known_urls, timeout=2)
+
+    # The third batch (20-29) is fully known, the rest of the list is never loaded
+    assert urls == [URL.format(i) for i in range(30)]
+    assert len(extract_urls(browser)) == 30
+
+
+def test_scroll_until_known_reaches_end_when_all_new(browser):
+    browser.get(SEARCH_PAGE)
+    urls = scroll_until_known(browser, set(), timeout=2)
+    assert urls == [URL.format(i) for i in range(50)]
+
+
+def test_scroll_to_bottom_loads_everything(browser):
+    browser.get(SEARCH_PAGE)
+    scroll_to_bottom(browser, timeout=2)
+    assert len(extract_urls(browser)) == 50